@@ -0,0 +1,166 @@
+"""
+Benchmarks du pipeline d'analyse : python -m benchmarks.run --funds 100 --years 20
+
+Un univers synthétique (voir benchmarks.synthetic) est écrit dans un dossier temporaire, puis chaque étape du pipeline
+est chronométrée : lecture des sources, nettoyage, écriture et relecture du cache, alignement des rendements, métriques,
+ACP, régression et backtest des allocations. Les résultats sont écrits en JSON (par défaut
+benchmarks/results/<commit>.json) pour comparer deux commits avec --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate, LAYOUTS
+from src.cache import NumpyStore
+from src.datafile import DataFile
+from src.downsample import downsample
+from src.drawdown import drawdown_stats
+from src.factoranalysis import principal_components
+from src.factorlibrary import AQR_FACTORS, import_sheet
+from src.metrics import batch_metrics
+from src.panel import ReturnPanel
+from src.portfolio import backtest
+from src.regression import factor_regression
+from src.rolling import rolling_metrics
+from src.walkforward import walk_forward_pca
+
+RESULTS = "benchmarks/results"
+
+@contextmanager
+def stage(timings, name):
+    """Ajoute la durée du bloc à timings[name], en secondes."""
+    start = time.perf_counter()
+    yield
+    timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+def run_pipeline(universe, root, repeat = 3):
+    """
+    Exécute et chronomètre chaque étape du pipeline sur un univers synthétique.
+
+    Les étapes de lecture ne sont exécutées qu'une fois (le cache d'écriture du système de fichiers les rendrait
+    sinon trompeuses) ; les étapes de calcul sont répétées repeat fois et la durée la plus courte est retenue.
+
+    Returns:
+        dict: La durée de chaque étape, en secondes.
+    """
+    timings = {}
+    frames = {}
+    for name, details in universe["funds"].items():
+        datafile = DataFile(**details["datafile"])
+        timings["ingestion"] = timings.get("ingestion", 0.0) + datafile.timings["import"]
+        timings["cleaning"] = timings.get("cleaning", 0.0) + datafile.timings["filter"] + datafile.timings["clean"]
+        frames[name] = datafile.data
+    params = universe["factors"]
+    with stage(timings, "ingestion"): # le classeur des facteurs est ouvert une seule fois, comme dans FactorLibrary
+        raw = pd.read_excel(f"{params['RF']['filepath']}/{params['RF']['filename']}.xlsx", sheet_name=list(params))
+    with stage(timings, "cleaning"):
+        factors = {name: import_sheet(params[name], name != "RF", raw[name]) for name in params}
+    with stage(timings, "ingestion"):
+        bench = DataFile(**universe["bench"]).data
+
+    store = NumpyStore(os.path.join(root, "loaded"))
+    with stage(timings, "cache write"):
+        for name, data in frames.items():
+            store.write(f"funds/{name}", data)
+    with stage(timings, "cache read"):
+        frames = {name: store.read(f"funds/{name}") for name in frames}
+
+    def align():
+        returns = [pd.DataFrame({'Date': data['Date'], name: data['VL'].pct_change() * 100}) for name, data in frames.items()]
+        bench_returns = pd.DataFrame({'Date': bench['Date'], 'SPX': bench['Price'].pct_change() * 100})
+        factor_panel = factors[AQR_FACTORS[0]]
+        for name in AQR_FACTORS[1:] + ["RF"]:
+            factor_panel = pd.merge(factor_panel, factors[name], on='Date', how='outer')
+        return ReturnPanel.from_frames(returns + [bench_returns, factor_panel])
+    panel = _best(timings, "alignment", align, repeat)
+
+    funds = list(frames)
+    returns = np.column_stack([panel.column(name) for name in funds])
+    rf, spx = panel.column("RF"), panel.column("SPX")
+    us = np.column_stack([panel.column(f"{name} US") for name in AQR_FACTORS])
+    windows = [panel.locate(start) for start in (panel.dates[-252 * years] for years in (1, 3, 5) if 252 * years < len(panel.dates))]
+    _best(timings, "metrics", lambda: batch_metrics(returns, rf, windows, spx), repeat)
+    _best(timings, "resampling", lambda: panel.resample("M"), repeat)
+    _best(timings, "drawdowns", lambda: drawdown_stats(returns, spx), repeat)
+    underwater = pd.DataFrame(drawdown_stats(returns[:, :20])['Underwater'], index=panel.dates)
+    _best(timings, "chart downsampling", lambda: [downsample(underwater[column], method=method) for column in underwater.columns
+                                                  for method in ("lttb", "minmax")], repeat)
+    _best(timings, "rolling metrics", lambda: rolling_metrics(returns, spx, rf), repeat)
+    valid = ~np.isnan(us).any(axis=1) & ~np.isnan(rf)
+    _best(timings, "regression", lambda: factor_regression(returns[valid], us[valid], rf[valid]), repeat)
+    _best(timings, "pca", lambda: principal_components(us[valid] / us[valid].std(axis=0)), repeat)
+    _best(timings, "walk-forward pca", lambda: walk_forward_pca(us[valid], window=252), repeat)
+    _best(timings, "portfolio backtest", lambda: backtest(returns, rf, windows), repeat)
+    return timings
+
+def _best(timings, name, compute, repeat):
+    durations, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = compute()
+        durations.append(time.perf_counter() - start)
+    timings[name] = min(durations)
+    return result
+
+def environment():
+    """Commit courant et versions, pour situer les résultats."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def compare(results, previous):
+    """Affiche, étape par étape, le rapport entre les durées de results et celles d'un fichier de résultats précédent."""
+    with open(previous, encoding="utf-8") as f:
+        reference = json.load(f)
+    print(f"{'étape':<20}{reference['environment']['commit']:>12}{results['environment']['commit']:>12}{'ratio':>8}")
+    for name, duration in results["stages"].items():
+        before = reference["stages"].get(name)
+        ratio = f"{duration / before:8.2f}" if before else f"{'-':>8}"
+        print(f"{name:<20}{before if before is not None else float('nan'):12.4f}{duration:12.4f}{ratio}")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Chronomètre le pipeline d'analyse sur des données synthétiques.")
+    parser.add_argument("--funds", type=int, default=10, help="Nombre de fonds (par défaut : 10).")
+    parser.add_argument("--years", type=int, default=5, help="Profondeur de l'historique en années (par défaut : 5).")
+    parser.add_argument("--layouts", nargs="*", default=list(LAYOUTS), choices=LAYOUTS, help="Mises en page des fichiers des fonds.")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions des étapes de calcul (la plus courte est retenue).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", help="Dossier des données synthétiques (par défaut : dossier temporaire supprimé à la fin).")
+    parser.add_argument("--output", help=f"Fichier de résultats (par défaut : {RESULTS}/<commit>.json).")
+    parser.add_argument("--compare", help="Fichier de résultats précédent à comparer.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.data or tmp
+        start = time.perf_counter()
+        universe = generate(root, args.funds, args.years, tuple(args.layouts), args.seed)
+        generation = time.perf_counter() - start
+        stages = run_pipeline(universe, root, args.repeat)
+
+    results = {"environment": environment(),
+               "parameters": {"funds": args.funds, "years": args.years, "layouts": args.layouts, "repeat": args.repeat, "seed": args.seed},
+               "generation": generation,
+               "stages": stages}
+    output = args.output or os.path.join(RESULTS, f"{results['environment']['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    for name, duration in stages.items():
+        print(f"{name:<20}{duration:10.4f}s")
+    print(f"Résultats écrits dans {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Génération de données synthétiques dans les formats acceptés par DataFile, pour les benchmarks.
+
+Les fonds sont écrits selon trois mises en page inspirées des fichiers réels :
+    - 'csv' : export AQR (lignes d'en-tête parasites, date et heure en colonne 2, VL en colonne 6) ;
+    - 'xlsx' : export JPM (titre sur plusieurs lignes, dates "%d.%m.%Y" en colonne 0, VL en colonne 1) ;
+    - 'csv-comma' : export Schroder (virgule décimale, valeurs entre guillemets, plusieurs parts mêlées filtrées
+      par ISIN, dates les plus récentes en premier).
+Les facteurs et le taux sans risque suivent le classeur AQR (une feuille par série, régions US et Global en colonnes
+25 et 26) et le benchmark le fichier du S&P 500.
+"""
+import csv
+import os
+import numpy as np
+import pandas as pd
+
+from src.factorlibrary import AQR_FACTORS
+
+LAYOUTS = ("csv", "xlsx", "csv-comma")
+
+def generate(root, n_funds = 10, years = 5, layouts = LAYOUTS, seed = 0):
+    """
+    Écrit un univers synthétique sous root et renvoie les paramètres DataFile pour le relire.
+
+    Les rendements des fonds suivent un modèle à facteurs (bêtas tirés au hasard sur les facteurs US) plus un bruit
+    propre, pour que la régression et l'ACP portent sur une structure réaliste.
+
+    Args:
+        root (str): Dossier de destination.
+        n_funds (int): Nombre de fonds.
+        years (int): Profondeur de l'historique, en années de 252 jours de bourse.
+        layouts (tuple): Mises en page utilisées à tour de rôle pour les fonds (voir LAYOUTS).
+        seed (int): Graine du générateur aléatoire.
+
+    Returns:
+        dict: 'funds' (registre {nom: {"region", "datafile"}}), 'factors' ({série: paramètres DataFile}, taux sans risque
+              compris sous la clé 'RF') et 'bench' (paramètres DataFile du benchmark).
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-09-30", periods=252 * years + 1)
+    factors = rng.normal(0.0002, 0.008, (len(dates), len(AQR_FACTORS))) # rendements quotidiens (fractions)
+    factors[:, 0] += 0.0002 # prime de marché
+    rf = np.full(len(dates), 0.008) # en %
+
+    os.makedirs(os.path.join(root, "funds"), exist_ok=True)
+    funds = {}
+    betas = rng.normal([1, 0, 0, 0, 0], [0.2, 0.3, 0.3, 0.3, 0.2], (n_funds, len(AQR_FACTORS)))
+    returns = factors @ betas.T + rng.normal(0, 0.004, (len(dates), n_funds))
+    prices = 100 * np.cumprod(1 + returns, axis=0)
+    for idx in range(n_funds):
+        layout = layouts[idx % len(layouts)]
+        name = f"Fund {idx:05d}"
+        funds[name] = {"region": "US", "datafile": _WRITERS[layout](os.path.join(root, "funds"), name, dates, prices[:, idx])}
+
+    return {"funds": funds,
+            "factors": write_factors(os.path.join(root, "aqr factors"), dates, factors, rf),
+            "bench": write_bench(os.path.join(root, "bench"), dates, 4000 * np.cumprod(1 + factors[:, 0]))}
+
+def write_aqr_csv(folder, name, dates, prices):
+    """Fonds au format de l'export AQR : en-tête parasite, date et heure en colonne 2, VL en colonne 6."""
+    header = [["", *(f"Unnamed: {idx}" for idx in range(7))], ["", "AQR Funds - Synthetic Fund"], ["", "Daily Price History"], [],
+              ["", "", "", "", "Class I"], ["", "Fund", "Date", "Ticker", "Cusip", "Class", "NAV", "Change"]]
+    header = [row + [""] * (8 - len(row)) for row in header] # même nombre de champs sur chaque ligne
+    day = dates.strftime("%d/%m/%Y 00:00")
+    rows = zip([""] * len(dates), [name] * len(dates), day, ["SYN"] * len(dates), ["000000000"] * len(dates),
+               ["I"] * len(dates), np.round(prices, 4), [""] * len(dates))
+    path = os.path.join(folder, f"{name}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerows(header)
+        writer.writerows(rows)
+    return _params(name, folder, name, "csv", [2, 6], day[0], "%d/%m/%Y %H:%M")
+
+def write_jpm_xlsx(folder, name, dates, prices):
+    """Fonds au format de l'export JPM : titre sur plusieurs lignes puis dates "%d.%m.%Y" et VL."""
+    day = dates.strftime("%d.%m.%Y")
+    header = pd.DataFrame([[f"Evolution de la VL ({day[0]} - {day[-1]})", None], [name, None], ["ISIN: SYN", None],
+                           [None, None], ["Date", "VL"]])
+    data = pd.concat([header, pd.DataFrame({0: day, 1: np.round(prices, 2)})], ignore_index=True)
+    data.to_excel(os.path.join(folder, f"{name}.xlsx"), header=False, index=False)
+    return _params(name, folder, name, "xlsx", [0, 1], day[0], "%d.%m.%Y")
+
+def write_schroder_csv(folder, name, dates, prices):
+    """Fonds au format de l'export Schroder : virgule décimale, deux parts mêlées, dates les plus récentes en premier."""
+    day = dates.strftime("%d.%m.%Y")[::-1]
+    values = np.round(prices[::-1], 4)
+    isin, other = "LU" + "".join(filter(str.isdigit, name)).zfill(10), "LU9999999999"
+    path = os.path.join(folder, f"{name}.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow([" Nom de la classe d'actions", " Classe d'actifs", "Devise", "ISIN", " Date de valorisation", "VL",
+                         " Evolution quotidienne en valeur", " Evolution quotidienne en %"])
+        for share_class, shift in ((isin, 1.0), (other, 0.9)): # la part étudiée puis une autre part du même fonds
+            for date, value in zip(day, values * shift):
+                writer.writerow([name, "Actions", "USD", share_class, date, f" {value:.4f}".replace(".", ","), " 0,0000", " 0,0000"])
+    return _params(isin, folder, name, "csv", [4, 5], day[-1], "%d.%m.%Y", decimal=",", filter_col=3, filter_values=[isin])
+
+_WRITERS = {"csv": write_aqr_csv, "xlsx": write_jpm_xlsx, "csv-comma": write_schroder_csv}
+
+def write_factors(folder, dates, factors, rf, filename = "Betting Against Beta Equity Factors Daily"):
+    """Classeur au format AQR : une feuille par facteur (US en colonne 25, Global en colonne 26) et une feuille RF."""
+    os.makedirs(folder, exist_ok=True)
+    day = dates.strftime("%m/%d/%Y")
+    junk = pd.DataFrame([["Synthetic Betting Against Beta Equity Factors"], ["Daily"], [None], ["DATE"]]) # lignes avant la première date
+    params = {}
+    with pd.ExcelWriter(os.path.join(folder, f"{filename}.xlsx")) as writer:
+        for idx, name in enumerate(AQR_FACTORS):
+            sheet = pd.DataFrame(np.nan, index=range(len(dates)), columns=range(27))
+            sheet[0] = day
+            sheet[25], sheet[26] = factors[:, idx], factors[:, idx] * 0.8
+            pd.concat([junk, sheet], ignore_index=True).to_excel(writer, sheet_name=name, header=False, index=False)
+            params[name] = _params(name, folder, filename, "xlsx", [0, 25, 26], day[0], "%m/%d/%Y",
+                                   name_col=["Date", f"{name} US", f"{name} Global"], sheet=True)
+        pd.concat([junk, pd.DataFrame({0: day, 1: rf})], ignore_index=True).to_excel(writer, sheet_name="RF", header=False, index=False)
+        params["RF"] = _params("RF", folder, filename, "xlsx", [0, 1], day[0], "%m/%d/%Y", name_col=["Date", "RF"], sheet=True)
+    return params
+
+def write_bench(folder, dates, prices, filename = "S&P 500 tracker"):
+    """Benchmark au format du fichier S&P 500 : dates "%m/%d/%Y" et cours, les plus récents en premier."""
+    os.makedirs(folder, exist_ok=True)
+    day = dates.strftime("%m/%d/%Y")[::-1]
+    pd.DataFrame({"Date": day, "Price": np.round(prices[::-1], 2)}).to_csv(os.path.join(folder, f"{filename}.csv"), index=False)
+    return _params("SPX", folder, filename, "csv", [0, 1], day[-1], "%m/%d/%Y", name_col=["Date", "Price"])
+
+def _params(id, folder, filename, file_format, select_col, first_date, date_format, name_col = ("Date", "VL"), sheet = False, **kwargs):
+    return dict(id=id, filepath=folder, filename=filename, sheet=sheet, file_format=file_format, select_col=select_col,
+                name_col=list(name_col), first_date=first_date, date_format=date_format, **kwargs)
@@ -1,3 +1,4 @@
+import time
 import pandas as pd
 import numpy as np
 import streamlit as st
@@ -6,88 +7,52 @@ import plotly.graph_objects as go
 from itertools import cycle
 
 
-from src.risk import Risk
-from src.factor import Factor
-from src.fund import Fund
-from src.bench import Benchmark
-from src.factoranalysis import FactorialAnalysis
-from src.utils import fund_loading_details, load_rfr, filter, find_unique_end_date
+from src.session import AnalyticsSession
+from src.rolling import ROLLING_METRICS
+from src.downsample import sample
+from src import profiling
+
+FREQUENCY_LABELS = {"D": "Quotidienne", "W": "Hebdomadaire", "M": "Mensuelle"}
+
+
+@st.cache_resource(max_entries=1)
+def get_session():
+    """Session d'analyse partagée entre les exécutions du script : les données et les résultats y restent en mémoire."""
+    return AnalyticsSession()
 
 
 def main():
     # Framework d'Analyse de Fonds ---------------------------------------------------------------------------
     st.title('Analyse de Fonds')
+    session = get_session()
 
     ## Section 1 : Import & Traitement des Données -----------------------------------------------------------
 
     ### 1. Import des fonds et leur VL, selon l'entrée de l'utilisateur
-    aqr_dict, jpm_dict, schroder_dict = fund_loading_details()
-    fonds_dict = {'AQR Large Cap Multi-Style': aqr_dict,
-                   'JPM America Equity': jpm_dict,
-                   'Schroder Global Sustainable Growth': schroder_dict}
-    
-    region_fund = {'AQR Large Cap Multi-Style': "US",
-                   'JPM America Equity': "US",
-                   'Schroder Global Sustainable Growth': "Global"}
+    fonds_dict, load_errors = session.funds()
+    for name, error in load_errors.items():
+        st.warning(f"Le fonds {name} n'a pas pu être chargé ({error}).")
 
     fund_name = st.selectbox('Sélectionnez le fonds à analyser:', fonds_dict.keys())
     st.header(f'{fund_name}')
-    fund = Fund(fund_name, region_fund[fund_name], fonds_dict)
-
-    ### 2. Import des Facteurs de performance d'AQR
-    aqr_factors_list = ["MKT","SMB","HML FF","HML Devil","UMD"]
-    factors = {}
-    for factor in aqr_factors_list:
-        factors[factor] = Factor(name = factor)
+    fund = session.fund(fund_name)
+    frequency = st.radio('Fréquence des rendements:', list(FREQUENCY_LABELS), format_func=FREQUENCY_LABELS.get, horizontal=True)
 
-    ### 3. Import du Risk-Free Rate
-    rfr = load_rfr("RF")
-
-    ### 4. Import du benchmark S&P500
-    spx = Benchmark("SPX")
+    ### 2. Import des Facteurs de performance d'AQR, du Risk-Free Rate et du benchmark S&P500 : chargés une fois par la session
 
     ## Section 2 : Performance & Risques --------------------------------------------------------------------------
 
     ### Graphique des VL
     st.subheader(f'Historique des valeurs liquidatives')
-    st.line_chart(fund.data.set_index('Date'))
+    first_date, last_date = fund.data['Date'].min().date(), fund.data['Date'].max().date()
+    start_date, end_date = st.slider('Période affichée sur les graphiques:', min_value=first_date, max_value=last_date,
+                                     value=(first_date, last_date), format="DD/MM/YYYY")
+    st.line_chart(session.chart('nav', fund_name, start=start_date, end=end_date))
+    st.caption("Les séries des graphiques sont réduites côté serveur à environ 2 000 dates sur la période affichée (LTTB, minimum et maximum conservés).")
 
     ### Statistiques
-    fenetres = {
-        "YTD" : "2024-01-01",
-        "1 an" : fund.rdments.iloc[-252,0],
-        "3 ans" : fund.rdments.iloc[-252*3,0],
-        "5 ans" : fund.rdments.iloc[-252*5,0]
-    }
-
-    recap = pd.DataFrame(columns= fenetres.keys())
-    performance = pd.DataFrame(columns= fenetres.keys())
-    risques = pd.DataFrame(columns= fenetres.keys())
-
-    for periode, start_date in fenetres.items():
-        dataset = pd.merge(pd.merge(fund.rdments, rfr, how='inner', on='Date'), spx.rdments, how='inner', on='Date')
-        dataset = filter(dataset, start_date, end_date:=dataset.iloc[-1,0])
-        daily_returns_bench = dataset[f'{fund.name}']
-        daily_returns_fund = dataset[f'{spx.name}']
-        risk_free_rate = dataset['RF']
-
-        perf = f"{fund.compute_cumul_returns(dataset[['Date',f'{fund.name}']]).iloc[-1]['Cumul Returns']:.2f}%"
-        vol = f"{fund.compute_volatility(daily_returns_fund):.2f}%"
-        downside_vol = f"{fund.compute_downside_volatility(daily_returns_fund):.2f}%"
-        sharpe_ratio = f"{fund.compute_sharpe_ratio(daily_returns_fund,risk_free_rate):.2f}"
-        sortino_ratio = f"{fund.compute_sortino_ratio(daily_returns_fund, risk_free_rate):.2f}"
-        risk = Risk(fund, spx)
-        beta = f"{risk.compute_beta(daily_returns_fund, daily_returns_bench):.2f}"
-        alpha = f"{risk.compute_alpha(daily_returns_fund, daily_returns_bench, risk_free_rate):.2f}"
-        rel_max_dd = f"{risk.compute_relative_max_drawdown(dataset[['Date',f'{fund.name}']], dataset[['Date',f'{spx.name}']]):.2f}"
-        
-        recap[periode] = [perf, vol, sharpe_ratio]
-        performance[periode] = [perf, alpha, sharpe_ratio, sortino_ratio]
-        risques[periode] = [vol, downside_vol, beta, rel_max_dd ]
-
-    recap.index=['Performance','Volatility','Sharpe Ratio']
-    performance.index=['Performance','Alpha','Sharpe Ratio','Sortino Ratio']
-    risques.index = ['Volatility','Downside Volatility','Beta','Relative Maximum Drawdown']
+    fenetres = session.windows(fund_name)
+    recap, performance, risques = session.metric_tables(fund_name, frequency)
 
     #### Récapitulatif performances
     st.subheader('Synthèse Performance')
@@ -99,44 +64,14 @@ def main():
     window = st.selectbox("Sélectionnez la période d'analyse:", fenetres.keys())
 
     fund_bis_names.append(fund_name)
-    performance_comparees = pd.DataFrame(columns= fund_bis_names)
-
-    for fund_bis_name in fund_bis_names:
-        fund_bis = Fund(fund_bis_name, region_fund[fund_bis_name],fonds_dict)
-        dataset = pd.merge(fund_bis.rdments, rfr, how='inner', on='Date')
-        time_window = {
-        "YTD" : "2024-01-01",
-        "1 an" : fund_bis.rdments.iloc[-252,0],
-        "3 ans" : fund_bis.rdments.iloc[-252*3,0],
-        "5 ans" : fund_bis.rdments.iloc[-252*5,0]}
-
-        dataset = filter(dataset, start_date:=time_window[window], end_date:=dataset.iloc[-1,0])
-        daily_returns_fund_bis = dataset[f'{fund_bis.name}']
-        risk_free_rate = dataset['RF']
-    
-        perf = f"{fund_bis.compute_cumul_returns(dataset[['Date',f'{fund_bis.name}']]).iloc[-1]['Cumul Returns']:.2f}%"
-        vol = f"{fund_bis.compute_volatility(daily_returns_fund_bis):.2f}%"
-        sharpe_ratio = f"{fund_bis.compute_sharpe_ratio(daily_returns_fund_bis,risk_free_rate):.2f}"
-        performance_comparees[fund_bis.name] = [perf, vol, sharpe_ratio]
-
-    performance_comparees.index=['Performance','Volatilité','Sharpe Ratio']
-    st.table(performance_comparees)
+    st.table(session.comparison_table(fund_bis_names, window))
     st.info("ℹ️ Les performances comparées et synthétisées dans le tableau du dessus diffèrent légèrement : les fenêtres de calcul sont en effet harmonisées pour pouvoir comparer les fonds entre eux")
 
     #### Graphique rendements cumulés comparés au SP500 (base 100)
     st.subheader(f'Rendements cumulés')
 
-    start_date = fund.rdments.iloc[0,0] # date a laquelle premiere donnee est dispo
-    end_date = find_unique_end_date([fund.rdments, spx.rdments]) # s'assure que toutes les données s'étalent sur la même periode
-    daily_returns_fund = filter(fund.rdments, start_date, end_date)
-    daily_returns_bench = filter(spx.rdments, start_date, end_date)
-
-    cumul_returns = pd.merge(
-        fund.compute_cumul_returns(daily_returns_fund),
-        spx.compute_cumul_returns(daily_returns_bench),
-        on='Date', how='inner'
-        ).rename(columns={'Cumul Returns_x': f'{fund_name}', 'Cumul Returns_y': f'{spx.name}'}
-    )
+    cumul_returns = session.chart('cumul_returns', fund_name, start=start_date, end=end_date).reset_index()
+    spx = session.bench()
     fig = px.line(cumul_returns, x='Date', y=[f'{fund_name}', f'{spx.name}'])
     st.plotly_chart(fig)
 
@@ -163,20 +98,46 @@ def main():
     risk_description = {
     "Downside Volatility": "La volatilité négative mesure uniquement les variations à la baisse des rendements, fournissant une évaluation du risque de perte.",
     "Beta": "Le bêta mesure la sensibilité du fonds par rapport aux mouvements du benchmark, indiquant le niveau de risque systématique.",
-    "Relative Maximum Drawdown": "La baisse maximale relative compare la plus grande perte du fonds à celle du benchmark, évaluant la résilience face aux pertes."
+    "Maximum Drawdown": "La perte maximale mesure la plus forte baisse du fonds depuis un plus haut sur la période.",
+    "Relative Maximum Drawdown": "La baisse maximale relative mesure la plus forte baisse de la valeur du fonds rapportée à celle du benchmark, depuis un plus haut, évaluant la résilience face aux pertes."
     }
     with st.expander("📖 Explications des métriques de risque"):
         for ratio, description in risk_description.items():
             if ratio in risques.index:
                 st.markdown(f"*{ratio}*: {description}")
 
+    #### Intervalles de confiance
+    st.subheader('Intervalles de confiance (bootstrap)')
+    st.table(session.confidence_intervals(fund_name))
+    st.caption("Estimation [borne basse, borne haute] à 95 % sur 2 000 rééchantillons par blocs stationnaires (longueur moyenne de 21 jours), qui conservent l'autocorrélation des rendements.")
+
+    #### Baisses depuis le plus haut
+    st.subheader('Drawdowns')
+    st.area_chart(session.chart('drawdowns', fund_name, start=start_date, end=end_date))
+
+    #### Métriques glissantes
+    st.subheader('Métriques glissantes')
+    rolling_metric = st.selectbox("Métrique", ROLLING_METRICS)
+    st.line_chart(session.chart('rolling', fund_name, rolling_metric, start=start_date, end=end_date))
+    st.caption("Fenêtres glissantes de 63, 126 et 252 jours de bourse (environ 3, 6 et 12 mois), sur les dates communes au fonds, au benchmark et au taux sans risque.")
+
 ## Section 3 : Analyse Factorielle  -----------------------------------------------------------
+    st.subheader('Exposition aux facteurs')
+    regression, r2 = session.factor_regression_table(fund_name, frequency)
+    st.table(regression.map('{:.2f}'.format))
+    st.caption(f"Régression des rendements en excès du taux sans risque sur les facteurs AQR de la région du fonds (alpha annualisé, R² : {r2:.2f}).")
+    if frequency == "M" and st.checkbox("Comparer aux facteurs AQR mensuels natifs"):
+        st.table(session.native_factors_check())
+        st.caption("Facteurs quotidiens composés par mois, comparés au classeur AQR mensuel (écarts en points de %).")
+    st.line_chart(session.chart('exposures', fund_name, start=start_date, end=end_date))
+    st.caption("Bêtas glissants sur 252 jours de bourse.")
+
     st.subheader('Principal Component Analysis')
-    factorial_analysis = FactorialAnalysis(fund, factors)
-    x_test, y_test, pca_loadings, feature_names, explained_variance = factorial_analysis.ACP()
+    x_test, y_test, pca_loadings, feature_names, explained_variance = session.factor_analysis(fund_name, frequency)
 
     pca_df = pd.DataFrame(x_test, columns=['PC1', 'PC2'])
     pca_df['Target Daily Returns'] = pd.Series(y_test).reset_index(drop=True)
+    pca_df = sample(pca_df) # nuage limité à 2 000 observations, extrêmes conservés
     
     fig_acp = px.scatter(pca_df, x='PC1', y='PC2', color='Target Daily Returns')
     
@@ -199,6 +160,12 @@ def main():
 
     st.plotly_chart(fig_acp)
 
+    #### ACP glissante
+    st.markdown("*Évolution de la structure factorielle (ACP sur 252 jours glissants)*")
+    st.line_chart(session.chart('explained_variance', fund_name, start=start_date, end=end_date))
+    st.line_chart(session.chart('loadings', fund_name, start=start_date, end=end_date))
+    st.caption("Variance expliquée (en %) par les deux premières composantes, puis charges des facteurs sur PC1, mises à jour chaque jour.")
+
     # Explications de l'Analyse Factorielle (ACP) 
     with st.expander("📖 Explications de l'Analyse Factorielle (ACP)"):
         st.markdown("""
@@ -216,5 +183,63 @@ def main():
             - *Optimisation de Portefeuille* : Utilisez les informations de l'ACP pour diversifier ou optimiser votre portefeuille en fonction des facteurs de risque et de performance identifiés.
         """) 
 
+
+## Section 4 : Construction de portefeuille  -----------------------------------------------------------
+    st.subheader('Construction de portefeuille')
+    portfolio_names = st.multiselect('Sélectionnez les fonds du portefeuille:', list(fonds_dict.keys()), default=list(fonds_dict.keys()))
+    if len(portfolio_names) >= 2:
+        portfolio = session.portfolio([fund_name] + [name for name in portfolio_names if name != fund_name])
+        st.table(portfolio['weights'].map('{:.1%}'.format))
+        st.caption("Poids estimés sur les 252 derniers jours de bourse (covariance rétrécie de Ledoit-Wolf, sans vente à découvert).")
+
+        fig_frontier = px.scatter(portfolio['frontier'], x='Volatility', y='Excess Return', color='Sharpe Ratio', opacity=0.4)
+        fig_frontier.add_trace(go.Scatter(x=portfolio['allocations']['Volatility'], y=portfolio['allocations']['Excess Return'],
+                                          mode='markers+text', text=portfolio['allocations'].index, textposition='top center',
+                                          marker=dict(color='black', size=10, symbol='x'), name='Allocations'))
+        fig_frontier.update_layout(xaxis_title="Volatilité annualisée (%)", yaxis_title="Rendement en excès annualisé (%)")
+        st.plotly_chart(fig_frontier)
+
+        backtest_window = st.selectbox("Période du backtest:", fenetres.keys())
+        backtest = portfolio['backtest'].xs(backtest_window, level='Window')
+        st.table(backtest[['Performance', 'Volatility', 'Sharpe Ratio', 'Sortino Ratio']].map('{:.2f}'.format))
+        debut = backtest['Start'].iloc[0]
+        st.caption("Allocations rééquilibrées tous les 63 jours de bourse, poids estimés sur les 252 jours précédents ; "
+                   + (f"backtest à partir du {debut:%d/%m/%Y}." if pd.notna(debut) else "historique trop court pour cette période."))
+
+def run():
+    """Affiche la page ; en mode debug (barre latérale), profile l'exécution et affiche le détail des étapes."""
+    with st.sidebar:
+        debug = st.toggle('Mode debug (profilage)')
+        memory = debug and st.checkbox('Mesurer la mémoire (plus lent)')
+        use_cprofile = debug and st.checkbox('Profil cProfile')
+        if debug and st.button('Vider le cache de la session'):
+            get_session().clear()
+    if not debug:
+        with get_session().request(): # sources examinées une fois par exécution
+            main()
+        return
+
+    with profiling.profile(memory): # profilage de cette exécution seulement, sans toucher aux autres sessions
+        profiler = profiling.start_cprofile() if use_cprofile else None
+        start = time.perf_counter()
+        try:
+            with get_session().request():
+                main()
+        finally:
+            total = time.perf_counter() - start
+            dump = profiling.stop_cprofile(profiler) if profiler else None
+            debug_panel(total, dump)
+
+def debug_panel(total, dump = None):
+    """Durée, lignes et mémoire de chaque étape calculée pendant l'exécution (les résultats déjà en cache n'y figurent pas)."""
+    with st.sidebar:
+        st.metric('Durée de la page', f'{total:.3f} s')
+        records = profiling.records()
+        st.dataframe(records.drop(columns=['timestamp']).round(4), hide_index=True)
+        st.download_button('Exporter les étapes (JSON lines)', profiling.export_records(), file_name='profiling.jsonl')
+        if dump is not None:
+            st.download_button('Exporter le profil cProfile', dump, file_name='main.prof')
+            st.caption('Lisible avec `python -m pstats main.prof` ou snakeviz.')
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    run()
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Service HTTP local des analyses : python -m src.api --port 8000
+
+Les métriques par fenêtre, les rendements cumulés, les drawdowns et les expositions aux facteurs des fonds sont servis
+en JSON, calculés par une AnalyticsSession unique gardée en mémoire entre les requêtes (les données sont chargées au
+démarrage, puis à chaque changement d'une source). Les handlers sont asynchrones et les calculs s'exécutent dans un
+pool de threads ; les requêtes identiques simultanées sont regroupées : une seule est calculée, les autres attendent
+son résultat.
+
+Un fonds absent du registre renvoie 404, un paramètre refusé par le calcul 422 et toute autre erreur (fonds qui n'a
+pas pu être chargé, par exemple) 500.
+
+Routes :
+    - GET /health
+    - GET /funds
+    - GET /funds/{fonds}/metrics?frequency=D|W|M
+    - GET /funds/{fonds}/cumulative-returns
+    - GET /funds/{fonds}/drawdowns
+    - GET /funds/{fonds}/exposures?frequency=D|W|M
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Response
+
+from src.cache import data_version
+from src.session import AnalyticsSession, UnknownFund
+
+logger = logging.getLogger(__name__)
+
+Frequency = Literal["D", "W", "M"]
+
+class Coalescer():
+    """
+    Classe Coalescer qui exécute les calculs dans un pool de threads en regroupant les demandes identiques.
+
+    Tant qu'un calcul est en cours pour une clé, les demandes suivantes pour la même clé attendent son résultat au lieu
+    d'en lancer un nouveau. Une demande abandonnée (client déconnecté) n'interrompt pas le calcul partagé.
+
+    Attributs :
+        - executor (Executor) : Le pool qui exécute les calculs.
+    """
+    def __init__(self, executor):
+        self.executor = executor
+        self._running = {} # calculs en cours, par clé
+
+    async def run(self, key, compute):
+        future = self._running.get(key)
+        if future is None:
+            future = self._running[key] = asyncio.get_running_loop().run_in_executor(self.executor, compute)
+            future.add_done_callback(lambda _: self._running.pop(key, None))
+        return await asyncio.shield(future)
+
+    def running(self):
+        return len(self._running)
+
+def create_app(session = None, workers = 4):
+    """
+    Construit l'application FastAPI.
+
+    Args:
+        session (AnalyticsSession): La session partagée par toutes les requêtes (par défaut, une nouvelle session sur le registre).
+        workers (int): Nombre de threads qui exécutent les calculs.
+
+    Returns:
+        FastAPI: L'application, à servir par exemple avec uvicorn.
+    """
+    session = session or AnalyticsSession()
+    coalescer = Coalescer(ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analytics"))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await coalescer.run(("warm",), lambda: warm(session)) # données chargées avant la première requête
+        yield
+        coalescer.executor.shutdown(wait=False)
+
+    app = FastAPI(title="Framework d'analyse de fonds", lifespan=lifespan)
+    app.state.session = session
+
+    def in_request(compute):
+        with session.request(): # sources examinées une fois par requête
+            return compute()
+
+    async def respond(key, compute):
+        try:
+            return Response(await coalescer.run(key, lambda: in_request(compute)), media_type="application/json")
+        except UnknownFund as error:
+            raise HTTPException(status_code=404, detail=str(error))
+        except ValueError as error: # paramètre refusé par le calcul
+            raise HTTPException(status_code=422, detail=str(error))
+        except Exception as error: # fonds qui n'a pas pu être chargé, erreur de calcul
+            logger.exception("Erreur sur %s", key)
+            raise HTTPException(status_code=500, detail=str(error))
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "data_version": data_version(), "running": coalescer.running()}
+
+    @app.get("/funds")
+    async def funds():
+        def compute():
+            loaded, errors = session.funds()
+            return json.dumps({"funds": [{"name": name, "region": session.region_fund[name]} for name in loaded],
+                               "errors": {name: str(error) for name, error in errors.items()}})
+        return await respond(("funds",), compute)
+
+    @app.get("/funds/{fund_name}/metrics")
+    async def metrics(fund_name: str, frequency: Frequency = "D"):
+        """Métriques du fonds par fenêtre : {fenêtre: {métrique: valeur}}."""
+        def compute():
+            session.fund(fund_name)
+            return session.metric_table(fund_name, frequency).to_json(orient="columns")
+        return await respond(("metrics", fund_name, frequency), compute)
+
+    @app.get("/funds/{fund_name}/cumulative-returns")
+    async def cumulative_returns(fund_name: str):
+        """Rendements cumulés (en %) du fonds et du benchmark : une entrée par date."""
+        def compute():
+            session.fund(fund_name)
+            return session.cumul_returns(fund_name).to_json(orient="records", date_format="iso")
+        return await respond(("cumulative-returns", fund_name), compute)
+
+    @app.get("/funds/{fund_name}/drawdowns")
+    async def drawdowns(fund_name: str):
+        """Baisses depuis le plus haut (en %) du fonds et du benchmark : une entrée par date."""
+        def compute():
+            session.fund(fund_name)
+            return session.drawdown_series(fund_name).rename_axis('Date').reset_index().to_json(orient="records", date_format="iso")
+        return await respond(("drawdowns", fund_name), compute)
+
+    @app.get("/funds/{fund_name}/exposures")
+    async def exposures(fund_name: str, frequency: Frequency = "D"):
+        """Alpha, bêtas et t-stats du fonds sur les facteurs de sa région, et le R²."""
+        def compute():
+            session.fund(fund_name)
+            regression, r2 = session.factor_regression_table(fund_name, frequency)
+            return f'{{"coefficients": {regression.to_json(orient="index")}, "R2": {json.dumps(r2 if math.isfinite(r2) else None)}}}'
+        return await respond(("exposures", fund_name, frequency), compute)
+
+    return app
+
+def warm(session):
+    """Charge les fonds, les facteurs, le benchmark et le panel des rendements dans la session."""
+    session.funds()
+    session.panel()
+
+def main(argv = None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Sert les analyses des fonds en JSON sur HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute (par défaut : 127.0.0.1, accès local uniquement).")
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute (par défaut : 8000).")
+    parser.add_argument("--workers", type=int, default=4, help="Nombre de threads de calcul (par défaut : 4).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    uvicorn.run(create_app(workers=args.workers), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,60 @@
-import os
+import numpy as np
 import pandas as pd
 
+from src.cache import load_cached, append_cached
+from src.profiling import stage
+from src.series import CompactSeries, to_days
+
 class FinancialAsset:
     def __init__(self, name):
         self.name = name
         self.data = None
         self.rdments = None
+        self.price_column = None
 
-    def load_data(self, path, import_func):
+    def load_data(self, key, import_func, params = None):
         """
-        Charge les données de l'actif financier à partir d'un fichier Excel ou en utilisant une fonction d'importation si le fichier excel n'est pas déjà crée.
+        Charge les données de l'actif financier depuis le cache (data/loaded) ou en utilisant une fonction d'importation si la série n'y est pas encore.
 
         Args:
-            path (str): Chemin vers le fichier Excel contenant les données.
-            import_func (function): Fonction pour importer les données si le fichier n'existe pas.
+            key (str): Clé de la série dans le cache (par exemple "funds/JPM America Equity").
+            import_func (function): Fonction pour importer les données si la série n'est pas en cache.
+            params (dict): Paramètres DataFile de la série, pour reconstruire le cache quand la source change (optionnel).
+        """
+
+        with stage(f"FinancialAsset.load_data {key}") as record:
+            self.data = load_cached(key, import_func, params)
+            record["rows"] = len(self.data)
+
+    def update_data(self, key, import_func, params = None):
         """
+        Met à jour les données de l'actif de manière incrémentale : seules les nouvelles lignes de la source sont ajoutées
+        au cache (voir cache.append_cached), puis les rendements quotidiens sont calculés pour ces seules lignes. Si la
+        série a dû être reconstruite (paramètres modifiés, historique corrigé), les données et les rendements sont remplacés.
 
-        if os.path.exists(path):
-            self.data = pd.read_excel(path)
-        else:
-            self.data = import_func()
-            self.data.to_excel(path, index=False)
+        Args:
+            key (str): Clé de la série dans le cache.
+            import_func (function): Fonction import_func(offset=None) qui importe les lignes de la source (voir cache.append_cached).
+            params (dict): Paramètres DataFile de la série (optionnel).
+
+        Returns:
+            pd.DataFrame: Les nouvelles lignes ajoutées (la série entière si elle a été reconstruite).
+        """
+        new_rows, rebuilt = append_cached(key, import_func, params)
+        if rebuilt:
+            self.data = new_rows
+            if self.price_column is not None:
+                self.compute_daily_returns(self.price_column)
+            return new_rows
+        if new_rows.empty:
+            return new_rows
+
+        if self.rdments is not None:
+            prices = pd.concat([self.data[self.price_column].iloc[-1:], new_rows[self.price_column]], ignore_index=True)
+            new_returns = pd.DataFrame({'Date': new_rows['Date'], f'{self.name}': prices.pct_change().iloc[1:].to_numpy() * 100})
+            self.rdments = pd.concat([self.rdments, new_returns], ignore_index=True)
+        self.data = pd.concat([self.data, new_rows], ignore_index=True)
+        return new_rows
     
     def compute_daily_returns(self, column_name):
         """
@@ -29,9 +63,12 @@ class FinancialAsset:
         Args:
             column_name (str): Nom de la colonne à partir de laquelle calculer les rendements (par exemple, 'Price' ou 'VL').
         """
-        rdment = self.data.copy()
-        rdment[f'{self.name}'] = rdment[column_name].pct_change() * 100
-        self.rdments = rdment[['Date', f'{self.name}']]
+        self.price_column = column_name
+        self.rdments = pd.DataFrame({'Date': self.data['Date'], f'{self.name}': self.data[column_name].pct_change() * 100}, copy=False) # sans copier les données
+
+    def compact_returns(self, dtype = np.float64):
+        """Rendements quotidiens sous forme compacte (dates int32 partagées, valeurs dtype), voir series.CompactSeries."""
+        return CompactSeries(self.name, to_days(self.data['Date']), self.data[self.price_column].to_numpy(dtype=dtype)).returns()
 
     def compute_cumul_returns(self, returns: pd.DataFrame)-> pd.DataFrame:
         """
@@ -47,8 +84,15 @@ class FinancialAsset:
         cumul_returns['Cumul Returns'] = ((cumul_returns[f'{self.name}'] / 100 + 1).cumprod() - 1) * 100
         return cumul_returns[['Date', 'Cumul Returns']]
 
+    def compute_cumul_performance(self, returns):
+        """
+        Calcule les rendements cumulés (en %) à partir d'un tableau ou d'une série de rendements quotidiens (en %).
+        Les valeurs manquantes comptent comme un rendement nul.
+        """
+        return (np.cumprod(1 + np.nan_to_num(returns) / 100) - 1) * 100
+
     def compute_excess_returns(self, returns, risk_free_rate):
         return returns - risk_free_rate
     
-    def compute_annualized_returns(self, returns):
-        return (1 + returns.mean()) ** 252 - 1
\ No newline at end of file
+    def compute_annualized_returns(self, returns, periods = 252):
+        return (1 + returns.mean()) ** periods - 1
\ No newline at end of file
@@ -15,17 +15,28 @@ class Benchmark(FinancialAsset):
     """
     def __init__(self, name):
         super().__init__(name)
+        self.params = dict(
+            id=name,
+            filepath="data/bench",
+            filename="S&P 500 tracker",
+            sheet=False,
+            file_format="csv",
+            select_col=[0, 1],
+            name_col=['Date', 'Price'],
+            first_date="10/09/2014",
+            date_format="%m/%d/%Y",
+        )
         self.load_data(
-            f'data/loaded/bench/{name}.xlsx',
-            lambda: DataFile(
-                id=name,
-                filepath="data/bench",
-                filename="S&P 500 tracker",
-                sheet=False,
-                file_format="csv",
-                select_col=[0, 1],
-                name_col=['Date', 'Price'],
-                first_date="10/08/2024",
-            ).data
+            f'bench/{name}',
+            lambda: DataFile(**self.params).read(),
+            self.params
         )
-        self.compute_daily_returns('Price')
\ No newline at end of file
+        self.compute_daily_returns('Price')
+
+    def refresh(self):
+        """Ajoute les nouveaux cours publiés depuis le dernier chargement (ingestion incrémentale, voir FinancialAsset.update_data)."""
+        return self.update_data(
+            f'bench/{self.name}',
+            lambda **kwargs: DataFile(**self.params, **kwargs).read(),
+            self.params
+        )
\ No newline at end of file
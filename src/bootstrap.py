@@ -0,0 +1,110 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from src.moments import moment_metrics, moment_sums
+
+BOOTSTRAP_METRICS = ["Sharpe Ratio", "Sortino Ratio", "Beta", "Alpha"]
+
+def stationary_indices(n, n_resamples, mean_block, rng):
+    """
+    Matrice d'indices du bootstrap stationnaire (Politis et Romano), de forme (n_resamples, n).
+
+    Chaque rééchantillon est une suite de blocs de dates consécutives (le dernier jour est suivi du premier) dont la
+    longueur suit une loi géométrique de moyenne mean_block, ce qui conserve l'autocorrélation des rendements.
+    """
+    positions = np.arange(n)
+    new_block = rng.random((n_resamples, n)) < 1 / mean_block
+    new_block[:, 0] = True
+    block_start = np.maximum.accumulate(np.where(new_block, positions, 0), axis=1) # position du début du bloc en cours
+    starts = rng.integers(0, n, (n_resamples, n))
+    return (np.take_along_axis(starts, block_start, axis=1) + positions - block_start) % n
+
+def block_indices(n, n_resamples, block, rng):
+    """Matrice d'indices du bootstrap par blocs mobiles de longueur fixe block, de forme (n_resamples, n)."""
+    block = min(block, n)
+    n_blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, (n_resamples, n_blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(n_resamples, -1)[:, :n]
+
+INDICES = {"stationary": stationary_indices, "block": block_indices}
+
+def bootstrap_metrics(returns, risk_free_rate, benchmark_returns = None, n_resamples = 10_000, method = "stationary", block = 21,
+                      confidence = 0.95, seed = 0, periods = 252, chunk = 1000, workers = None):
+    """
+    Intervalles de confiance bootstrap du Sharpe, du Sortino, du bêta et de l'alpha de plusieurs fonds.
+
+    Les mêmes rééchantillons de dates servent à tous les fonds. Chaque paquet de rééchantillons est résumé par une
+    matrice de comptages (nombre de tirages de chaque date) : toutes les sommes nécessaires aux métriques s'obtiennent
+    alors par un unique produit matriciel comptages @ quantités par date, sans construire les séries rééchantillonnées.
+    Les quantités par date et les métriques sont celles de moment_sums et moment_metrics.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds).
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        benchmark_returns (np.ndarray): Rendements du benchmark, de forme (dates,) (optionnel ; sinon bêta et alpha valent NaN).
+        n_resamples (int): Nombre de rééchantillons.
+        method (str): 'stationary' (blocs de longueur aléatoire) ou 'block' (blocs mobiles de longueur fixe).
+        block (int): Longueur moyenne (stationary) ou fixe (block) des blocs, en dates.
+        confidence (float): Niveau de confiance des intervalles.
+        seed (int): Graine du générateur aléatoire.
+        periods (int): Nombre de périodes par an pour l'annualisation.
+        chunk (int): Nombre de rééchantillons traités à la fois, pour borner la mémoire utilisée.
+        workers (int): Nombre de processus entre lesquels répartir les rééchantillons (par défaut, le processus courant) ;
+                       les quantités par date sont alors placées une fois en mémoire partagée plutôt que copiées vers chaque paquet.
+
+    Returns:
+        np.ndarray: De forme (fonds, len(BOOTSTRAP_METRICS), 3) : estimation sur l'échantillon, borne basse et borne haute.
+    """
+    quantities = moment_sums(returns, risk_free_rate, benchmark_returns)
+    n = len(quantities["n"])
+    estimate = _metrics({name: values.sum(axis=0)[None] for name, values in quantities.items()}, periods)[0]
+    names, stacked = list(quantities), np.concatenate(list(quantities.values()), axis=1) # un seul produit par paquet
+
+    shards = [(count, seed_sequence) for count, seed_sequence in
+              zip(_split(n_resamples, chunk), np.random.SeedSequence(seed).spawn(-(-n_resamples // chunk)))]
+    if workers and workers > 1:
+        memory = shared_memory.SharedMemory(create=True, size=max(stacked.nbytes, 1))
+        try:
+            np.ndarray(stacked.shape, stacked.dtype, buffer=memory.buf)[:] = stacked
+            shared = (memory.name, stacked.shape)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                samples = list(executor.map(_resample_shared, [shared] * len(shards), [names] * len(shards), *zip(*shards),
+                                            [method] * len(shards), [block] * len(shards), [periods] * len(shards)))
+        finally:
+            memory.close()
+            memory.unlink()
+    else:
+        samples = [_resample(stacked, names, count, seed_sequence, method, block, periods) for count, seed_sequence in shards]
+    samples = np.concatenate(samples)
+
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        lower, upper = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+    return np.stack([estimate, lower, upper], axis=-1)
+
+def _split(total, size):
+    return [min(size, total - start) for start in range(0, total, size)]
+
+def _resample(stacked, names, count, seed_sequence, method, block, periods):
+    """Métriques de count rééchantillons, de forme (count, fonds, len(BOOTSTRAP_METRICS))."""
+    n = len(stacked)
+    indices = INDICES[method](n, count, block, np.random.default_rng(seed_sequence))
+    counts = np.bincount((indices + n * np.arange(count)[:, None]).ravel(), minlength=count * n).reshape(count, n).astype(np.float64)
+    sums = (counts @ stacked).reshape(count, len(names), -1)
+    return _metrics({name: sums[:, idx] for idx, name in enumerate(names)}, periods)
+
+def _resample_shared(shared, names, count, seed_sequence, method, block, periods):
+    """_resample exécuté dans un processus, sur les quantités lues en mémoire partagée (nom, forme)."""
+    name, shape = shared
+    memory = shared_memory.SharedMemory(name=name)
+    stacked = np.ndarray(shape, np.float64, buffer=memory.buf)
+    try:
+        return _resample(stacked, names, count, seed_sequence, method, block, periods)
+    finally:
+        del stacked # la mémoire partagée ne peut être fermée tant qu'un tableau l'utilise
+        memory.close()
+
+def _metrics(sums, periods):
+    metrics = moment_metrics(sums, periods)
+    return np.stack([metrics[name] for name in BOOTSTRAP_METRICS], axis=-1)
@@ -0,0 +1,480 @@
+import io
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+CACHE_ROOT = "data/loaded"
+
+class CacheStore():
+    """
+    Classe de base des stockages du cache des séries chargées (data/loaded).
+
+    Une série est identifiée par une clé de la forme "<catégorie>/<nom>" (par exemple "funds/JPM America Equity"
+    ou "factors/MKT") et contient toujours une colonne 'Date' suivie d'une ou plusieurs colonnes numériques.
+    Les classes filles implémentent le format physique (NumPy, Parquet, Excel).
+    """
+    extension = ""
+
+    def __init__(self, root = CACHE_ROOT):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}{self.extension}")
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def read(self, key) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def write(self, key, data: pd.DataFrame):
+        raise NotImplementedError
+
+    def append(self, key, data: pd.DataFrame):
+        """Ajoute des lignes à la fin d'une série existante. Par défaut, la série est relue puis réécrite."""
+        self.write(key, pd.concat([self.read(key), data], ignore_index=True))
+
+
+class NumpyStore(CacheStore):
+    """
+    Stockage colonne par colonne en fichiers .npy, relus en memory-map.
+
+    Chaque série est un dossier contenant un fichier .npy par colonne (dates en datetime64[ns], valeurs en float64)
+    et un fichier columns.json qui conserve l'ordre des colonnes. La lecture ne copie pas les données :
+    les tableaux sont ouverts en mode copy-on-write, donc modifiables sans toucher au fichier.
+    """
+    extension = ""
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self.path(key), "columns.json"))
+
+    def read(self, key):
+        folder = self.path(key)
+        with open(os.path.join(folder, "columns.json"), encoding="utf-8") as f:
+            columns = json.load(f)
+        arrays = {col: np.load(os.path.join(folder, f"{idx}.npy"), mmap_mode="c") for idx, col in enumerate(columns)}
+        return pd.DataFrame(arrays, copy=False)
+
+    def write(self, key, data):
+        folder = self.path(key)
+        os.makedirs(folder, exist_ok=True)
+        for idx, col in enumerate(data.columns):
+            values = data[col].to_numpy(dtype="datetime64[ns]" if col == "Date" else np.float64)
+            np.save(os.path.join(folder, f"{idx}.npy"), values)
+        with open(os.path.join(folder, "columns.json"), "w", encoding="utf-8") as f:
+            json.dump(list(data.columns), f, ensure_ascii=False)
+
+    def append(self, key, data):
+        """Ajoute les lignes en fin de fichier .npy sans relire l'historique : seul l'en-tête (la taille) est réécrit."""
+        folder = self.path(key)
+        with open(os.path.join(folder, "columns.json"), encoding="utf-8") as f:
+            columns = json.load(f)
+        if list(data.columns) != columns:
+            raise ValueError(f"Columns {list(data.columns)} do not match cached columns {columns}.")
+        for idx, col in enumerate(columns):
+            values = data[col].to_numpy(dtype="datetime64[ns]" if col == "Date" else np.float64)
+            if not _append_npy(os.path.join(folder, f"{idx}.npy"), values):
+                super().append(key, data) # en-tête trop court pour la nouvelle taille : réécriture complète
+                return
+
+
+def _append_npy(path, values):
+    """Ajoute values à la fin d'un fichier .npy 1-D en place. Renvoie False si l'en-tête ne peut pas être réécrit à taille égale."""
+    with open(path, "r+b") as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(f)
+        header_len = f.tell()
+        if len(shape) != 1 or dtype != values.dtype:
+            return False
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order, "shape": (shape[0] + len(values),)})
+        if header.tell() != header_len:
+            return False
+        f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values).tobytes())
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+
+class ParquetStore(CacheStore):
+    """
+    Stockage au format Parquet (nécessite pyarrow).
+
+    Chaque série est un dossier <clé>.parquet de fichiers part-00000.parquet, part-00001.parquet... relus dans l'ordre :
+    un ajout écrit un nouveau fichier, sans relire ni réécrire l'historique. Un ancien cache en un seul fichier reste
+    lisible et devient la première partie au premier ajout.
+    """
+    extension = ".parquet"
+
+    def read(self, key):
+        return pd.read_parquet(self.path(key), memory_map=True)
+
+    def write(self, key, data):
+        path = self.path(key)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+        os.makedirs(path)
+        self._write_part(path, 0, data)
+
+    def append(self, key, data):
+        """Ajoute les lignes dans un nouveau fichier du dossier de la série."""
+        import pyarrow.parquet as pq
+
+        path = self.path(key)
+        if not os.path.isdir(path): # ancien cache en un seul fichier : il devient la première partie
+            os.replace(path, f"{path}.tmp")
+            os.makedirs(path)
+            os.replace(f"{path}.tmp", os.path.join(path, "part-00000.parquet"))
+        parts = sorted(file for file in os.listdir(path) if file.endswith(".parquet"))
+        columns = pq.read_schema(os.path.join(path, parts[0])).names
+        if list(data.columns) != columns:
+            raise ValueError(f"Columns {list(data.columns)} do not match cached columns {columns}.")
+        self._write_part(path, len(parts), data)
+
+    def _write_part(self, path, idx, data):
+        data = pd.DataFrame({col: data[col].to_numpy(dtype="datetime64[ns]" if col == "Date" else np.float64) for col in data.columns})
+        data.to_parquet(os.path.join(path, f"part-{idx:05d}.parquet"), index=False)
+
+
+class ExcelStore(CacheStore):
+    """Ancien stockage Excel, conservé pour la migration des caches existants."""
+    extension = ".xlsx"
+
+    def read(self, key):
+        return pd.read_excel(self.path(key))
+
+    def write(self, key, data):
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        data.to_excel(self.path(key), index=False)
+
+
+class CacheManifest():
+    """
+    Manifeste du cache (data/loaded/manifest.json).
+
+    Pour chaque série en cache, le manifeste enregistre le fichier source (chemin, taille, date de modification,
+    empreinte SHA-256) et les paramètres DataFile utilisés pour la construire. Une série est périmée si ses
+    paramètres ont changé ou si le contenu du fichier source a changé ; seules ces séries sont reconstruites.
+    """
+    def __init__(self, root = CACHE_ROOT):
+        self.path = os.path.join(root, "manifest.json")
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        self._hashes = {} # empreintes déjà calculées, par (chemin, taille, mtime)
+
+    @staticmethod
+    def source_path(params):
+        return f"{params['filepath']}/{params['filename']}.{params['file_format']}"
+
+    def fingerprint(self, source):
+        """Renvoie taille, date de modification et empreinte SHA-256 du fichier source."""
+        stat = os.stat(source)
+        memo_key = (source, stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._hashes:
+            sha = hashlib.sha256()
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            self._hashes[memo_key] = sha.hexdigest()
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": self._hashes[memo_key]}
+
+    def is_fresh(self, key, params):
+        """
+        Indique si la série en cache est à jour par rapport à sa source et à ses paramètres.
+
+        Si le fichier source n'est pas disponible, le cache existant est conservé tel quel.
+        """
+        source = self.source_path(params)
+        if not os.path.exists(source):
+            return True
+        if not self.matches(key, params):
+            return False
+        entry, stat = self.entries[key], os.stat(source)
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return True
+        if entry["sha256"] == self.fingerprint(source)["sha256"]: # fichier touché mais contenu identique
+            entry["mtime"] = stat.st_mtime_ns
+            self.save()
+            return True
+        return False
+
+    def matches(self, key, params):
+        """Indique si la série a été construite avec ces paramètres, à partir de la même source."""
+        entry = self.entries.get(key)
+        return entry is not None and entry["source"] == self.source_path(params) and entry["params"] == _jsonable(params)
+
+    def appended(self, key, params):
+        """
+        Renvoie la taille enregistrée de la source si elle n'a changé que par ajout de lignes en fin de fichier (csv dont le
+        début est identique, octet pour octet, au contenu enregistré) : les nouvelles lignes commencent à cet octet.
+        Renvoie None dans tous les autres cas (paramètres ou historique modifiés, lignes ajoutées en tête, classeur Excel).
+        """
+        source = self.source_path(params)
+        if params["file_format"] != "csv" or not os.path.exists(source) or not self.matches(key, params):
+            return None
+        size = self.entries[key]["size"]
+        if size == 0 or os.stat(source).st_size <= size:
+            return None
+        sha = hashlib.sha256()
+        with open(source, "rb") as f:
+            remaining = size
+            while remaining > 0:
+                block = f.read(min(1 << 20, remaining))
+                if not block:
+                    return None
+                sha.update(block)
+                remaining -= len(block)
+            f.seek(size - 1)
+            line_end = f.read(1) == b"\n" # l'ancien contenu se terminait par une fin de ligne
+        return size if line_end and sha.hexdigest() == self.entries[key]["sha256"] else None
+
+    def record(self, key, params):
+        source = self.source_path(params)
+        if not os.path.exists(source):
+            return
+        self.entries[key] = {"source": source, "params": _jsonable(params), **self.fingerprint(source)}
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def _jsonable(params):
+    return json.loads(json.dumps(params, default=str))
+
+
+BACKENDS = {"npy": NumpyStore,
+            "parquet": ParquetStore,
+            "xlsx": ExcelStore}
+
+_stores = {}
+_manifests = {}
+
+def get_store(backend = None) -> CacheStore:
+    """
+    Renvoie le stockage du cache pour le backend demandé.
+
+    Args:
+        backend (str): 'npy', 'parquet' ou 'xlsx'. Par défaut, la variable d'environnement FAP_CACHE_BACKEND, sinon 'npy'.
+
+    Returns:
+        CacheStore: Instance partagée du stockage.
+    """
+    backend = backend or os.environ.get("FAP_CACHE_BACKEND", "npy")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unsupported cache backend '{backend}'. Use one of {list(BACKENDS)}.")
+    if backend not in _stores:
+        _stores[backend] = BACKENDS[backend]()
+    return _stores[backend]
+
+def get_manifest(root = CACHE_ROOT) -> CacheManifest:
+    """Renvoie le manifeste partagé du cache situé sous root."""
+    if root not in _manifests:
+        _manifests[root] = CacheManifest(root)
+    return _manifests[root]
+
+def data_version(root = CACHE_ROOT):
+    """
+    Renvoie une empreinte courte de l'état des données : elle change dès qu'un fichier source suivi par le manifeste
+    ou que le manifeste lui-même est modifié. Seuls des appels à os.stat sont effectués.
+    """
+    manifest = get_manifest(root)
+    state = [(os.stat(manifest.path).st_mtime_ns if os.path.exists(manifest.path) else 0)]
+    for source in sorted({entry["source"] for entry in manifest.entries.values()}):
+        if os.path.exists(source):
+            stat = os.stat(source)
+            state.append((source, stat.st_size, stat.st_mtime_ns))
+    return hashlib.sha256(json.dumps(state).encode()).hexdigest()[:12]
+
+def is_fresh(key, params = None, store = None):
+    """
+    Indique si la série key peut être relue depuis le cache (stockage courant ou ancien fichier Excel) sans reconstruction.
+
+    Un cache construit avant l'existence du manifeste n'est conservé que si sa source n'est plus disponible :
+    sinon il est reconstruit une fois, ses paramètres d'origine étant inconnus.
+    """
+    store = store or get_store()
+    manifest = get_manifest(store.root)
+    cached = store.exists(key) or ExcelStore(store.root).exists(key)
+    if params is None:
+        return cached
+    return cached and manifest.is_fresh(key, params)
+
+def load_cached(key, import_func, params = None, store = None) -> pd.DataFrame:
+    """
+    Charge une série depuis le cache, ou la construit avec import_func si elle n'y est pas encore ou si elle est périmée.
+
+    Si seul l'ancien fichier Excel existe, il est lu une fois puis migré vers le stockage courant.
+
+    Args:
+        key (str): Clé de la série, par exemple "funds/JPM America Equity".
+        import_func (function): Fonction qui construit le DataFrame à partir des fichiers sources.
+        params (dict): Paramètres DataFile de la série, utilisés pour détecter les sources modifiées (optionnel).
+        store (CacheStore): Stockage à utiliser (par défaut get_store()).
+
+    Returns:
+        pd.DataFrame: Données de la série.
+    """
+    store = store or get_store()
+    manifest = get_manifest(store.root)
+    legacy = ExcelStore(store.root)
+    fresh = is_fresh(key, params, store)
+
+    if fresh and store.exists(key):
+        return store.read(key)
+    if fresh and legacy.exists(key):
+        data = legacy.read(key)
+        store.write(key, data)
+        return data
+
+    data = import_func()
+    if isinstance(data, pd.DataFrame):
+        store.write(key, data)
+    else: # itérateur de morceaux (DataFile en mode streaming) : écrits directement dans le stockage
+        data = write_chunks(key, data, store)
+    if params is not None:
+        manifest.record(key, params)
+    return data
+
+def write_chunks(key, chunks, store = None) -> pd.DataFrame:
+    """
+    Écrit une série morceau par morceau dans le stockage : pendant la lecture de la source, un seul morceau est en
+    mémoire, ajouté à la fin de la série (les stockages npy et parquet ajoutent sans relire l'historique).
+
+    Un fichier du plus récent au plus ancien est reconnu à son premier morceau : chaque morceau est alors retourné et
+    écrit dans un stockage temporaire, puis les morceaux sont ajoutés à la série dans l'ordre inverse. Seule une source
+    dont les dates ne sont ordonnées dans aucun sens est relue entière une fois écrite, pour être triée.
+
+    Args:
+        key (str): Clé de la série.
+        chunks (iterable): Morceaux nettoyés (DataFrame avec une colonne 'Date').
+        store (CacheStore): Stockage à utiliser (par défaut get_store()).
+
+    Returns:
+        pd.DataFrame: La série relue depuis le stockage (en memory-map avec le stockage npy).
+    """
+    store = store or get_store()
+    staging, count, ordered, previous = None, 0, True, None
+    try:
+        for chunk in chunks:
+            if count == 0 and len(chunk) > 1 and chunk['Date'].iloc[0] > chunk['Date'].iloc[-1]: # du plus récent au plus ancien
+                staging = type(store)(tempfile.mkdtemp(prefix="chunks-"))
+            if staging is not None:
+                chunk = chunk.iloc[::-1].reset_index(drop=True)
+                ordered &= previous is None or chunk['Date'].iloc[-1] < previous # morceau entièrement antérieur au précédent
+                staging.write(str(count), chunk)
+                previous = chunk['Date'].iloc[0]
+            else:
+                ordered &= previous is None or chunk['Date'].iloc[0] > previous
+                (store.append if count else store.write)(key, chunk)
+                previous = chunk['Date'].iloc[-1]
+            ordered &= chunk['Date'].is_monotonic_increasing
+            count += 1
+        if count == 0:
+            raise ValueError(f"No data to write for '{key}'.")
+        if staging is not None:
+            for idx in reversed(range(count)):
+                (store.append if idx < count - 1 else store.write)(key, staging.read(str(idx)))
+    finally:
+        if staging is not None:
+            shutil.rmtree(staging.root, ignore_errors=True)
+
+    data = store.read(key)
+    if not ordered: # lignes de la source mélangées
+        data = data.sort_values('Date', kind='stable').reset_index(drop=True)
+        store.write(key, data)
+    return data
+
+def append_cached(key, import_func, params = None, store = None):
+    """
+    Met à jour une série en cache de manière incrémentale. Seules de nouvelles dates sont ajoutées au stockage ; dans
+    tous les autres cas, la série est reconstruite :
+
+    - si la source csv n'a fait que s'allonger (voir CacheManifest.appended), seule la fin du fichier est lue ;
+    - sinon, si les paramètres sont inchangés, la source est relue entière et comparée au cache : les lignes des dates
+      postérieures à la dernière date en cache sont ajoutées si l'historique est identique (par exemple lignes ajoutées
+      en tête d'un fichier du plus récent au plus ancien), la série est réécrite s'il a été corrigé ;
+    - si la série n'est pas dans ce stockage ou si ses paramètres ont changé, elle est reconstruite (voir load_cached).
+
+    Args:
+        key (str): Clé de la série, par exemple "funds/JPM America Equity".
+        import_func (function): Fonction import_func(offset=None) qui renvoie les lignes de la source, toutes ou
+                                seulement celles qui suivent l'octet offset.
+        params (dict): Paramètres DataFile de la série. Si la source n'a pas changé, rien n'est importé (optionnel).
+        store (CacheStore): Stockage à utiliser (par défaut get_store()).
+
+    Returns:
+        tuple: Les lignes ajoutées au cache (éventuellement vide), et un booléen vrai si la série a été reconstruite
+               (les lignes renvoyées sont alors la série entière).
+    """
+    store = store or get_store()
+    manifest = get_manifest(store.root)
+    if not store.exists(key) or (params is not None and not manifest.matches(key, params)):
+        return load_cached(key, import_func, params, store), True
+    cached = store.read(key)
+    if params is not None and manifest.is_fresh(key, params):
+        return cached.iloc[0:0], False
+
+    last_date = cached['Date'].iloc[-1]
+    offset = manifest.appended(key, params) if params is not None else None
+    new_rows = _frame(import_func(offset=offset)) if offset is not None else None
+    if new_rows is None or (new_rows['Date'] <= last_date).any(): # fin du fichier qui ne contient pas que de nouvelles dates
+        data = _frame(import_func())
+        history = data[data['Date'] <= last_date]
+        if not _same_rows(history, cached): # historique corrigé : reconstruction complète
+            store.write(key, data)
+            if params is not None:
+                manifest.record(key, params)
+            return data, True
+        new_rows = data[data['Date'] > last_date]
+
+    new_rows = new_rows.reset_index(drop=True)
+    if not new_rows.empty:
+        store.append(key, new_rows)
+    if params is not None:
+        manifest.record(key, params)
+    return new_rows, False
+
+def _frame(data):
+    """Réassemble les morceaux d'une lecture en streaming, dans l'ordre chronologique."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    return pd.concat(list(data), ignore_index=True).sort_values('Date', kind='stable').reset_index(drop=True)
+
+def _same_rows(data, cached):
+    """Indique si deux séries ont les mêmes dates et les mêmes valeurs."""
+    if len(data) != len(cached) or list(data.columns) != list(cached.columns):
+        return False
+    if not np.array_equal(data['Date'].to_numpy(dtype='datetime64[ns]'), cached['Date'].to_numpy(dtype='datetime64[ns]')):
+        return False
+    values = [column for column in data.columns if column != 'Date']
+    return np.allclose(data[values].to_numpy(dtype=np.float64), cached[values].to_numpy(dtype=np.float64), equal_nan=True)
+
+def migrate(store = None, root = CACHE_ROOT):
+    """Migre en une fois tous les caches Excel présents sous root vers le stockage courant ; renvoie les clés migrées."""
+    store = store or get_store()
+    legacy = ExcelStore(root)
+    migrated = []
+    for folder, _, files in os.walk(root):
+        for file in files:
+            if file.endswith(".xlsx"):
+                key = os.path.relpath(os.path.join(folder, file[:-len(".xlsx")]), root).replace(os.sep, "/")
+                if not store.exists(key):
+                    store.write(key, legacy.read(key))
+                    migrated.append(key)
+    return migrated
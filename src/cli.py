@@ -0,0 +1,97 @@
+"""
+Production des rapports sans interface : python -m src.cli --output reports --format csv
+Migration des anciens caches Excel vers le stockage courant : python -m src.cli --migrate-cache
+
+Les tableaux récapitulatif, performance, risques et facteurs de tous les fonds du registre (ou de ceux passés avec
+--funds) sont calculés par une AnalyticsSession puis écrits dans le dossier de sortie, un fichier par tableau.
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import time
+import pandas as pd
+
+from src.cache import migrate
+from src.resample import FREQUENCIES
+from src.session import AnalyticsSession, TABLES
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "json", "parquet") # parquet nécessite pyarrow (optionnel)
+
+def build_reports(session, fund_names = None, frequency = "D"):
+    """
+    Calcule les tableaux de tous les fonds demandés.
+
+    Args:
+        session (AnalyticsSession): La session qui charge les données et calcule les métriques.
+        fund_names (list): Les fonds à traiter (par défaut, tous les fonds chargés du registre).
+        frequency (str): Fréquence des rendements analysés : 'D' (quotidienne), 'W' (hebdomadaire) ou 'M' (mensuelle).
+
+    Returns:
+        dict: Un DataFrame par tableau ('recap', 'performance', 'risk', 'factors'), une ligne par (fonds, fenêtre)
+              ou par (fonds, facteur). Les fonds en erreur sont ignorés et signalés dans le journal.
+    """
+    funds, errors = session.funds()
+    for name, error in errors.items():
+        logger.warning("Fonds %s ignoré : %s", name, error)
+    fund_names = [name for name in (fund_names or funds) if name in funds]
+
+    metric_tables, factor_tables = [], []
+    for name in fund_names:
+        metric_tables.append(session.metric_table(name, frequency).T.rename_axis('Window').reset_index().assign(Fund=name))
+        regression, r2 = session.factor_regression_table(name, frequency)
+        factor_tables.append(regression.rename_axis('Factor').reset_index().assign(Fund=name, R2=r2))
+
+    metrics = pd.concat(metric_tables, ignore_index=True)
+    reports = {table: metrics[['Fund', 'Window', *rows]] for table, rows in TABLES.items()}
+    reports['factors'] = pd.concat(factor_tables, ignore_index=True)[['Fund', 'Factor', 'Coefficient', 't-stat', 'R2']]
+    return reports
+
+def write_reports(reports, output, file_format = "csv"):
+    """Écrit chaque tableau dans output/<tableau>.<format> ; renvoie la liste des fichiers écrits."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported report format '{file_format}'. Use one of {list(FORMATS)}.")
+    if file_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("The parquet format requires pyarrow (pip install pyarrow); use --format csv or json otherwise.")
+    os.makedirs(output, exist_ok=True)
+    paths = []
+    for table, data in reports.items():
+        path = os.path.join(output, f"{table}.{file_format}")
+        if file_format == "parquet":
+            data.to_parquet(path, index=False)
+        elif file_format == "csv":
+            data.to_csv(path, index=False)
+        else:
+            data.to_json(path, orient="records", indent=2)
+        paths.append(path)
+    return paths
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Calcule les tableaux d'analyse des fonds et les écrit sur disque.")
+    parser.add_argument("--output", default="reports", help="Dossier de sortie (par défaut : reports).")
+    parser.add_argument("--format", default="csv", choices=FORMATS, help="Format des fichiers (par défaut : csv ; parquet nécessite pyarrow).")
+    parser.add_argument("--funds", nargs="*", help="Fonds à traiter (par défaut : tout le registre).")
+    parser.add_argument("--frequency", default="D", choices=FREQUENCIES, help="Fréquence des rendements : D, W ou M (par défaut : D).")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus pour lire les sources des fonds et les feuilles du classeur AQR.")
+    parser.add_argument("--migrate-cache", action="store_true",
+                        help="Migre les anciens caches .xlsx de data/loaded vers le stockage courant, sans calculer les rapports.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.migrate_cache:
+        migrated = migrate()
+        logger.info("%d séries migrées vers le stockage courant", len(migrated))
+        return
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None: # avant de calculer les tableaux
+        parser.error("le format parquet nécessite pyarrow (pip install pyarrow) ; utilisez --format csv ou json.")
+    start = time.perf_counter()
+    session = AnalyticsSession(max_entries=1_000_000, workers=args.workers) # une passe sur tout le registre : pas d'éviction
+    with session.request(): # mêmes données pour tous les tableaux
+        reports = build_reports(session, args.funds, args.frequency)
+    paths = write_reports(reports, args.output, args.format)
+    logger.info("%d tableaux écrits dans %s en %.2fs", len(paths), args.output, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
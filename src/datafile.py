@@ -1,7 +1,16 @@
+import io
+import time
+import logging
 import pandas as pd
 
+from src.profiling import stage
+
+logger = logging.getLogger(__name__)
+
 class DataFile:
-    def __init__(self, id: str, filepath: str, filename: str, sheet: bool, file_format: str, select_col: list, name_col: list, first_date : str):
+    def __init__(self, id: str, filepath: str, filename: str, sheet: bool, file_format: str, select_col: list, name_col: list, first_date : str,
+                 date_format: str = None, decimal: str = ".", filter_col: int = None, filter_values: list = None, chunksize: int = None,
+                 offset = None, raw = None):
         self.id = id
         self.filepath = filepath
         self.filename = filename
@@ -9,48 +18,133 @@ class DataFile:
         self.file_format = file_format
         self.select_col = select_col
         self.name_col = name_col
-        self.first_date = first_date
-        self.data = self.load_data()
+        self.first_date = first_date # date la plus ancienne de la série : l'historique antérieur et les lignes sans date sont écartés
+        self.date_format = date_format # format explicite des dates de la source (par exemple "%d.%m.%Y"), sinon déduit par pandas
+        self.decimal = decimal # séparateur décimal de la source ("," pour les exports français)
+        self.filter_col = filter_col # colonne de la source qui identifie la part / l'ISIN à conserver (optionnel)
+        self.filter_values = filter_values # valeurs acceptées dans filter_col
+        self.chunksize = chunksize # si renseigné, le fichier csv est lu par morceaux de chunksize lignes (voir iter_chunks)
+        self.offset = offset # si renseigné (csv), seules les lignes situées après cet octet sont lues : lignes ajoutées en fin de fichier
+        self.raw = raw # données brutes déjà lues (par exemple une feuille d'un classeur ouvert une seule fois)
+        self.timings = {} # durée de chaque étape du chargement, en secondes
+        self.data = None if self.chunksize else self.load_data() # en mode streaming, les données se lisent via iter_chunks()
 
     def load_data(self):
         """Cette méthode charge le fichier sélectionné dans un dataframe. Pour ce faire, elle fait appel à trois autres méthodes : import_data(), filter_columns() et clean_data().Elle retourne donc un dataframe, enregistré dans self.data."""
         
-        data = self.import_data()
-        data_filtered = self.filter_columns(data)
-        final_data = self.clean_data(data_filtered)
+        with stage(f"DataFile.load_data {self.filename}") as record:
+            start = time.perf_counter()
+            data = self.import_data() if self.raw is None else self.raw
+            self.timings['import'] = (step := time.perf_counter()) - start
+            data_filtered = self.filter_columns(data, None if self.raw is not None else self.usecols())
+            self.timings['filter'] = (end := time.perf_counter()) - step
+            final_data = self.clean_data(data_filtered)
+            self.timings['clean'] = time.perf_counter() - end
+            record["rows"] = len(final_data)
+            record.update(self.timings)
+        logger.debug("%s: %d rows, timings %s", self.filename, len(final_data), {k: round(v, 4) for k, v in self.timings.items()})
         return final_data
 
-    def import_data(self):
-        """Cette méthode se charge d'importer les données depuis les fichiers. Elle tient compte du format du fichier (excel ou csv, plusieurs feuilles ou pas) renseigné en input. Elle renvoit donc un dataframe."""
+    def read(self):
+        """Renvoie les données chargées, ou, en mode streaming (chunksize renseigné), un itérateur sur les morceaux nettoyés."""
+        return self.data if self.data is not None else self.iter_chunks()
+
+    def usecols(self):
+        """Positions des seules colonnes de la source à lire : colonnes sélectionnées et colonne de filtre des parts."""
+        return sorted(set(self.select_col) | ({self.filter_col} if self.filter_col is not None else set()))
+
+    def import_data(self, **kwargs):
+        """Cette méthode se charge d'importer les données depuis les fichiers. Elle tient compte du format du fichier (excel ou csv, plusieurs feuilles ou pas) renseigné en input. Seules les colonnes utiles sont lues. Elle renvoit donc un dataframe (ou un itérateur de dataframes si chunksize est passé pour un csv)."""
         
         dict_format = {"xlsx":"excel",
                        "csv":"csv"}   
         if self.file_format in dict_format.keys():
+            if self.offset is not None and self.file_format == "csv": # lecture de la fin du fichier seulement, sans en-tête
+                with open(f"{self.filepath}/{self.filename}.{self.file_format}", "rb") as f:
+                    f.seek(self.offset)
+                    tail = io.BytesIO(f.read())
+                return pd.read_csv(tail, header=None, decimal = self.decimal, usecols = self.usecols(), **kwargs)
             if self.sheet: # si le excel contient plusieurs feuilles (self.sheet = True), selectionne la bonne.
-                data = getattr(pd,f"read_{dict_format[self.file_format]}")(f"{self.filepath}/{self.filename}.{self.file_format}",sheet_name = self.id)
+                data = getattr(pd,f"read_{dict_format[self.file_format]}")(f"{self.filepath}/{self.filename}.{self.file_format}",sheet_name = self.id, decimal = self.decimal, usecols = self.usecols(), **kwargs)
             else:
-                data = getattr(pd,f"read_{dict_format[self.file_format]}")(f"{self.filepath}/{self.filename}.{self.file_format}")            
+                data = getattr(pd,f"read_{dict_format[self.file_format]}")(f"{self.filepath}/{self.filename}.{self.file_format}", decimal = self.decimal, usecols = self.usecols(), **kwargs)
             return data
         else:
             raise ValueError("Unsupported file type. Use 'xlsx' or 'csv'.")
+
+    def iter_chunks(self):
+        """
+        Lit le fichier par morceaux de chunksize lignes et renvoie, morceau par morceau, les lignes nettoyées.
+
+        Seules les colonnes utiles sont lues et les lignes des autres parts sont écartées à la volée, si bien que la mémoire
+        utilisée reste bornée par la taille d'un morceau. Les morceaux sont dans l'ordre du fichier (pas forcément chronologique) ;
+        chacun est filtré sur ses dates, si bien que l'ordre des lignes de la source est indifférent.
+        Les fichiers Excel ne pouvant pas être lus par morceaux, ils sont renvoyés en un seul morceau.
+        """
+        if self.raw is not None:
+            chunks, usecols = [self.raw], None
+        elif self.file_format == "csv":
+            chunks, usecols = self.import_data(chunksize = self.chunksize), self.usecols()
+        else:
+            chunks, usecols = [self.import_data()], self.usecols()
+
+        found = self.offset is not None # la première date est avant la partie lue
+        for chunk in chunks:
+            chunk, anchor = self.skip_header(self.filter_columns(chunk, usecols))
+            found = found or anchor
+            chunk = self.convert(chunk)
+            if not chunk.empty:
+                yield chunk.reset_index(drop=True)
+        if not found:
+            raise ValueError(f"First date '{self.first_date}' not found in {self.filename}.")
     
-    def filter_columns(self, data):
-        """Cette méthode filtre les colonnes qui nous interessent dans le cadre du projet (dates, VL pour les fonds, données US et Monde pour les facteurs AQR ...) et renvoie le dataframe filtré. """
+    def filter_columns(self, data, usecols = None):
+        """Cette méthode filtre les lignes de la part étudiée (si filter_col est renseigné) et les colonnes qui nous interessent dans le cadre du projet (dates, VL pour les fonds, données US et Monde pour les facteurs AQR ...) et renvoie le dataframe filtré. usecols donne les positions dans la source des colonnes effectivement lues."""
         
-        data = data[[data.columns[idx] for idx in self.select_col]] 
+        position = (lambda idx: idx) if usecols is None else usecols.index
+        if self.filter_col is not None: # on ne garde que les lignes de la part / de l'ISIN étudié
+            data = data[data.iloc[:, position(self.filter_col)].astype(str).str.strip().isin(self.filter_values)]
+        data = data[[data.columns[position(idx)] for idx in self.select_col]] 
         data.columns = self.name_col # on renomme les colonnes avec les noms renseignés en input
         return data
     
     def clean_data(self, data_filtered):
         """Cette méthode s'assure de la propreté des données en enlevant les informations non nécessaire au projet et s'assurant du bon format des données."""
         
-        while data_filtered.iloc[0,0] != self.first_date: # tant que la première cellule du dataframe ne correspond pas à la première date de la série
-            data_filtered = data_filtered.iloc[1:] # on supprime la première ligne
+        data_filtered, anchor = self.skip_header(data_filtered)
+        if not anchor and self.offset is None:
+            raise ValueError(f"First date '{self.first_date}' not found in {self.filename}.")
+        data_filtered = self.convert(data_filtered)
+        data_filtered = data_filtered.sort_values('Date').reset_index(drop=True)
+        return data_filtered
+
+    def skip_header(self, data_filtered):
+        """
+        Supprime les lignes d'en-tête et de bas de page (sans date) et l'historique antérieur à la première date de la série.
+
+        Les lignes sont repérées par leur date et non par leur position : les fichiers du plus récent au plus ancien
+        (lignes ajoutées en tête) sont traités comme les fichiers chronologiques. Renvoie les lignes conservées, avec
+        les dates converties, et un booléen qui indique si la première date de la série figure dans data_filtered.
+        """
         
-        data_filtered.Date = pd.to_datetime(data_filtered.Date, infer_datetime_format=True) # format datetime pour les dates
-        filter_float = data_filtered.columns.difference(['Date'])
-        data_filtered[filter_float] = data_filtered[filter_float].replace(",",".",regex=True).astype(float) # format float pour le reste
+        first_date = pd.to_datetime(self.first_date, format=self.date_format, errors="coerce")
+        if pd.isna(first_date):
+            raise ValueError(f"Date format '{self.date_format}' does not match first date '{self.first_date}' in {self.filename}.")
+        dates = pd.to_datetime(data_filtered.iloc[:,0], format=self.date_format, errors="coerce") # lignes d'en-tête : NaT
+        data_filtered = data_filtered[(dates >= first_date).to_numpy()].copy()
+        data_filtered.Date = dates[dates >= first_date]
+        return data_filtered, bool((dates == first_date).any())
 
-        data_filtered = data_filtered.dropna(axis="index") # on supprime les lignes sans données
-        data_filtered = data_filtered.sort_values('Date').reset_index(drop=True)
-        return data_filtered
\ No newline at end of file
+    def convert(self, data_filtered):
+        """Convertit les dates et les valeurs au bon format et supprime les lignes sans données."""
+        
+        data_filtered = data_filtered.copy()
+        data_filtered.Date = pd.to_datetime(data_filtered.Date, format=self.date_format, errors="coerce") # format datetime pour les dates, les lignes de bas de page deviennent NaT
+        for col in data_filtered.columns.difference(['Date']): # format float pour le reste
+            if data_filtered[col].dtype == object: # colonne non convertie à la lecture (lignes d'en-tête mêlées aux valeurs)
+                values = data_filtered[col].astype(str).str.strip()
+                if self.decimal != ".":
+                    values = values.str.replace(self.decimal, ".", regex=False)
+                data_filtered[col] = pd.to_numeric(values, errors="coerce")
+
+        return data_filtered.dropna(axis="index") # on supprime les lignes sans données
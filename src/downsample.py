@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+CHART_POINTS = 2000 # points envoyés au navigateur par graphique, de l'ordre de deux fois la largeur d'un graphique en pixels
+SCATTER_POINTS = 2000
+
+def lttb(x, y, points):
+    """
+    Indices des points conservés par l'algorithme Largest-Triangle-Three-Buckets (Steinarsson).
+
+    Le premier et le dernier point sont conservés ; les autres sont répartis en points - 2 paquets consécutifs, dans
+    chacun desquels on garde le point qui forme le plus grand triangle avec le point retenu dans le paquet précédent et
+    la moyenne du paquet suivant. La forme de la courbe (pics, creux, ruptures) est conservée bien mieux que par un
+    échantillonnage régulier.
+
+    Args:
+        x (np.ndarray): Abscisses croissantes, de forme (n,).
+        y (np.ndarray): Ordonnées, de forme (n,), sans NaN.
+        points (int): Nombre de points à conserver.
+
+    Returns:
+        np.ndarray: Les indices conservés, croissants.
+    """
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp) # bornes des paquets, entre le premier et le dernier point
+    edges = np.append(edges, n)
+    kept = np.empty(points, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(points - 2):
+        lo, hi, next_hi = edges[bucket], edges[bucket + 1], edges[bucket + 2]
+        mean_x, mean_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        areas = np.abs((x[selected] - mean_x) * (y[lo:hi] - y[selected]) - (x[selected] - x[lo:hi]) * (mean_y - y[selected]))
+        selected = kept[bucket + 1] = lo + areas.argmax()
+    return kept
+
+def minmax(x, y, points):
+    """
+    Indices des points conservés par paquets min/max : les dates sont réparties en points // 2 paquets consécutifs,
+    dans chacun desquels on garde le minimum et le maximum. Tous les extrêmes visibles (creux des drawdowns) sont
+    conservés. Les paquets sont traités en une fois par un tri (paquet, valeur).
+
+    Args:
+        x (np.ndarray): Abscisses croissantes, de forme (n,) (non utilisées : paquets de même nombre de points).
+        y (np.ndarray): Ordonnées, de forme (n,), sans NaN.
+        points (int): Nombre de points à conserver.
+
+    Returns:
+        np.ndarray: Les indices conservés, croissants.
+    """
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+    edges = np.linspace(0, n, points // 2 + 1).astype(np.intp)
+    buckets = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    order = np.lexsort((y, buckets)) # trié par paquet, puis par valeur
+    return np.unique(np.concatenate([[0, n - 1], order[edges[:-1]], order[edges[1:] - 1]]))
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+def downsample(frame, points = CHART_POINTS, method = "lttb"):
+    """
+    Réduit les séries d'un graphique à environ points dates, côté serveur.
+
+    Chaque colonne est réduite sur ses propres valeurs (les NaN sont ignorés) avec un budget de points // colonnes
+    points, et les dates retenues pour l'ensemble des colonnes sont gardées. Le minimum et le maximum de chaque colonne
+    sont toujours conservés.
+
+    Args:
+        frame (pd.DataFrame | pd.Series): Les séries, indexées par date (triées).
+        points (int): Nombre de dates visé.
+        method (str): 'lttb' (forme des courbes) ou 'minmax' (extrêmes de chaque paquet, pour les drawdowns).
+
+    Returns:
+        pd.DataFrame | pd.Series: Les lignes conservées de frame.
+    """
+    if len(frame) <= points:
+        return frame
+    columns = frame.to_frame() if isinstance(frame, pd.Series) else frame
+    if isinstance(frame.index, pd.DatetimeIndex):
+        x = frame.index.asi8.astype(np.float64)
+    else:
+        x = np.arange(len(frame), dtype=np.float64)
+    budget = max(points // columns.shape[1], 4)
+    kept = [np.array([0, len(frame) - 1])]
+    for column in columns.columns:
+        y = columns[column].to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(y))
+        if len(valid) == 0:
+            continue
+        kept.append(valid[METHODS[method](x[valid], y[valid], budget)])
+        kept.append(valid[[y[valid].argmin(), y[valid].argmax()]])
+    return frame.iloc[np.unique(np.concatenate(kept))]
+
+def sample(frame, points = SCATTER_POINTS, seed = 0):
+    """
+    Sous-échantillon aléatoire (reproductible) des lignes d'un nuage de points, qui conserve le minimum et le maximum
+    de chaque colonne numérique pour ne pas masquer les observations extrêmes.
+    """
+    if len(frame) <= points:
+        return frame
+    kept = [np.random.default_rng(seed).choice(len(frame), points, replace=False)]
+    for column in frame.select_dtypes('number').columns:
+        values = frame[column].to_numpy(dtype=np.float64)
+        if not np.isnan(values).all():
+            kept.append([np.nanargmin(values), np.nanargmax(values)])
+    return frame.iloc[np.unique(np.concatenate(kept))]
@@ -0,0 +1,62 @@
+import numpy as np
+
+def wealth_index(returns):
+    """
+    Valeur d'un investissement de 1 pour des rendements quotidiens en %, de forme (dates,) ou (dates, fonds).
+    Les rendements manquants (NaN) sont traités comme nuls : la valeur est reportée.
+    """
+    return np.cumprod(1 + np.nan_to_num(np.asarray(returns, dtype=np.float64)) / 100, axis=0)
+
+def underwater(wealth):
+    """
+    Série des baisses depuis le plus haut précédent, en %, de même forme que wealth.
+
+    Un seul passage de np.maximum.accumulate donne le plus haut atteint à chaque date ; le point de départ (valeur 1)
+    compte comme un plus haut, de sorte qu'une baisse dès la première date est bien une perte.
+    """
+    peaks = np.maximum(np.maximum.accumulate(wealth, axis=0), 1)
+    return (wealth / peaks - 1) * 100
+
+def drawdown_stats(returns, benchmark_returns = None):
+    """
+    Calcule les statistiques de perte maximale de plusieurs fonds à la fois.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds).
+        benchmark_returns (np.ndarray): Rendements du benchmark, de forme (dates,) (optionnel ; sinon la perte relative vaut NaN).
+
+    Returns:
+        dict: Pour chaque fonds (tableaux de forme (fonds,), sauf 'Underwater' de forme (dates, fonds)) :
+            - 'Maximum Drawdown' : la plus forte baisse depuis un plus haut, en %.
+            - 'Relative Maximum Drawdown' : la plus forte baisse de la valeur du fonds rapportée à celle du benchmark, en %.
+            - 'Drawdown Duration' : le plus long nombre de dates passées sous un plus haut.
+            - 'Recovery Time' : le nombre de dates entre le creux de la perte maximale et le retour au plus haut (NaN si le plus haut n'est pas regagné).
+            - 'Underwater' : la série des baisses depuis le plus haut, en %.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    wealth = wealth_index(returns)
+    drawdowns = underwater(wealth)
+    at_peak = drawdowns >= 0
+
+    dates = np.arange(len(drawdowns))[:, None]
+    last_peak = np.maximum.accumulate(np.where(at_peak, dates, -1), axis=0) # -1 : le point de départ
+    next_peak = np.minimum.accumulate(np.where(at_peak, dates, len(drawdowns))[::-1], axis=0)[::-1]
+    trough = np.argmin(drawdowns, axis=0)
+    columns = np.arange(drawdowns.shape[1])
+    recovery = (next_peak[trough, columns] - trough).astype(np.float64)
+    recovery[next_peak[trough, columns] == len(drawdowns)] = np.nan # plus haut jamais regagné
+
+    if benchmark_returns is None:
+        relative = np.full(drawdowns.shape[1], np.nan)
+    else:
+        relative = underwater(wealth / wealth_index(benchmark_returns)[:, None]).min(axis=0, initial=0)
+
+    return {
+        'Maximum Drawdown': drawdowns.min(axis=0, initial=0),
+        'Relative Maximum Drawdown': relative,
+        'Drawdown Duration': (dates - last_peak).max(axis=0, initial=0),
+        'Recovery Time': recovery,
+        'Underwater': np.where(np.isnan(returns), np.nan, drawdowns),
+    }
@@ -1,41 +1,35 @@
-import os # Module pour interagir avec le système d'exploitation
-import pandas as pd # Bibliotheque pour la manipulation des données
-from src.datafile import DataFile # Importation de la classe DataFile depuis le module src.datafile
+from functools import cached_property
+
+from src.factorlibrary import get_factor_library # Panel des facteurs AQR chargé une seule fois
 
 class Factor():
     """
     Classe Factor pour gérer les facteurs de performance financiers.
 
-    Cette classe représente un facteur de performance (par exemple, MKT, SMB, etc.) et gère le chargement et le traitement de ses données.
-    Elle permet de charger les données historiques du facteur, de les séparer par région (US et Global), et de les préparer pour l'analyse factorielle.
+    Cette classe représente un facteur de performance (par exemple, MKT, SMB, etc.). Les données ne sont pas dupliquées :
+    un Factor est une vue sur le panel partagé de la FactorLibrary, séparée par région (US et Global) au premier accès
+    puis conservée, pour préparer l'analyse factorielle.
 
     Attributs :
         - name (str) : Le nom du facteur de performance.
+        - library (FactorLibrary) : La bibliothèque qui contient le panel des facteurs.
         - value (pd.DataFrame) : Les données historiques du facteur.
         - us (pd.DataFrame) : Les données du facteur pour la région US.
         - monde (pd.DataFrame) : Les données du facteur pour la région Global.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, library = None):
         self.name = name
-        self.load_value()
-        self.us = self.value[['Date',f'{name} US']]
-        self.monde = self.value[['Date',f'{name} Global']]
-
-    def load_value(self):
-        if os.path.exists(factor_path:= f'data/loaded/factors/{self.name}.xlsx'):
-            self.value = pd.read_excel(factor_path)
-        else:
-            import_factor = DataFile(
-                id= self.name,
-                filepath= "data/aqr factors",
-                filename= "Betting Against Beta Equity Factors Daily",
-                sheet= True,
-                file_format= "xlsx",
-                select_col= [0,25,26], # régions US et Monde
-                name_col= ["Date",f"{self.name} US",f"{self.name} Global"],
-                first_date= "01/03/1927"
-                )
-            import_factor.data.loc[:, import_factor.data.columns != "Date"] *= 100 # Multiplier les colonnes autres que 'Date' par 100 pour convertir les rendements en pourcentage
-            self.value = import_factor.data # Sauvegarder les données importées dans un fichier Excel pour les utilisations futures
-            import_factor.data.to_excel(factor_path, index = False)
+        self.library = library or get_factor_library()
+
+    @cached_property
+    def value(self):
+        return self.library.view(self.name)
+
+    @cached_property
+    def us(self):
+        return self.value[['Date',f'{self.name} US']]
+
+    @cached_property
+    def monde(self):
+        return self.value[['Date',f'{self.name} Global']]
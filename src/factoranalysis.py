@@ -1,43 +1,44 @@
 import pandas as pd
 import numpy as np
 
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-
 from src.fund import Fund
+from src.panel import ReturnPanel
+from src.regression import factor_regression, regression_frame
+from src.walkforward import walk_forward_pca
+from src.profiling import profiled
 
 class FactorialAnalysis():
     """
     Classe FactorialAnalysis pour réaliser une analyse factorielle (ici ACP) sur un fonds d'investissement.
     
     Cette classe prend en entrée un objet Fund et un dictionnaire de facteurs, construit un jeu de données combiné,
-    normalise les données, effectue une ACP, et applique une régression linéaire sur les composantes principales.
+    normalise les données et effectue une ACP (en NumPy), et régresse les rendements du fonds sur les facteurs.
     """
-    def __init__(self, fund, factors_dict):
+    def __init__(self, fund, factors_dict, panel = None):
         self.fund: Fund = fund
         self.factors_dict: dict = factors_dict
+        self.panel: ReturnPanel = panel
         self.df = self.build_dataset()
         self.y = self.df[f'{self.fund.name}']
-        self.x = self.df.filter(like=f'{self.fund.region}') #selectionne les facteurs de la region appropriée
+        self.x = self.df[[f'{factor.name} {self.fund.region}' for factor in self.factors_dict.values()]] #selectionne les facteurs de la region appropriée
 
+    @profiled()
     def build_dataset(self):
         """Construit un jeu de données combiné à partir des données du fonds et des facteurs de performance."""
-        all_factors = pd.DataFrame()
-        for factor_name, factor in self.factors_dict.items():
-            if all_factors.empty:
-                all_factors = factor.value
-            else:
-                all_factors = pd.merge(all_factors, factor.value, on='Date', how='inner')
+        factors = list(self.factors_dict.values())
+        columns = [f'{factor.name} {region}' for factor in factors for region in ('US', 'Global')]
+        if self.panel is not None: # rendements déjà alignés : pas de fusion
+            return self.panel.frame([f'{self.fund.name}', *columns])
+        all_factors = factors[0].library.panel[['Date', *columns]] # les facteurs partagent le même panel, déjà aligné sur les dates
         
         full_dataset =  pd.merge(self.fund.rdments, all_factors, on='Date', how='inner').dropna()
         return full_dataset
     
+    @profiled()
     def ACP(self):
         """
-        Réalise une Analyse en Composantes Principales (ACP) sur les données normalisées,
-        et effectue une régression linéaire sur les composantes principales.
+        Réalise une Analyse en Composantes Principales (ACP) sur les données normalisées de l'échantillon d'apprentissage,
+        et projette l'échantillon de test sur les deux premières composantes.
         
         Returns:
             tuple: Contient les données de test transformées, les vraies valeurs de test, les charges des composantes,
@@ -47,26 +48,62 @@ class FactorialAnalysis():
         x_train, x_test, y_train, y_test = self.divide_train_test()
         x_train, x_test = self.normalize_data(x_train, x_test)
 
-        pca = PCA(n_components = 2)
-        x_train = pca.fit_transform(x_train)
-        x_test = pca.transform(x_test)
-        
-        explained_variance = pca.explained_variance_ratio_ #variance expliquée par chaque composante principale
-        pca_loadings = pca.components_
+        pca_loadings, explained_variance = principal_components(x_train, n_components = 2) #variance expliquée par chaque composante principale
+        x_test = (x_test - x_train.mean(axis=0)) @ pca_loadings.T
         feature_names = self.x.columns
 
-        regressor = LinearRegression()
-        regressor.fit(x_train, y_train)
-
         return x_test, y_test, pca_loadings, feature_names, explained_variance
     
-    def divide_train_test(self):
-        return train_test_split(self.x, self.y, test_size=0.2, random_state=0)
+    @profiled()
+    def regression(self):
+        """
+        Régression des rendements du fonds sur les facteurs de sa région (MCO avec constante).
+
+        Returns:
+            tuple: Le tableau des coefficients (alpha puis un bêta par facteur) et de leurs t-stats, et le R².
+        """
+        result = factor_regression(self.y.to_numpy(), self.x.to_numpy())
+        return regression_frame(result, self.x.columns), result['R2'][0]
+
+    @profiled()
+    def walk_forward(self, window = None, n_components = 2, min_periods = 63):
+        """
+        ACP glissante (window dates) ou cumulée depuis le début (window=None) des facteurs, mise à jour date par date.
+
+        Returns:
+            tuple: Les charges des composantes (pd.DataFrame par composante, une colonne par facteur, indexées par date)
+                   et la variance expliquée (pd.DataFrame, une colonne par composante).
+        """
+        loadings, explained = walk_forward_pca(self.x.to_numpy(), n_components, window, min_periods)
+        dates = pd.DatetimeIndex(self.df['Date'])
+        names = [f'PC{idx + 1}' for idx in range(n_components)]
+        loadings = {name: pd.DataFrame(loadings[:, idx], index=dates, columns=self.x.columns).dropna() for idx, name in enumerate(names)}
+        return loadings, pd.DataFrame(explained, index=dates, columns=names).dropna()
+
+    def divide_train_test(self, test_size = 0.2):
+        """Sépare les données en apprentissage puis test, dans l'ordre chronologique."""
+        n_train = len(self.x) - int(np.ceil(test_size * len(self.x)))
+        return self.x.iloc[:n_train], self.x.iloc[n_train:], self.y.iloc[:n_train], self.y.iloc[n_train:]
     
     def normalize_data(self, train, test):
-        sc = StandardScaler()
-        train = sc.fit_transform(train)
-        test = sc.transform(test)
-        return train, test
+        """Centre et réduit les données avec la moyenne et l'écart-type de l'échantillon d'apprentissage."""
+        train, test = np.asarray(train, dtype=np.float64), np.asarray(test, dtype=np.float64)
+        mean, std = train.mean(axis=0), train.std(axis=0)
+        std[std == 0] = 1
+        return (train - mean) / std, (test - mean) / std
+
 
+def principal_components(data, n_components = 2):
+    """
+    ACP par décomposition en valeurs singulières des données centrées.
 
+    Returns:
+        tuple: Les charges des composantes, de forme (n_components, variables), orientées pour que la plus grande charge
+               de chaque composante soit positive, et la part de variance expliquée par chaque composante.
+    """
+    centered = data - data.mean(axis=0)
+    _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
+    signs = np.sign(components[np.arange(len(components)), np.argmax(np.abs(components), axis=1)])
+    components *= signs[:, None]
+    variance = singular_values ** 2
+    return components[:n_components], variance[:n_components] / variance.sum()
@@ -0,0 +1,125 @@
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache import get_store, get_manifest, is_fresh, load_cached
+from src.datafile import DataFile
+
+AQR_FACTORS = ["MKT","SMB","HML FF","HML Devil","UMD"]
+
+AQR_FILES = {"D": "Betting Against Beta Equity Factors Daily", "M": "Betting Against Beta Equity Factors Monthly"}
+
+class FactorLibrary():
+    """
+    Classe FactorLibrary qui charge en une seule fois les facteurs AQR et le taux sans risque.
+
+    Le classeur "Betting Against Beta Equity Factors Daily" (ou Monthly) n'est ouvert qu'une fois : toutes les feuilles
+    dont le cache est absent ou périmé sont lues dans la même passe (éventuellement en parallèle), puis les séries sont
+    alignées sur les dates dans un panel unique partagé par tous les objets Factor.
+
+    Attributs :
+        - factors (list) : Les noms des facteurs chargés (par exemple MKT, SMB, ...).
+        - rf (str) : Le nom de la feuille du taux sans risque.
+        - frequency (str) : 'D' pour le classeur quotidien, 'M' pour le classeur mensuel.
+        - panel (pd.DataFrame) : Colonne 'Date' puis une colonne par facteur et par région (par exemple 'MKT US') et le taux sans risque.
+    """
+    filepath = "data/aqr factors"
+
+    def __init__(self, factors = AQR_FACTORS, rf = "RF", workers = None, frequency = "D"):
+        self.factors = list(factors)
+        self.rf = rf
+        self.workers = workers
+        self.frequency = frequency
+        self.filename = AQR_FILES[frequency]
+        self.panel = self.load_panel()
+
+    def key(self, name):
+        """Clé de la feuille name dans le cache ; les séries mensuelles sont rangées à part."""
+        return f'factors/{name}' if self.frequency == "D" else f'factors/{self.frequency}/{name}'
+
+    def datafile_params(self, name):
+        """Paramètres DataFile de la feuille name du classeur AQR."""
+        if name == self.rf:
+            select_col, name_col = [0,1], ["Date",f"{name}"]
+        elif self.frequency == "M":
+            select_col, name_col = [0,24,25], ["Date",f"{name} US",f"{name} Global"] # régions US et Monde, une colonne plus à gauche dans le classeur mensuel
+        else:
+            select_col, name_col = [0,25,26], ["Date",f"{name} US",f"{name} Global"] # régions US et Monde
+        return dict(
+            id= name,
+            filepath= self.filepath,
+            filename= self.filename,
+            sheet= True,
+            file_format= "xlsx",
+            select_col= select_col,
+            name_col= name_col,
+            first_date= "01/03/1927" if self.frequency == "D" else "01/31/1927", # première date commune à toutes les feuilles
+            date_format= "%m/%d/%Y"
+            )
+
+    def load_panel(self):
+        """Charge chaque feuille depuis le cache ou, pour les feuilles périmées, depuis une lecture unique du classeur, puis aligne les séries sur les dates."""
+        store = get_store()
+        manifest = get_manifest(store.root)
+        names = self.factors + [self.rf]
+        params = {name: self.datafile_params(name) for name in names}
+        source = manifest.source_path(params[self.rf])
+        stale = [name for name in names if not is_fresh(self.key(name), params[name], store)]
+        stale = [name for name in stale if os.path.exists(source)] # sans classeur, on se rabat sur le cache existant
+        imported = self.import_sheets(stale, params) if stale else {}
+
+        series = []
+        for name in names:
+            if name in imported:
+                store.write(self.key(name), imported[name])
+                manifest.record(self.key(name), params[name])
+                series.append(imported[name])
+            else:
+                series.append(load_cached(self.key(name), lambda name=name: import_sheet(params[name], name != self.rf), params[name]))
+
+        panel = series[0]
+        for data in series[1:]:
+            panel = pd.merge(panel, data, on='Date', how='outer')
+        return panel.sort_values('Date').reset_index(drop=True)
+
+    def import_sheets(self, names, params):
+        """Lit les feuilles demandées en ouvrant le classeur une seule fois, ou une feuille par processus si workers > 1."""
+        scale = [name != self.rf for name in names]
+        if self.workers and self.workers > 1 and len(names) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return dict(zip(names, executor.map(import_sheet, [params[name] for name in names], scale)))
+        raw = pd.read_excel(f"{self.filepath}/{self.filename}.xlsx", sheet_name=names)
+        return {name: import_sheet(params[name], pct, raw[name]) for name, pct in zip(names, scale)}
+
+    def view(self, name):
+        """Renvoie les colonnes du panel correspondant à name (un facteur ou le taux sans risque), sur ses seules dates disponibles."""
+        columns = [name] if name == self.rf else [f"{name} US", f"{name} Global"]
+        return self.panel[['Date', *columns]].dropna(subset=columns, how='all').reset_index(drop=True)
+
+
+def import_sheet(params, pct = True, raw = None):
+    """Nettoie une feuille du classeur AQR ; les rendements des facteurs sont convertis en pourcentage."""
+    data = DataFile(**params, raw=raw).data
+    if pct:
+        data.loc[:, data.columns != "Date"] *= 100 # Multiplier les colonnes autres que 'Date' par 100 pour convertir les rendements en pourcentage
+    return data
+
+_libraries = {}
+
+def get_factor_library(factors = AQR_FACTORS, rf = "RF", frequency = "D", workers = None) -> FactorLibrary:
+    """
+    Renvoie la bibliothèque de facteurs partagée (quotidienne, ou mensuelle avec frequency='M'), chargée au premier appel
+    puis rechargée quand le classeur AQR change sur disque (taille ou date de modification). workers est le nombre de
+    processus utilisés pour lire les feuilles lors d'un (re)chargement ; il ne change pas les données.
+    """
+    key = (tuple(factors), rf, frequency)
+    stamp = _stamp(f"{FactorLibrary.filepath}/{AQR_FILES[frequency]}.xlsx")
+    if key not in _libraries or _libraries[key][0] != stamp:
+        _libraries[key] = (stamp, FactorLibrary(factors, rf, workers, frequency))
+    return _libraries[key][1]
+
+def _stamp(source):
+    if not os.path.exists(source):
+        return None
+    stat = os.stat(source)
+    return stat.st_size, stat.st_mtime_ns
@@ -12,28 +12,42 @@ class Fund(FinancialAsset):
     des rendements quotidiens et de la volatilité.
 
     """
-    def __init__(self, name, region, all_funds):
+    def __init__(self, name, region, all_funds, data = None):
         super().__init__(name)
         self.region = region
-        self.load_data(
-            f'data/loaded/funds/{name}.xlsx',
-            lambda: DataFile(**all_funds[name]).data
-        )
+        self.params = all_funds[name]
+        if data is None:
+            self.load_data(
+                f'funds/{name}',
+                lambda: DataFile(**self.params).read(),
+                self.params
+            )
+        else: # données déjà chargées (par exemple par universe.load_universe)
+            self.data = data
         self.compute_daily_returns('VL')
 
-    def compute_volatility(self, returns):
-        return returns.std() * np.sqrt(252)
+    def refresh(self):
+        """Ajoute les nouvelles VL publiées depuis le dernier chargement (ingestion incrémentale, voir FinancialAsset.update_data)."""
+        return self.update_data(
+            f'funds/{self.name}',
+            lambda **kwargs: DataFile(**self.params, **kwargs).read(),
+            self.params
+        )
+
+    # periods : nombre de périodes par an des rendements (252 en quotidien, voir resample.FREQUENCIES)
+    def compute_volatility(self, returns, periods = 252):
+        return np.nanstd(returns, ddof=1) * np.sqrt(periods)
 
-    def compute_downside_volatility(self, returns):
+    def compute_downside_volatility(self, returns, periods = 252):
         negative_returns = returns[returns < 0]
-        return negative_returns.std() * np.sqrt(252)
+        return np.nanstd(negative_returns, ddof=1) * np.sqrt(periods)
 
-    def compute_sharpe_ratio(self, returns, risk_free_rate):
+    def compute_sharpe_ratio(self, returns, risk_free_rate, periods = 252):
         excess_returns = self.compute_excess_returns(returns, risk_free_rate)
-        return (excess_returns.mean() / self.compute_volatility(returns)) * np.sqrt(252)
+        return np.nanmean(excess_returns) * periods / self.compute_volatility(returns, periods) # rendement en excès annualisé / volatilité annualisée
 
-    def compute_sortino_ratio(self, returns, risk_free_rate):
+    def compute_sortino_ratio(self, returns, risk_free_rate, periods = 252):
         excess_returns = self.compute_excess_returns(returns, risk_free_rate)
-        return (excess_returns.mean() / self.compute_downside_volatility(returns)) * np.sqrt(252)
+        return np.nanmean(excess_returns) * periods / self.compute_downside_volatility(returns, periods)
 
 
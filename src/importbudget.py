@@ -0,0 +1,53 @@
+"""
+Mesure du temps d'import d'un module : python -m src.importbudget main --budget 1.5
+
+Le module est importé dans un nouvel interpréteur avec python -X importtime. Le script affiche le temps total, les
+dépendances directes les plus lentes, et échoue (code de sortie 1) si le budget est dépassé ou si un module interdit
+(par défaut les bibliothèques lourdes que l'application n'utilise plus au démarrage) a été importé.
+"""
+import argparse
+import subprocess
+import sys
+
+HEAVY_MODULES = ("sklearn", "scipy", "statsmodels")
+
+def import_times(module):
+    """
+    Importe module dans un nouvel interpréteur et renvoie les temps d'import.
+
+    Returns:
+        list: Une entrée (nom, profondeur, temps propre en s, temps cumulé en s) par module importé, dans l'ordre de python -X importtime.
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, check=True)
+    times = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        times.append((name.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return times
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Mesure le temps d'import d'un module et le compare à un budget.")
+    parser.add_argument("module", nargs="?", default="main", help="Module à importer (par défaut : main).")
+    parser.add_argument("--budget", type=float, default=2.0, help="Temps d'import maximal, en secondes (par défaut : 2).")
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY_MODULES), help="Modules qui ne doivent pas être importés.")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de dépendances directes affichées.")
+    args = parser.parse_args(argv)
+
+    times = import_times(args.module)
+    total = next(cumulative for name, _, _, cumulative in reversed(times) if name == args.module)
+    direct = sorted((entry for entry in times if entry[1] == 1), key=lambda entry: entry[3], reverse=True)
+    forbidden = sorted({name for name, _, _, _ in times if name.split(".")[0] in args.forbid})
+
+    print(f"{args.module}: {total:.3f}s (budget {args.budget:.3f}s)")
+    for name, _, _, cumulative in direct[:args.top]:
+        print(f"  {cumulative:8.3f}s  {name}")
+    if forbidden:
+        print(f"Modules interdits importés : {', '.join(forbidden)}")
+    return 1 if total > args.budget or forbidden else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.moments import moment_metrics, moment_sums
+from src.profiling import profiled
+
+METRICS = ["Performance", "Volatility", "Downside Volatility", "Sharpe Ratio", "Sortino Ratio", "Beta", "Alpha"]
+
+@profiled()
+def batch_metrics(returns, risk_free_rate, windows, benchmark_returns = None, periods = 252, block = 1024):
+    """
+    Calcule en une passe vectorisée les métriques de performance et de risque de plusieurs fonds sur plusieurs fenêtres.
+
+    Les sommes (rendements, carrés, produits croisés avec le benchmark, rendements négatifs...) sont calculées une seule
+    fois entre deux bornes de fenêtre consécutives, puis cumulées ; la somme sur une fenêtre [début, fin[ est alors la
+    différence de deux sommes cumulées. Pour chaque fonds, seules les dates où le fonds, le taux sans risque (et le benchmark s'il est fourni)
+    ont une valeur sont prises en compte, comme pour un alignement par jointure interne.
+    Les métriques de risque sont celles de moment_metrics.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates, fonds). NaN pour les valeurs manquantes.
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        windows (list of tuple): Positions (début, fin exclue) de chaque fenêtre, par exemple issues de ReturnPanel.locate.
+        benchmark_returns (np.ndarray): Rendements du benchmark, de forme (dates,) (optionnel ; sinon bêta et alpha valent NaN).
+        periods (int): Nombre de périodes par an pour l'annualisation.
+        block (int): Nombre de fonds traités à la fois, pour borner la mémoire utilisée.
+
+    Returns:
+        np.ndarray: Métriques de forme (fonds, fenêtres, len(METRICS)), dans l'ordre de METRICS.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    bounds = np.unique([position for window in windows for position in window])
+    starts = np.searchsorted(bounds, [start for start, _ in windows]) # fenêtres exprimées en indices de bornes
+    ends = np.searchsorted(bounds, [end for _, end in windows])
+    result = np.empty((returns.shape[1], len(windows), len(METRICS)))
+    for first in range(0, returns.shape[1], block):
+        result[first:first + block] = _block_metrics(returns[:, first:first + block], np.asarray(risk_free_rate, dtype=np.float64),
+                                                     benchmark_returns, (bounds, starts, ends), periods)
+    return result
+
+def _window_sums(values, segments):
+    """Sommes de values (dates, fonds) sur chaque fenêtre, de forme (fenêtres, fonds), via les sommes entre bornes consécutives."""
+    bounds, starts, ends = segments
+    cumulated = np.zeros((len(bounds), values.shape[1]))
+    for idx in range(1, len(bounds)): # peu de bornes : une somme par segment, sur des lignes contiguës
+        cumulated[idx] = cumulated[idx - 1] + values[bounds[idx - 1]:bounds[idx]].sum(axis=0)
+    return cumulated[ends] - cumulated[starts]
+
+def _block_metrics(returns, rf, bench, segments, periods):
+    quantities = moment_sums(returns, rf, bench)
+    metrics = moment_metrics({name: _window_sums(values, segments) for name, values in quantities.items()}, periods)
+    r = np.where(quantities["n"] > 0, returns, 0.0)
+    performance = (np.exp(_window_sums(np.log1p(r / 100), segments)) - 1) * 100
+    metrics = np.stack([performance, *(metrics[name] for name in METRICS[1:])], axis=-1)
+    return metrics.transpose(1, 0, 2)
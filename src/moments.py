@@ -0,0 +1,94 @@
+import numpy as np
+
+def moment_sums(returns, risk_free_rate, benchmark_returns = None):
+    """
+    Quantités par date dont les sommes, sur n'importe quel ensemble de dates, donnent les métriques de moment_metrics.
+
+    Pour chaque fonds, seules les dates où le fonds, le taux sans risque (et le benchmark s'il est fourni) ont une
+    valeur comptent : les quantités y sont nulles ailleurs. Les rendements et le benchmark sont décalés de leur moyenne,
+    ce qui ne change ni les variances ni les covariances mais garde les sommes de carrés bien conditionnées.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds). NaN pour les valeurs manquantes.
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        benchmark_returns (np.ndarray): Rendements du benchmark, de forme (dates,) (optionnel ; sinon bêta, alpha et
+                                        tracking error valent NaN).
+
+    Returns:
+        dict: Tableaux de forme (dates, fonds) : 'n' (date valide), 'r' et 'rr' (rendement décalé et son carré), 'excess'
+              (rendement en excès), 'n_neg', 'neg' et 'negneg' (rendements négatifs), et avec un benchmark 'b', 'bb', 'rb'
+              (benchmark décalé, son carré, produit avec r) et 'excess_bench'.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    rf = np.asarray(risk_free_rate, dtype=np.float64)[:, None]
+    valid = ~np.isnan(returns) & ~np.isnan(rf)
+    if benchmark_returns is not None:
+        bench = np.asarray(benchmark_returns, dtype=np.float64)[:, None]
+        valid &= ~np.isnan(bench)
+    shift = np.nan_to_num(np.nanmean(np.where(valid, returns, np.nan), axis=0))
+    r = np.where(valid, returns - shift, 0.0)
+    negative = valid & (returns < 0)
+    r_neg = np.where(negative, returns, 0.0)
+    sums = {"n": valid.astype(np.float64), "r": r, "rr": r ** 2, "excess": np.where(valid, returns - rf, 0.0),
+            "n_neg": negative.astype(np.float64), "neg": r_neg, "negneg": r_neg ** 2}
+    if benchmark_returns is not None:
+        b = np.where(valid, bench - np.nanmean(bench), 0.0)
+        sums.update({"b": b, "bb": b ** 2, "rb": r * b, "excess_bench": np.where(valid, bench - rf, 0.0)})
+    return sums
+
+@np.errstate(divide='ignore', invalid='ignore') # fenêtres vides ou trop courtes, rééchantillons dégénérés : NaN
+def moment_metrics(sums, periods = 252):
+    """
+    Métriques annualisées à partir des sommes des quantités de moment_sums (de même forme quelconque).
+
+    Les formules sont celles de Fund (volatilité, volatilité à la baisse, Sharpe, Sortino) et de Risk (bêta, alpha) ;
+    la tracking error est l'écart type annualisé de la différence entre les rendements du fonds et du benchmark.
+
+    Args:
+        sums (dict): Sommes de chaque quantité de moment_sums sur les dates considérées.
+        periods (int): Nombre de périodes par an pour l'annualisation.
+
+    Returns:
+        dict: 'Volatility', 'Downside Volatility', 'Sharpe Ratio', 'Sortino Ratio', 'Beta', 'Alpha' et 'Tracking Error'.
+    """
+    n, n_neg = sums["n"], sums["n_neg"]
+    variance = (sums["rr"] - sums["r"] ** 2 / n) / (n - 1)
+    downside_variance = np.where(n_neg > 1, (sums["negneg"] - sums["neg"] ** 2 / n_neg) / (n_neg - 1), np.nan) # au moins deux rendements négatifs
+    volatility = np.sqrt(variance) * np.sqrt(periods)
+    downside_volatility = np.sqrt(downside_variance) * np.sqrt(periods)
+    mean_excess = sums["excess"] / n
+    if "b" in sums:
+        variance_bench = (sums["bb"] - sums["b"] ** 2 / n) / (n - 1)
+        covariance = (sums["rb"] - sums["r"] * sums["b"] / n) / (n - 1)
+        beta = covariance / variance_bench
+        alpha = (mean_excess - beta * sums["excess_bench"] / n) * periods
+        tracking_error = np.sqrt(np.maximum(variance + variance_bench - 2 * covariance, 0)) * np.sqrt(periods)
+    else:
+        beta = alpha = tracking_error = np.full_like(volatility, np.nan)
+    return {
+        "Volatility": volatility,
+        "Downside Volatility": downside_volatility,
+        "Sharpe Ratio": mean_excess * periods / volatility, # rendement en excès annualisé / volatilité annualisée
+        "Sortino Ratio": mean_excess * periods / downside_volatility,
+        "Beta": beta,
+        "Alpha": alpha,
+        "Tracking Error": tracking_error,
+    }
+
+def cumulative_sums(values):
+    """Sommes cumulées le long des dates (premier axe), précédées d'une ligne de zéros : la somme des lignes [i, j[ vaut cumulated[j] - cumulated[i]."""
+    cumulated = np.zeros((values.shape[0] + 1, *values.shape[1:]))
+    np.cumsum(values, axis=0, out=cumulated[1:])
+    return cumulated
+
+def trailing_sums(cumulated, window):
+    """
+    Somme sur les window dernières dates, pour chaque date (les premières dates couvrent un historique plus court) ;
+    depuis la première date si window vaut None.
+    """
+    ends = np.arange(1, cumulated.shape[0])
+    if window is None:
+        return cumulated[ends]
+    return cumulated[ends] - cumulated[np.maximum(ends - window, 0)]
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from src.resample import compound
+from src.series import EPOCH
+
+class ReturnPanel():
+    """
+    Classe ReturnPanel qui aligne les rendements quotidiens de plusieurs actifs sur un calendrier commun.
+
+    Les rendements sont rangés dans un unique tableau 2-D contigu (une ligne par date, une colonne par fonds, benchmark,
+    facteur ou taux sans risque), les valeurs manquantes valant NaN. Les fenêtres se sélectionnent par positions
+    (searchsorted sur l'index des dates) et renvoient des vues sur ce tableau, sans fusion ni copie des données.
+
+    Attributs :
+        - dates (pd.DatetimeIndex) : Le calendrier commun, trié.
+        - values (np.ndarray) : Les rendements, de forme (nombre de dates, nombre de colonnes).
+        - columns (list) : Les noms des colonnes.
+    """
+    def __init__(self, dates, values, columns):
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = values
+        self.columns = list(columns)
+        self._positions = {column: idx for idx, column in enumerate(self.columns)}
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Construit le panel à partir de DataFrames ayant une colonne 'Date' (par exemple fund.rdments, load_rfr("RF"), le panel des facteurs).
+
+        Args:
+            frames (list of pd.DataFrame): Les séries à aligner ; toutes les colonnes autres que 'Date' sont reprises.
+
+        Returns:
+            ReturnPanel: Le panel aligné sur l'union des dates.
+        """
+        dates = np.unique(np.concatenate([frame['Date'].to_numpy(dtype='datetime64[ns]') for frame in frames]))
+        columns = [column for frame in frames for column in frame.columns if column != 'Date']
+        values = np.full((len(dates), len(columns)), np.nan)
+        idx = 0
+        for frame in frames:
+            rows = np.searchsorted(dates, frame['Date'].to_numpy(dtype='datetime64[ns]'))
+            for column in frame.columns.drop('Date'):
+                values[rows, idx] = frame[column].to_numpy(dtype=np.float64)
+                idx += 1
+        return cls(dates, values, columns)
+
+    @classmethod
+    def from_series(cls, series, dtype = np.float64):
+        """
+        Construit le panel à partir de séries compactes (voir series.CompactSeries), sur l'union de leurs dates.
+
+        Args:
+            series (list of CompactSeries): Les séries à aligner.
+            dtype: Type des valeurs du panel (np.float32 divise par deux la mémoire occupée).
+
+        Returns:
+            ReturnPanel: Le panel aligné.
+        """
+        calendars = {id(serie.days): serie.days for serie in series} # calendriers partagés : chacun n'est fusionné qu'une fois
+        days = np.unique(np.concatenate(list(calendars.values())))
+        values = np.full((len(days), len(series)), np.nan, dtype=dtype)
+        for idx, serie in enumerate(series):
+            values[np.searchsorted(days, serie.days), idx] = serie.values
+        return cls((EPOCH + days).astype('datetime64[ns]'), values, [serie.name for serie in series])
+
+    def locate(self, start_date = None, end_date = None):
+        """Positions (début, fin exclue) des dates comprises entre start_date et end_date inclus."""
+        start = 0 if start_date is None else self.dates.searchsorted(pd.Timestamp(start_date), side='left')
+        end = len(self.dates) if end_date is None else self.dates.searchsorted(pd.Timestamp(end_date), side='right')
+        return start, end
+
+    def window(self, start_date = None, end_date = None):
+        """Renvoie le sous-panel entre start_date et end_date inclus ; les valeurs sont une vue sur le panel d'origine."""
+        return self.slice(*self.locate(start_date, end_date))
+
+    def slice(self, start, end):
+        """Renvoie le sous-panel des positions [start, end[ (par exemple issues de windows.WindowResolver), sous forme de vue."""
+        return ReturnPanel(self.dates[start:end], self.values[start:end], self.columns)
+
+    def resample(self, frequency):
+        """Renvoie le panel des rendements composés par semaine ('W') ou par mois ('M'), voir resample.compound ; 'D' renvoie le panel lui-même."""
+        if frequency == "D":
+            return self
+        dates, values = compound(self.values, self.dates, frequency)
+        return ReturnPanel(dates, values, self.columns)
+
+    def column(self, name):
+        """Vue sur les rendements d'une colonne."""
+        return self.values[:, self._positions[name]]
+
+    def first_date(self, name):
+        """Première date où la colonne a une valeur."""
+        return self.dates[np.argmax(~np.isnan(self.column(name)))]
+
+    def last_date(self, name):
+        """Dernière date où la colonne a une valeur."""
+        valid = ~np.isnan(self.column(name))
+        return self.dates[len(valid) - 1 - np.argmax(valid[::-1])]
+
+    def select(self, names):
+        """
+        Renvoie les dates et les rendements des colonnes names, sur les seules dates où toutes ont une valeur.
+
+        Returns:
+            tuple: (pd.DatetimeIndex, np.ndarray de forme (dates, len(names))).
+        """
+        idx = [self._positions[name] for name in names]
+        block = self.values[:, idx]
+        valid = ~np.isnan(block).any(axis=1)
+        if valid.all():
+            return self.dates, block
+        return self.dates[valid], block[valid]
+
+    def frame(self, names):
+        """Renvoie les colonnes names sous forme de DataFrame avec une colonne 'Date', sur les dates où toutes ont une valeur."""
+        dates, block = self.select(names)
+        data = pd.DataFrame(block, columns=names)
+        data.insert(0, 'Date', dates)
+        return data
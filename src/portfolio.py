@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+
+from src.metrics import batch_metrics, METRICS
+from src.profiling import profiled
+
+ALLOCATIONS = ["Equal Weight", "Minimum Variance", "Maximum Sharpe", "Risk Parity"]
+
+def estimate(returns, risk_free_rate, shrinkage = "ledoit-wolf", min_periods = 63):
+    """
+    Rendements moyens en excès du taux sans risque et matrice de covariance de plusieurs fonds.
+
+    La covariance est calculée par paires (pour chaque couple de fonds, sur les dates où les deux fonds et le taux sans
+    risque ont une valeur) avec trois produits matriciels masqués, ce qui tolère des historiques de longueurs
+    différentes. Elle est ensuite rétrécie vers une cible diagonale (variance moyenne sur la diagonale) puis rendue
+    semi-définie positive. Avec shrinkage='ledoit-wolf', l'intensité est celle de Ledoit et Wolf (2004), les valeurs
+    manquantes comptant pour des écarts nuls.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates, fonds). NaN pour les valeurs manquantes.
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        shrinkage (float or str): Intensité du rétrécissement entre 0 et 1, 'ledoit-wolf' ou None (covariance empirique).
+        min_periods (int): Nombre minimal de valeurs pour qu'un fonds soit retenu.
+
+    Returns:
+        tuple: Rendements moyens en excès (fonds,), covariance (fonds, fonds) et masque des fonds retenus (fonds,) ;
+               moyenne et covariance valent NaN pour les fonds écartés.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    rf = np.asarray(risk_free_rate, dtype=np.float64)[:, None]
+    valid = ~np.isnan(returns) & ~np.isnan(rf)
+    eligible = valid.sum(axis=0) >= max(min_periods, 2)
+    mean = np.full(returns.shape[1], np.nan)
+    covariance = np.full((returns.shape[1], returns.shape[1]), np.nan)
+    if not eligible.any():
+        return mean, covariance, eligible
+
+    valid, returns = valid[:, eligible], returns[:, eligible]
+    mask = valid.astype(np.float64)
+    count = mask.sum(axis=0)
+    mean[eligible] = np.where(valid, returns - rf, 0.0).sum(axis=0) / count
+    centered = np.where(valid, returns - np.where(valid, returns, 0.0).sum(axis=0) / count, 0.0)
+
+    pairs = mask.T @ mask # nombre de dates communes à chaque couple
+    sums = centered.T @ mask # sums[i, j] : somme des écarts du fonds i sur les dates communes avec j
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sample = (centered.T @ centered - sums * sums.T / pairs) / (pairs - 1)
+    sample[pairs < 2] = 0.0 # couples sans dates communes : supposés non corrélés
+
+    target = np.trace(sample) / len(sample)
+    if shrinkage == "ledoit-wolf":
+        n = valid.any(axis=1).sum()
+        scatter = (centered ** 2).sum(axis=1) ** 2 - 2 * ((centered @ sample) * centered).sum(axis=1) + (sample ** 2).sum()
+        dispersion = ((sample - target * np.eye(len(sample))) ** 2).sum()
+        shrinkage = min(scatter[valid.any(axis=1)].sum() / n ** 2, dispersion) / dispersion if dispersion > 0 else 1.0
+    shrunk = (1 - (shrinkage or 0.0)) * sample + (shrinkage or 0.0) * target * np.eye(len(sample))
+
+    eigenvalues, eigenvectors = np.linalg.eigh(shrunk) # la covariance par paires n'est pas toujours semi-définie positive
+    eigenvalues = np.maximum(eigenvalues, eigenvalues[-1] * 1e-10)
+    covariance[np.ix_(eligible, eligible)] = (eigenvectors * eigenvalues) @ eigenvectors.T
+    return mean, covariance, eligible
+
+def equal_weight(mean, covariance):
+    return np.full(len(mean), 1 / len(mean))
+
+def minimum_variance(mean, covariance, iterations = 5000):
+    """Portefeuille de variance minimale, investi à 100 % sans vente à découvert."""
+    start = np.full(len(mean), 1 / len(mean))
+    return _projected_qp(covariance, np.zeros(len(mean)), _project_simplex, start, iterations)
+
+def maximum_sharpe(mean, covariance, iterations = 5000):
+    """
+    Portefeuille de ratio de Sharpe maximal (portefeuille tangent), investi à 100 % sans vente à découvert.
+
+    Il s'obtient en normalisant la solution de min y'Σy sous les contraintes mean'y = 1 et y >= 0. Si aucun fonds n'a
+    de rendement moyen en excès positif, tout est investi dans le fonds de meilleur ratio de Sharpe.
+    """
+    if not (mean > 0).any():
+        weights = np.zeros(len(mean))
+        weights[np.argmax(mean / np.sqrt(covariance.diagonal()))] = 1.0
+        return weights
+    start = np.where(mean > 0, 1 / mean[mean > 0].sum(), 0.0)
+    y = _projected_qp(covariance, np.zeros(len(mean)), lambda values: _project_budget(values, mean), start, iterations)
+    return y / y.sum()
+
+def risk_parity(mean, covariance, iterations = 50, tol = 1e-10):
+    """
+    Portefeuille de parité de risque : chaque fonds contribue autant à la variance du portefeuille.
+
+    Méthode de Newton sur la fonction convexe 1/2 y'Σy - somme(log y) / n, dont le minimum normalisé donne les poids.
+    """
+    budget = np.full(len(mean), 1 / len(mean))
+    y = 1 / np.sqrt(covariance.diagonal())
+    for _ in range(iterations):
+        gradient = covariance @ y - budget / y
+        step = np.linalg.solve(covariance + np.diag(budget / y ** 2), gradient)
+        ratio = np.where(step > 0, y / np.where(step > 0, step, 1.0), np.inf).min() # pas maximal qui garde y > 0
+        y = y - min(1.0, 0.9 * ratio) * step
+        if np.abs(gradient).max() < tol:
+            break
+    return y / y.sum()
+
+WEIGHTS = {"Equal Weight": equal_weight, "Minimum Variance": minimum_variance, "Maximum Sharpe": maximum_sharpe,
+           "Risk Parity": risk_parity}
+
+def allocate(mean, covariance, eligible, allocations = ALLOCATIONS):
+    """Poids de chaque allocation, de forme (fonds, allocations) ; les fonds écartés ont un poids nul (NaN si aucun fonds n'est retenu)."""
+    weights = np.zeros((len(eligible), len(allocations)))
+    if not eligible.any():
+        return weights * np.nan
+    mean, covariance = mean[eligible], covariance[np.ix_(eligible, eligible)]
+    for idx, allocation in enumerate(allocations):
+        weights[eligible, idx] = WEIGHTS[allocation](mean, covariance)
+    return weights
+
+def _projected_qp(covariance, linear, project, start, iterations, tol = 1e-9):
+    """
+    Minimise w'Σw - w'linear sur un ensemble convexe, project étant la projection euclidienne sur cet ensemble.
+
+    Gradient projeté accéléré (FISTA), avec relance de l'inertie dès qu'elle s'oppose à la descente (O'Donoghue et
+    Candès), ce qui évite les oscillations quand la covariance est mal conditionnée.
+    """
+    step = 1 / (2 * np.linalg.eigvalsh(covariance)[-1])
+    weights = search = start
+    momentum = 1.0
+    for _ in range(iterations):
+        updated = project(search - step * (2 * covariance @ search - linear))
+        if (search - updated) @ (updated - weights) > 0:
+            momentum = 1.0
+        next_momentum = (1 + np.sqrt(1 + 4 * momentum ** 2)) / 2
+        search = updated + (momentum - 1) / next_momentum * (updated - weights)
+        converged = np.abs(updated - weights).max() < tol * np.abs(updated).max()
+        weights, momentum = updated, next_momentum
+        if converged:
+            break
+    return weights
+
+def _project_simplex(values):
+    """Projection euclidienne sur le simplexe {w >= 0, somme(w) = 1}."""
+    return _project_budget(values, np.ones(len(values)))
+
+def _project_budget(values, budget):
+    """
+    Projection euclidienne sur {y >= 0, budget'y = 1} : y = max(values - θ budget, 0), θ étant trouvé parmi les points de
+    rupture values / budget triés (la contrainte est linéaire et décroissante en θ entre deux points de rupture).
+    """
+    signed = budget != 0
+    breaks = np.where(signed, values / np.where(signed, budget, 1.0), np.inf)
+    order = np.argsort(breaks[signed])
+    b, v, m = breaks[signed][order], values[signed][order], budget[signed][order]
+    positive = m > 0
+    # un fonds de budget positif est actif pour θ < point de rupture, un fonds de budget négatif pour θ > point de rupture
+    linear = np.concatenate([[0.0], np.cumsum(np.where(positive, 0.0, m * v))]) + \
+             np.concatenate([np.cumsum(np.where(positive, m * v, 0.0)[::-1])[::-1], [0.0]])
+    quadratic = np.concatenate([[0.0], np.cumsum(np.where(positive, 0.0, m ** 2))]) + \
+                np.concatenate([np.cumsum(np.where(positive, m ** 2, 0.0)[::-1])[::-1], [0.0]])
+    # linear[k] et quadratic[k] : fonds actifs entre les points de rupture k - 1 et k
+    at_breaks = linear[1:] - b * quadratic[1:]
+    k = np.argmax(np.append(at_breaks <= 1, True))
+    theta = (linear[k] - 1) / quadratic[k]
+    return np.maximum(values - theta * budget, 0.0)
+
+def random_portfolios(mean, covariance, n_portfolios = 5000, concentration = 0.5, seed = 0, periods = 252):
+    """
+    Évalue des portefeuilles tirés au hasard (poids positifs de somme 1, loi de Dirichlet) pour tracer la frontière efficiente.
+
+    Rendements et variances de tous les portefeuilles sont obtenus par deux produits matriciels.
+
+    Args:
+        mean (np.ndarray): Rendements moyens quotidiens en excès, en %, de forme (fonds,).
+        covariance (np.ndarray): Covariance des rendements quotidiens, de forme (fonds, fonds).
+        n_portfolios (int): Nombre de portefeuilles.
+        concentration (float): Paramètre de la loi de Dirichlet (petit : portefeuilles concentrés sur peu de fonds).
+        seed (int): Graine du générateur aléatoire.
+        periods (int): Nombre de périodes par an pour l'annualisation.
+
+    Returns:
+        tuple: Poids (portefeuilles, fonds) et DataFrame des rendements en excès et volatilités annualisés (en %) et des ratios de Sharpe.
+    """
+    weights = np.random.default_rng(seed).dirichlet(np.full(len(mean), concentration), n_portfolios)
+    frame = portfolio_stats(weights, mean, covariance, periods)
+    return weights, frame
+
+def portfolio_stats(weights, mean, covariance, periods = 252):
+    """Rendement en excès et volatilité annualisés (en %) et ratio de Sharpe de portefeuilles de poids (portefeuilles, fonds)."""
+    excess = weights @ mean * periods
+    volatility = np.sqrt(((weights @ covariance) * weights).sum(axis=1) * periods)
+    return pd.DataFrame({'Excess Return': excess, 'Volatility': volatility, 'Sharpe Ratio': excess / volatility})
+
+@profiled()
+def backtest(returns, risk_free_rate, windows, allocations = ALLOCATIONS, lookback = 252, rebalance = 63,
+             shrinkage = "ledoit-wolf", min_periods = 63, periods = 252):
+    """
+    Backtest d'allocations rééquilibrées sur plusieurs fenêtres.
+
+    Sur chaque fenêtre, le portefeuille est constitué à la première date puis rééquilibré toutes les rebalance dates
+    (calendrier compté depuis la fin de la fenêtre, donc partagé par les fenêtres de même fin : les poids d'une date
+    de rééquilibrage ne sont calculés qu'une fois). Les poids sont estimés sur les lookback dates précédentes ; entre
+    deux rééquilibrages, les poids dérivent avec les rendements, et un fonds sans valeur un jour donné rapporte 0.
+    Une fenêtre qui commence avant la fin du premier lookback (par exemple 'Origine') démarre à la position lookback,
+    la première où les poids peuvent être estimés ; les débuts effectifs sont renvoyés.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates, fonds).
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        windows (list of tuple): Positions (début, fin exclue) de chaque fenêtre, par exemple issues de ReturnPanel.locate.
+        allocations (list): Allocations à comparer (clés de WEIGHTS).
+        lookback (int): Nombre de dates utilisées pour estimer les poids.
+        rebalance (int): Nombre de dates entre deux rééquilibrages.
+        shrinkage (float or str): Voir estimate.
+        min_periods (int): Nombre minimal de valeurs sur lookback pour qu'un fonds soit investi.
+        periods (int): Nombre de périodes par an pour l'annualisation.
+
+    Returns:
+        tuple: Métriques de forme (allocations, fenêtres, len(METRICS)) comme batch_metrics, rendements quotidiens
+               des portefeuilles de forme (dates, fenêtres, allocations), NaN hors de chaque fenêtre, et positions de
+               début effectives de chaque fenêtre (fenêtres,) ; une fenêtre qui finit avant lookback n'a que des NaN.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    rf = np.asarray(risk_free_rate, dtype=np.float64)
+    paths = np.full((len(returns), len(windows), len(allocations)), np.nan)
+    metrics = np.full((len(allocations), len(windows), len(METRICS)), np.nan)
+    starts = np.array([max(start, lookback) for start, _ in windows], dtype=np.intp) # historique complet pour les premiers poids
+    weights = {} # poids par date de rééquilibrage
+    for idx, ((_, end), start) in enumerate(zip(windows, starts)):
+        if start >= end:
+            continue
+        dates = [start] + [position for position in range(end - rebalance, start, -rebalance)][::-1]
+        for first, last in zip(dates, dates[1:] + [end]):
+            if first not in weights:
+                history = slice(max(0, first - lookback), first)
+                weights[first] = allocate(*estimate(returns[history], rf[history], shrinkage, min_periods), allocations)
+            growth = np.cumprod(1 + np.nan_to_num(returns[first:last]) / 100, axis=0) @ weights[first]
+            previous = np.vstack([np.ones((1, len(allocations))), growth[:-1]])
+            paths[first:last, idx] = (growth / previous - 1) * 100
+        metrics[:, idx] = batch_metrics(paths[:, idx], rf, [(start, end)], periods=periods)[:, 0]
+    return metrics, paths, starts
+
+def backtest_frame(metrics, allocations, window_names, starts = None):
+    """
+    Met en forme les métriques de backtest : une ligne par (allocation, fenêtre), une colonne par métrique, et une
+    colonne 'Start' avec la date de début effective de chaque fenêtre si starts (dates, de forme (fenêtres,)) est fourni.
+    """
+    index = pd.MultiIndex.from_product([allocations, window_names], names=['Allocation', 'Window'])
+    frame = pd.DataFrame(metrics.reshape(-1, len(METRICS)), index=index, columns=METRICS)
+    if starts is not None:
+        frame['Start'] = np.tile(starts, len(allocations))
+    return frame
@@ -0,0 +1,186 @@
+"""
+Instrumentation des étapes de calcul : durée, nombre de lignes et variation de mémoire.
+
+Le profilage est désactivé par défaut (activé avec la variable d'environnement FAP_PROFILE=1, enable() ou profile()).
+Désactivé, stage() renvoie un contexte vide partagé et les fonctions décorées par profiled() sont appelées directement :
+le coût se limite à un test de drapeau. Activé, chaque étape ajoute un enregistrement (nom, étape parente, durée, lignes,
+mémoire) consultable avec records(), exportable en JSON lines avec export_records() et journalisé au niveau DEBUG.
+
+L'état du profilage (activation, étapes en cours, enregistrements) est propre à chaque contexte d'exécution
+(contextvars) : les sessions Streamlit, qui s'exécutent chacune dans leur thread, et les requêtes du service HTTP
+n'activent, ne désactivent et ne lisent que leur propre profilage.
+"""
+import cProfile
+import functools
+import json
+import logging
+import marshal
+import os
+import time
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_enabled = ContextVar("profiling_enabled", default=os.environ.get("FAP_PROFILE") == "1")
+_memory = ContextVar("profiling_memory", default=False)
+_stack = ContextVar("profiling_stack", default=()) # étapes en cours, pour rattacher chaque étape à sa parente
+_records = ContextVar("profiling_records", default=None) # enregistrements d'un bloc profile()
+_shared_records = deque(maxlen=10_000) # enregistrements les plus récents hors d'un bloc profile() (FAP_PROFILE=1, enable())
+_tracing = {"users": 0} # blocs profile() qui mesurent la mémoire : tracemalloc est global au processus
+_tracing_lock = threading.Lock()
+
+class _Discarded(dict):
+    """Enregistrement renvoyé quand le profilage est désactivé : les valeurs qu'on y écrit sont ignorées."""
+    def __setitem__(self, key, value):
+        pass
+
+    def update(self, *args, **kwargs):
+        pass
+
+_DISABLED = nullcontext(_Discarded())
+
+def enable(memory = False):
+    """Active le profilage dans le contexte courant ; memory=True mesure aussi la mémoire allouée (tracemalloc, plus coûteux)."""
+    _enabled.set(True)
+    _memory.set(memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable():
+    """Désactive le profilage dans le contexte courant (tracemalloc reste actif tant qu'un bloc profile() l'utilise)."""
+    _enabled.set(False)
+    with _tracing_lock:
+        if _memory.get() and _tracing["users"] == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    _memory.set(False)
+
+def is_enabled():
+    return _enabled.get()
+
+def reset():
+    _current_records().clear()
+
+@contextmanager
+def profile(memory = False):
+    """
+    Active le profilage le temps d'un bloc, dans le contexte courant seulement, avec ses propres enregistrements
+    (records() et export_records() les renvoient tant que le bloc est en cours).
+
+    Exemple :
+        with profile():
+            run_page()
+            show(records())
+    """
+    tokens = [(_enabled, _enabled.set(True)), (_memory, _memory.set(memory)),
+              (_records, _records.set(deque(maxlen=10_000))), (_stack, _stack.set(()))]
+    if memory:
+        with _tracing_lock:
+            _tracing["users"] += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    try:
+        yield
+    finally:
+        if memory:
+            with _tracing_lock:
+                _tracing["users"] -= 1
+                if _tracing["users"] == 0 and tracemalloc.is_tracing():
+                    tracemalloc.stop()
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def _current_records():
+    records = _records.get()
+    return _shared_records if records is None else records
+
+def stage(name):
+    """
+    Contexte qui mesure une étape. Il fournit un dictionnaire où compléter l'enregistrement (par exemple record['rows']).
+
+    Exemple :
+        with stage("clean_data") as record:
+            data = clean(data)
+            record["rows"] = len(data)
+    """
+    if not _enabled.get():
+        return _DISABLED
+    return _measure(name)
+
+@contextmanager
+def _measure(name):
+    stack = _stack.get()
+    record = {"stage": name, "parent": stack[-1] if stack else None, "depth": len(stack), "rows": None}
+    memory = _memory.get() and tracemalloc.is_tracing()
+    if memory:
+        before = tracemalloc.get_traced_memory()[0]
+    token = _stack.set(stack + (name,))
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        _stack.reset(token)
+        if memory:
+            record["memory_delta_mb"] = (tracemalloc.get_traced_memory()[0] - before) / 2**20
+        record["timestamp"] = time.time()
+        _current_records().append(record)
+        logger.debug(json.dumps(record, default=str))
+
+def profiled(name = None, rows = None):
+    """
+    Décorateur qui mesure chaque appel de la fonction comme une étape.
+
+    Args:
+        name (str): Nom de l'étape (par défaut, le nom qualifié de la fonction).
+        rows (function): Fonction qui donne le nombre de lignes à partir du résultat (par défaut, len() des DataFrame et tableaux).
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled.get():
+                return func(*args, **kwargs)
+            with _measure(label) as record:
+                result = func(*args, **kwargs)
+                record["rows"] = (rows or _count_rows)(result)
+            return result
+        return wrapper
+    return decorator
+
+def _count_rows(result):
+    return len(result) if hasattr(result, "__len__") and hasattr(result, "shape") else None
+
+def records():
+    """Renvoie les enregistrements sous forme de DataFrame, dans l'ordre de fin des étapes."""
+    return pd.DataFrame(list(_current_records()), columns=["stage", "parent", "depth", "seconds", "rows", "memory_delta_mb", "timestamp"])
+
+def export_records(path = None):
+    """Écrit les enregistrements en JSON lines dans path ; renvoie le texte écrit."""
+    text = "".join(json.dumps(record, default=str) + "\n" for record in _current_records())
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    return text
+
+def start_cprofile():
+    """Démarre un profil cProfile de tout le code exécuté jusqu'à stop_cprofile()."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+def stop_cprofile(profiler, path = None):
+    """
+    Arrête le profil et renvoie son contenu au format de pstats (lisible avec pstats.Stats ou snakeviz), écrit dans path si fourni.
+    """
+    profiler.disable()
+    profiler.create_stats()
+    dump = marshal.dumps(profiler.stats)
+    if path is not None:
+        with open(path, "wb") as f:
+            f.write(dump)
+    return dump
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from src.moments import cumulative_sums, trailing_sums
+
+REGRESSION_STATS = ["Coefficient", "t-stat"]
+MEMORY_BUDGET = 256 * 2 ** 20 # octets de statistiques cumulées par paquet de fonds (rolling_factor_regression)
+MAX_CONDITION = 1e12 # au-delà, X'X est considérée comme singulière (facteurs colinéaires sur la fenêtre)
+
+def factor_regression(returns, factors, risk_free_rate = None):
+    """
+    Régression linéaire (MCO) des rendements de plusieurs fonds sur une même matrice de facteurs, en une seule résolution.
+
+    Tous les fonds partagent la matrice des facteurs X (avec une constante) ; chaque fonds n'utilise que les dates où il
+    a une valeur. Les équations normales X'X b = X'y de chaque fonds s'obtiennent par un produit matriciel entre le masque
+    des dates valides et les produits croisés des facteurs, puis sont résolues ensemble (np.linalg.inv sur une pile de
+    matrices, l'inverse donnant aussi les erreurs standard des coefficients). Un fonds dont la matrice X'X est singulière
+(ou trop mal conditionnée) obtient des résultats NaN sans empêcher la résolution des autres.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds). NaN pour les valeurs manquantes.
+        factors (np.ndarray): Rendements des facteurs, de forme (dates, facteurs), sans valeur manquante.
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,) (optionnel) ; s'il est fourni, les rendements des fonds
+                                     sont pris en excès du taux sans risque.
+
+    Returns:
+        dict: 'Alpha' (fonds,), 'Betas' (fonds, facteurs), 't-stat Alpha' (fonds,), 't-stat Betas' (fonds, facteurs),
+              'R2' (fonds,) et 'Observations' (fonds,).
+    """
+    y, mask, design = _prepare(returns, factors, risk_free_rate)
+    outer = (design[:, :, None] * design[:, None, :]).reshape(len(design), -1) # produits croisés x_t x_t', un vecteur par date
+    xtx = (mask.T @ outer).reshape(-1, design.shape[1], design.shape[1])
+    xty = (y * mask).T @ design
+    return _solve(xtx, xty, (y ** 2 * mask).sum(axis=0), (y * mask).sum(axis=0), mask.sum(axis=0))
+
+def rolling_factor_regression(returns, factors, risk_free_rate = None, window = None, min_periods = None, block = 256):
+    """
+    Régressions glissantes (window dates) ou cumulées depuis le début (window=None) de plusieurs fonds sur les facteurs.
+
+    Les statistiques suffisantes (X'X, X'y, y'y) sont cumulées une fois le long des dates ; celles d'une fenêtre sont la
+    différence de deux sommes cumulées, puis toutes les dates et tous les fonds sont résolus ensemble.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds).
+        factors (np.ndarray): Rendements des facteurs, de forme (dates, facteurs).
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,) (optionnel).
+        window (int): Nombre de dates de chaque régression ; None pour une fenêtre qui s'élargit depuis la première date.
+        min_periods (int): Nombre minimal d'observations pour publier une régression (par défaut window, ou 63 en cumulé).
+        block (int): Nombre maximal de fonds traités à la fois ; réduit pour que les sommes cumulées d'un paquet
+                     tiennent dans MEMORY_BUDGET.
+
+    Returns:
+        dict: Les mêmes clés que factor_regression, avec une dimension de dates en tête (par exemple 'Betas' de forme
+              (dates, fonds, facteurs)). Les dates sans assez d'observations valent NaN.
+    """
+    y, mask, design = _prepare(returns, factors, risk_free_rate)
+    k = design.shape[1]
+    min_periods = min_periods or window or 63
+    outer = (design[:, :, None] * design[:, None, :]).reshape(len(design), -1)
+    footprint = 3 * len(y) * (k * k + k + 3) * 8 # sommes, cumuls et fenêtres d'un fonds, en octets
+    block = max(1, min(block, MEMORY_BUDGET // footprint))
+    results = []
+    for first in range(0, y.shape[1], block):
+        y_block, mask_block = y[:, first:first + block], mask[:, first:first + block]
+        sums = [mask_block[:, :, None] * outer[:, None, :], (y_block * mask_block)[:, :, None] * design[:, None, :],
+                y_block ** 2 * mask_block, y_block * mask_block, mask_block]
+        sums = [trailing_sums(cumulative_sums(values), window) for values in sums]
+        xtx = sums[0].reshape(-1, k, k)
+        result = _solve(xtx, sums[1].reshape(-1, k), *(values.reshape(-1) for values in sums[2:]))
+        too_short = result['Observations'] < min_periods
+        for name in ('Alpha', 'Betas', 't-stat Alpha', 't-stat Betas', 'R2'):
+            result[name][too_short] = np.nan
+        dates, funds = y_block.shape
+        results.append({name: values.reshape(dates, funds, *values.shape[1:]) for name, values in result.items()})
+    return {name: np.concatenate([result[name] for result in results], axis=1) for name in results[0]}
+
+def regression_frame(result, factor_names, fund_idx = 0, periods = 1):
+    """
+    Met en forme le résultat de factor_regression pour un fonds : une ligne par facteur (et l'alpha), coefficient et t-stat en colonnes.
+    L'alpha (par période) est multiplié par periods, par exemple 252 pour un alpha annualisé à partir de rendements quotidiens.
+    """
+    table = pd.DataFrame({
+        'Coefficient': [result['Alpha'][fund_idx] * periods, *result['Betas'][fund_idx]],
+        't-stat': [result['t-stat Alpha'][fund_idx], *result['t-stat Betas'][fund_idx]],
+    }, index=['Alpha', *factor_names])
+    return table
+
+def _prepare(returns, factors, risk_free_rate):
+    y = np.asarray(returns, dtype=np.float64)
+    if y.ndim == 1:
+        y = y[:, None]
+    if risk_free_rate is not None:
+        y = y - np.asarray(risk_free_rate, dtype=np.float64)[:, None]
+    mask = ~np.isnan(y)
+    design = np.column_stack([np.ones(len(y)), np.asarray(factors, dtype=np.float64)]) # constante pour l'alpha
+    return np.where(mask, y, 0.0), mask.astype(np.float64), design
+
+@np.errstate(divide='ignore', invalid='ignore') # fonds sans assez d'observations : NaN
+def _solve(xtx, xty, yy, y_sum, n):
+    """Résout les équations normales empilées et calcule erreurs standard, t-stats et R² à partir des statistiques suffisantes."""
+    k = xtx.shape[-1]
+    solvable = (n > k) & (np.linalg.det(xtx) != 0) # det nul : inv échouerait sur toute la pile
+    xtx = np.where(solvable[:, None, None], xtx, np.eye(k)) # matrice remplacée, résultats masqués ensuite
+    inverse = np.linalg.inv(xtx)
+    condition = np.abs(xtx).sum(axis=1).max(axis=1) * np.abs(inverse).sum(axis=1).max(axis=1) # conditionnement (norme 1)
+    solvable &= condition < MAX_CONDITION
+    coefficients = np.einsum('nij,nj->ni', inverse, xty)
+    residuals = yy - np.einsum('ni,ni->n', coefficients, xty) # somme des carrés des résidus : y'y - b'X'y
+    total = yy - y_sum ** 2 / n
+    sigma2 = residuals / (n - k)
+    t_stats = coefficients / np.sqrt(sigma2[:, None] * np.diagonal(inverse, axis1=1, axis2=2))
+    coefficients[~solvable] = np.nan
+    t_stats[~solvable] = np.nan
+    return {
+        'Alpha': coefficients[:, 0],
+        'Betas': coefficients[:, 1:],
+        't-stat Alpha': t_stats[:, 0],
+        't-stat Betas': t_stats[:, 1:],
+        'R2': np.where(solvable, 1 - residuals / total, np.nan),
+        'Observations': n,
+    }
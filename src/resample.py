@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+FREQUENCIES = {"D": 252, "W": 52, "M": 12} # nombre de périodes par an, pour l'annualisation
+PERIODS = {"W": "W-FRI", "M": "M"} # périodes pandas : semaines finissant le vendredi, mois calendaires
+
+def period_ends(dates, frequency):
+    """Date de fin de la période (vendredi de la semaine, dernier jour du mois) de chaque date."""
+    return pd.DatetimeIndex(dates).to_period(PERIODS[frequency]).to_timestamp(how='end').normalize()
+
+def compound(values, dates, frequency):
+    """
+    Compose des rendements quotidiens en rendements hebdomadaires ('W') ou mensuels ('M').
+
+    Les dates étant triées, chaque période est un bloc de lignes contiguës : les sommes des log-rendements sont
+    obtenues pour toutes les colonnes en un appel (np.add.reduceat). Une date sans valeur compte comme un rendement nul ;
+    une période sans aucune valeur vaut NaN. La première et la dernière période peuvent être incomplètes.
+
+    Args:
+        values (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, colonnes). NaN pour les valeurs manquantes.
+        dates (pd.DatetimeIndex): Les dates, triées.
+        frequency (str): 'W' ou 'M'.
+
+    Returns:
+        tuple: Les dates de fin de période (pd.DatetimeIndex) et les rendements composés en %, de forme (périodes, colonnes).
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    ends = period_ends(dates, frequency)
+    if len(ends) == 0:
+        return ends, values[:0]
+    starts = np.flatnonzero(np.r_[True, ends[1:] != ends[:-1]])
+    valid = ~np.isnan(values)
+    logs = np.log1p(np.where(valid, values, 0.0) / 100)
+    counts = np.add.reduceat(valid, starts, axis=0)
+    compounded = np.where(counts > 0, np.expm1(np.add.reduceat(logs, starts, axis=0)) * 100, np.nan).astype(values.dtype)
+    return ends[starts], compounded
+
+def compare(resampled, native):
+    """
+    Compare des rendements recomposés à partir de données quotidiennes à la série native de même fréquence (par exemple
+    les facteurs AQR mensuels), sur les périodes communes.
+
+    Args:
+        resampled (pd.DataFrame): Rendements recomposés, indexés par date de fin de période.
+        native (pd.DataFrame): Rendements natifs, indexés par date de fin de période, mêmes noms de colonnes.
+
+    Returns:
+        pd.DataFrame: Par colonne, le nombre de périodes communes, la corrélation et l'écart absolu moyen et maximal (en points de %).
+    """
+    rows = {}
+    for column in resampled.columns.intersection(native.columns):
+        pair = pd.concat([resampled[column], native[column]], axis=1, keys=['resampled', 'native']).dropna()
+        gap = (pair['resampled'] - pair['native']).abs()
+        rows[column] = [len(pair), pair['resampled'].corr(pair['native']), gap.mean(), gap.max()]
+    return pd.DataFrame.from_dict(rows, orient='index', columns=['Periods', 'Correlation', 'Mean Gap', 'Max Gap'])
@@ -1,7 +1,7 @@
 from src.bench import Benchmark
 from src.fund import Fund
+from src.drawdown import drawdown_stats
 import numpy as np
-from scipy.stats import linregress
 
 class Risk():
     def __init__(self, fund, bench):
@@ -9,19 +9,17 @@ class Risk():
         self.bench: Benchmark = bench
 
     def compute_beta(self, returns, benchmark_returns):
-        slope, _, _, _, _ = linregress(benchmark_returns, returns)
-        return slope
+        returns, benchmark_returns = np.asarray(returns, dtype=np.float64), np.asarray(benchmark_returns, dtype=np.float64)
+        return np.cov(benchmark_returns, returns)[0, 1] / np.var(benchmark_returns, ddof=1) # pente de la régression linéaire
     
-    def compute_alpha(self, returns, benchmark_returns, risk_free_rate):
+    def compute_alpha(self, returns, benchmark_returns, risk_free_rate, periods = 252):
         excess_fund_returns = returns - risk_free_rate
         excess_benchmark_returns = benchmark_returns - risk_free_rate
         beta = self.compute_beta(returns, benchmark_returns)
-        return np.mean(excess_fund_returns) - beta * np.mean(excess_benchmark_returns)
+        return (np.mean(excess_fund_returns) - beta * np.mean(excess_benchmark_returns)) * periods # alpha annualisé
 
-    def compute_relative_max_drawdown(self, returns, benchmark_returns):
-        fund_cumulative_returns = self.fund.compute_cumul_returns(returns)['Cumul Returns']
-        benchmark_cumulative_returns = self.bench.compute_cumul_returns(benchmark_returns)['Cumul Returns']
-        relative_drawdown = fund_cumulative_returns / benchmark_cumulative_returns - 1
-        return relative_drawdown.min()
+    def compute_max_drawdown(self, returns):
+        return drawdown_stats(returns)['Maximum Drawdown'][0]
 
-    
\ No newline at end of file
+    def compute_relative_max_drawdown(self, returns, benchmark_returns):
+        return drawdown_stats(returns, benchmark_returns)['Relative Maximum Drawdown'][0]
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from src.moments import cumulative_sums, moment_metrics, moment_sums, trailing_sums
+
+ROLLING_WINDOWS = (63, 126, 252) # environ 3, 6 et 12 mois de bourse
+ROLLING_METRICS = ["Volatility", "Sharpe Ratio", "Sortino Ratio", "Beta", "Alpha", "Tracking Error"]
+
+def rolling_metrics(returns, benchmark_returns, risk_free_rate, windows = ROLLING_WINDOWS, periods = 252):
+    """
+    Calcule les séries glissantes de volatilité, Sharpe, Sortino, bêta, alpha et tracking error en O(n).
+
+    Les moments glissants ne sont pas recalculés fenêtre par fenêtre (.rolling().apply()) : les sommes cumulées des
+    rendements, de leurs carrés et des produits croisés avec le benchmark sont calculées une fois, et la somme sur les
+    w dernières dates vaut la différence de deux sommes cumulées. Toutes les longueurs de fenêtre sont servies par la
+    même passe. Les métriques sont celles de moment_metrics ; une date n'est prise en compte que si le fonds, le
+    benchmark et le taux sans risque y ont une valeur.
+
+    Args:
+        returns (np.ndarray): Rendements quotidiens en %, de forme (dates,) ou (dates, fonds).
+        benchmark_returns (np.ndarray): Rendements du benchmark, de forme (dates,).
+        risk_free_rate (np.ndarray): Taux sans risque, de forme (dates,).
+        windows (tuple): Longueurs des fenêtres glissantes, en nombre de dates.
+        periods (int): Nombre de périodes par an pour l'annualisation.
+
+    Returns:
+        dict: Pour chaque longueur de fenêtre, un dictionnaire {métrique: np.ndarray de forme (dates, fonds)}.
+              Les valeurs valent NaN tant que la fenêtre ne contient pas assez de dates valides.
+    """
+    sums = moment_sums(returns, risk_free_rate, benchmark_returns)
+    cumulated = {name: cumulative_sums(values) for name, values in sums.items()}
+
+    results = {}
+    for window in windows:
+        s = {name: trailing_sums(values, window) for name, values in cumulated.items()}
+        metrics = moment_metrics(s, periods)
+        too_short = s["n"] < window # fenêtre incomplète (début de l'historique ou données manquantes)
+        results[window] = {name: np.where(too_short, np.nan, metrics[name]) for name in ROLLING_METRICS}
+    return results
+
+def rolling_frame(results, metric, dates, column = 0):
+    """Met en forme une métrique de rolling_metrics : une colonne par longueur de fenêtre, indexée par les dates."""
+    return pd.DataFrame({f"{window} j": values[:, column] for window, values in ((w, m[metric]) for w, m in results.items())}, index=dates)
@@ -0,0 +1,101 @@
+import os
+import weakref
+import numpy as np
+import pandas as pd
+
+EPOCH = np.datetime64("1970-01-01", "D")
+
+_calendars = weakref.WeakValueDictionary() # calendriers partagés, par contenu ; oubliés quand plus aucune série ne les utilise
+
+def shared_calendar(days):
+    """
+    Renvoie un calendrier partagé (tableau int32 en lecture seule) identique à days.
+
+    Les séries d'un univers ont souvent les mêmes dates de cotation : un calendrier déjà rencontré est réutilisé plutôt
+    que stocké une fois par série.
+    """
+    days = np.ascontiguousarray(days, dtype=np.int32)
+    key = (len(days), int(days[0]) if len(days) else 0, int(days[-1]) if len(days) else 0, hash(days.tobytes()))
+    calendar = _calendars.get(key)
+    if calendar is None or not np.array_equal(calendar, days):
+        calendar = days.copy()
+        calendar.flags.writeable = False
+        _calendars[key] = calendar
+    return calendar
+
+def to_days(dates):
+    """Convertit des dates (Series, DatetimeIndex, tableau datetime64) en numéros de jour int32 depuis le 01/01/1970."""
+    return (np.asarray(dates, dtype="datetime64[D]") - EPOCH).astype(np.int32)
+
+class CompactSeries():
+    """
+    Classe CompactSeries qui stocke une série quotidienne sous forme compacte.
+
+    Les dates sont des numéros de jour int32 (4 octets par date au lieu de 8 pour un datetime64, et sans objet
+    pandas), partagés entre les séries de même calendrier ; les valeurs sont un tableau float32 ou float64, qui peut
+    être un memory-map sur disque (seules les pages lues sont alors chargées en mémoire).
+
+    Attributs :
+        - name (str) : Le nom de la série.
+        - days (np.ndarray) : Les dates, en numéros de jour int32 triés.
+        - values (np.ndarray) : Les valeurs, de même longueur que days.
+    """
+    __slots__ = ("name", "days", "values")
+
+    def __init__(self, name, days, values):
+        self.name = name
+        self.days = shared_calendar(days)
+        self.values = values
+
+    @classmethod
+    def from_frame(cls, frame, column = None, dtype = np.float64):
+        """Construit la série à partir d'un DataFrame avec une colonne 'Date' (par défaut, la première autre colonne)."""
+        column = column or next(col for col in frame.columns if col != 'Date')
+        return cls(column, to_days(frame['Date']), frame[column].to_numpy(dtype=dtype))
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex((EPOCH + self.days).astype('datetime64[ns]'))
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les valeurs (le calendrier, partagé, n'est pas compté)."""
+        return self.values.nbytes
+
+    def __len__(self):
+        return len(self.days)
+
+    def to_frame(self):
+        """Renvoie la série sous forme de DataFrame avec une colonne 'Date', comme FinancialAsset.rdments."""
+        return pd.DataFrame({'Date': self.dates, self.name: self.values})
+
+    def returns(self):
+        """Rendements quotidiens en % de la série (des prix), sur le même calendrier ; le premier vaut NaN."""
+        values = np.empty(len(self.values), dtype=self.values.dtype)
+        values[:1] = np.nan
+        np.divide(self.values[1:], self.values[:-1], out=values[1:])
+        values[1:] -= 1
+        values[1:] *= 100
+        return CompactSeries(self.name, self.days, values)
+
+    def align(self, days):
+        """Valeurs de la série sur les dates days (int32 triés), NaN pour les dates absentes."""
+        aligned = np.full(len(days), np.nan, dtype=self.values.dtype)
+        rows = np.searchsorted(days, self.days)
+        found = rows < len(days)
+        found[found] = days[rows[found]] == self.days[found]
+        aligned[rows[found]] = self.values[found]
+        return aligned
+
+    def save(self, folder):
+        """Écrit la série dans folder (days.npy et values.npy)."""
+        os.makedirs(folder, exist_ok=True)
+        np.save(os.path.join(folder, "days.npy"), self.days)
+        np.save(os.path.join(folder, "values.npy"), self.values)
+
+    @classmethod
+    def load(cls, folder, name = None, mmap = True):
+        """Relit une série écrite par save ; avec mmap=True, les valeurs restent sur disque (memory-map en lecture seule)."""
+        mode = "r" if mmap else None
+        days = np.load(os.path.join(folder, "days.npy"))
+        return cls(name or os.path.basename(folder), days, np.load(os.path.join(folder, "values.npy"), mmap_mode=mode))
@@ -0,0 +1,425 @@
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+from src.bootstrap import bootstrap_metrics, BOOTSTRAP_METRICS
+from src.downsample import downsample, CHART_POINTS
+from src.drawdown import drawdown_stats
+from src.factor import Factor
+from src.bench import Benchmark
+from src.cache import data_version
+from src.factorlibrary import AQR_FACTORS, get_factor_library
+from src.panel import ReturnPanel
+from src.series import CompactSeries
+from src.metrics import batch_metrics, METRICS
+from src.rolling import rolling_metrics, rolling_frame, ROLLING_WINDOWS
+from src.factoranalysis import FactorialAnalysis
+from src.portfolio import ALLOCATIONS, allocate, backtest, backtest_frame, estimate, portfolio_stats, random_portfolios
+from src.regression import factor_regression, rolling_factor_regression, regression_frame
+from src.resample import FREQUENCIES, compare
+from src.utils import fund_registry, load_rfr
+from src.universe import load_universe
+from src.windows import WindowResolver, WINDOWS
+from src.profiling import stage
+
+TABLES = {"recap": ['Performance','Volatility','Sharpe Ratio'],
+          "performance": ['Performance','Alpha','Sharpe Ratio','Sortino Ratio'],
+          "risk": ['Volatility','Downside Volatility','Beta','Maximum Drawdown','Relative Maximum Drawdown']}
+logger = logging.getLogger(__name__)
+
+CHART_METHODS = {"drawdowns": "minmax"} # réduction des graphiques, 'lttb' par défaut
+
+class UnknownFund(LookupError):
+    """Fonds absent du registre."""
+
+class AnalyticsSession():
+    """
+    Classe AnalyticsSession qui garde en mémoire les données chargées et les résultats calculés entre deux affichages.
+
+    Les actifs (fonds, facteurs, taux sans risque, benchmark) ne sont chargés qu'une fois par version des données et les
+    tableaux calculés (métriques par fenêtre, comparaisons, ACP) sont conservés dans un cache LRU borné, indexé par
+    fonds, fenêtre et version des données. Quand une source change sur disque, la version change et les entrées
+    correspondantes sont recalculées. La session peut être partagée entre threads : une entrée demandée par plusieurs
+    threads à la fois n'est calculée qu'une fois, les autres attendant son résultat.
+
+    Attributs :
+        - registry (dict) : Le registre des fonds (voir utils.fund_registry).
+        - max_entries (int) : Le nombre maximal de résultats conservés dans le cache.
+        - workers (int) : Le nombre de processus utilisés pour lire les sources des fonds périmées et les feuilles du classeur AQR.
+    """
+    def __init__(self, registry = None, bench_name = "SPX", max_entries = 128, workers = None):
+        self.registry = registry or fund_registry()
+        self.workers = workers
+        self.bench_name = bench_name
+        self.max_entries = max_entries
+        self.fonds_dict = {name: details["datafile"] for name, details in self.registry.items()}
+        self.region_fund = {name: details["region"] for name, details in self.registry.items()}
+        self._entries = OrderedDict()
+        self._loaded = {} # derniers actifs chargés, mis à jour de manière incrémentale quand leur source change
+        self._pending = {} # entrées en cours de calcul, par clé
+        self._lock = threading.Lock()
+        self._request = threading.local() # version des données figée pour la requête en cours, par thread
+
+    def memoize(self, key, compute):
+        """Renvoie le résultat en cache pour key (complétée de la version des données), ou le calcule et l'ajoute au cache."""
+        key = (self.version(), *key)
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait() # un autre thread calcule déjà cette entrée
+        try:
+            with stage(f"AnalyticsSession.{key[1]}"):
+                value = compute()
+            with self._lock:
+                self._entries[key] = value
+                while len(self._entries) > self.max_entries: # éviction de l'entrée la moins récemment utilisée
+                    self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return value
+
+    def version(self):
+        """Version des données (voir cache.data_version), figée pendant une requête (voir request)."""
+        version = getattr(self._request, "version", None)
+        return version if version is not None else data_version()
+
+    @contextmanager
+    def request(self):
+        """
+        Fige la version des données le temps d'une requête (une exécution de la page, un appel au service HTTP) : les
+        fichiers sources ne sont examinés qu'une fois et tous les résultats de la requête portent sur les mêmes données.
+        """
+        if getattr(self._request, "version", None) is not None: # requête imbriquée : version déjà figée
+            yield
+            return
+        self._request.version = data_version()
+        try:
+            yield
+        finally:
+            self._request.version = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # Données ------------------------------------------------------------------------------------------------
+    def funds(self):
+        """
+        Fonds du registre chargés en parallèle, et erreurs des fonds qui n'ont pas pu l'être (voir universe.load_universe).
+
+        Quand une source change, les fonds déjà chargés sont mis à jour de manière incrémentale (Fund.refresh) ; seuls
+        les fonds qui n'avaient pas pu être chargés sont relus entièrement.
+        """
+        return self.memoize(("funds",), self._funds)
+
+    def _funds(self):
+        loaded, errors = dict(self._loaded.get("funds", {})), {}
+        for name, fund in loaded.items():
+            try:
+                fund.refresh()
+            except Exception as error: # source devenue illisible : on garde les données déjà chargées
+                logger.warning("Mise à jour du fonds %s impossible : %s", name, error)
+        missing = {name: details for name, details in self.registry.items() if name not in loaded}
+        if missing:
+            funds, errors = load_universe(missing, self.workers)
+            loaded.update(funds)
+        self._loaded["funds"] = loaded = {name: loaded[name] for name in self.registry if name in loaded}
+        return loaded, errors
+
+    def fund(self, name):
+        """Renvoie le fonds chargé ; lève UnknownFund s'il n'est pas dans le registre, RuntimeError s'il n'a pas pu être chargé."""
+        if name not in self.registry:
+            raise UnknownFund(f"Unknown fund '{name}'.")
+        funds, errors = self.funds()
+        if name not in funds:
+            raise RuntimeError(f"Fund '{name}' could not be loaded: {errors.get(name)}")
+        return funds[name]
+
+    def factors(self):
+        def compute():
+            library = get_factor_library(workers=self.workers)
+            return {factor: Factor(factor, library) for factor in AQR_FACTORS}
+        return self.memoize(("factors",), compute)
+
+    def rfr(self):
+        return self.memoize(("rfr",), lambda: load_rfr("RF"))
+
+    def bench(self):
+        def compute():
+            bench = self._loaded.get("bench")
+            if bench is None:
+                bench = self._loaded["bench"] = Benchmark(self.bench_name)
+            else:
+                bench.refresh() # nouveaux cours ajoutés au cache et aux rendements
+            return bench
+        return self.memoize(("bench", self.bench_name), compute)
+
+    def panel(self, frequency = "D"):
+        """
+        Panel des rendements de tous les fonds, du benchmark, du taux sans risque et des facteurs, aligné sur les dates.
+
+        Avec frequency='W' ou 'M', les rendements quotidiens sont composés par semaine ou par mois (voir
+        ReturnPanel.resample) ; chaque panel n'est calculé qu'une fois par version des données.
+        """
+        if frequency != "D":
+            return self.memoize(("panel", frequency), lambda: self.panel().resample(frequency))
+        def compute():
+            factors = next(iter(self.factors().values())).library.panel
+            return ReturnPanel.from_series(
+                [fund.compact_returns() for fund in self.funds()[0].values()]
+                + [self.bench().compact_returns(), CompactSeries.from_frame(self.rfr(), 'RF')]
+                + [CompactSeries.from_frame(factors, column) for column in factors.columns.drop(['Date', 'RF'])]
+            )
+        return self.memoize(("panel",), compute)
+
+    # Résultats ----------------------------------------------------------------------------------------------
+    def resolver(self, names, frequency = "D"):
+        """Fenêtres d'analyse sur le calendrier du panel, bornées aux dates où toutes les colonnes names ont une valeur (voir windows.WindowResolver)."""
+        return self.memoize(("resolver", tuple(names), frequency), lambda: WindowResolver.from_panel(self.panel(frequency), names))
+
+    def windows(self, fund_name):
+        """Dates de début des fenêtres d'analyse d'un fonds (sur ses dates communes avec le benchmark et le taux sans risque)."""
+        return self.resolver((fund_name, 'RF', self.bench_name)).start_dates(WINDOWS)
+
+    def metric_tables(self, fund_name, frequency = "D"):
+        """Tableaux récapitulatif, performance et risques du fonds pour chaque fenêtre, mis en forme pour l'affichage."""
+        return self.memoize(("metric_tables", fund_name, frequency), lambda: self._metric_tables(fund_name, frequency))
+
+    def _metric_tables(self, fund_name, frequency):
+        table = self.metric_table(fund_name, frequency)
+        percent = ['Performance', 'Volatility', 'Downside Volatility', 'Maximum Drawdown', 'Relative Maximum Drawdown'] # métriques affichées en %
+        formatted = table.apply(lambda row: row.map(('{:.2f}%' if row.name in percent else '{:.2f}').format), axis=1)
+        return tuple(formatted.loc[rows] for rows in TABLES.values())
+
+    def metric_table(self, fund_name, frequency = "D"):
+        """
+        Valeurs numériques de toutes les métriques du fonds (une ligne par métrique, une colonne par fenêtre).
+
+        Avec frequency='W' ou 'M', les métriques portent sur les rendements hebdomadaires ou mensuels et sont annualisées
+        en conséquence ; chaque fenêtre commence alors à la période qui contient sa date de début.
+        """
+        return self.memoize(("metric_table", fund_name, frequency), lambda: self._metric_table(fund_name, frequency))
+
+    def _metric_table(self, fund_name, frequency):
+        fund, spx = self.fund(fund_name), self.bench()
+        panel = self.panel(frequency)
+        windows = self.resolver((fund.name, 'RF', spx.name), frequency).positions(WINDOWS)
+
+        metrics = batch_metrics(panel.column(fund.name), panel.column('RF'), list(windows.values()), panel.column(spx.name), FREQUENCIES[frequency])[0]
+        table = pd.DataFrame(metrics.T, index=METRICS, columns=windows.keys())
+
+        drawdowns = []
+        for start, end in windows.values():
+            _, dataset = panel.slice(start, end).select([fund.name, spx.name, 'RF'])
+            stats = drawdown_stats(dataset[:, 0], dataset[:, 1])
+            drawdowns.append([stats['Maximum Drawdown'][0], stats['Relative Maximum Drawdown'][0]])
+        table.loc['Maximum Drawdown'], table.loc['Relative Maximum Drawdown'] = np.array(drawdowns).T
+        return table
+
+    def confidence_intervals(self, fund_name, n_resamples = 2000, confidence = 0.95):
+        """Estimations et intervalles de confiance bootstrap du Sharpe, du Sortino, du bêta et de l'alpha du fonds pour chaque fenêtre, mis en forme pour l'affichage."""
+        return self.memoize(("confidence_intervals", fund_name, n_resamples, confidence),
+                            lambda: self._confidence_intervals(fund_name, n_resamples, confidence))
+
+    def _confidence_intervals(self, fund_name, n_resamples, confidence):
+        panel = self.panel()
+        columns = {}
+        for window, (start, end) in self.resolver((fund_name, 'RF', self.bench_name)).positions(WINDOWS).items():
+            _, dataset = panel.slice(start, end).select([fund_name, self.bench_name, 'RF'])
+            result = bootstrap_metrics(dataset[:, 0], dataset[:, 2], dataset[:, 1], n_resamples, confidence=confidence)[0]
+            columns[window] = [f"{estimate:.2f} [{lower:.2f}, {upper:.2f}]" for estimate, lower, upper in result]
+        return pd.DataFrame(columns, index=BOOTSTRAP_METRICS)
+
+    def rolling_series(self, fund_name, windows = ROLLING_WINDOWS):
+        """Métriques glissantes du fonds (une entrée par fenêtre de rolling_metrics), sur les dates communes avec le benchmark et le taux sans risque."""
+        return self.memoize(("rolling_series", fund_name, tuple(windows)), lambda: self._rolling_series(fund_name, windows))
+
+    def _rolling_series(self, fund_name, windows):
+        dates, dataset = self.panel().select([fund_name, self.bench_name, 'RF'])
+        return dates, rolling_metrics(dataset[:, 0], dataset[:, 1], dataset[:, 2], windows)
+
+    def rolling_chart(self, fund_name, metric):
+        """Série glissante d'une métrique du fonds, une colonne par longueur de fenêtre."""
+        dates, results = self.rolling_series(fund_name)
+        return rolling_frame(results, metric, dates)
+
+    def drawdown_series(self, fund_name):
+        """Baisses depuis le plus haut (en %) du fonds et du benchmark, sur leurs dates communes depuis le début du fonds."""
+        return self.memoize(("drawdown_series", fund_name), lambda: self._drawdown_series(fund_name))
+
+    def _drawdown_series(self, fund_name):
+        dates, dataset = self.panel().select([fund_name, self.bench_name])
+        return pd.DataFrame(drawdown_stats(dataset)['Underwater'], index=dates, columns=[fund_name, self.bench_name])
+
+    def fund_summary(self, fund_name, window):
+        """Performance, volatilité et ratio de Sharpe d'un fonds sur une fenêtre, pour la comparaison entre fonds."""
+        return self.memoize(("fund_summary", fund_name, window), lambda: self._fund_summary(fund_name, window))
+
+    def _fund_summary(self, fund_name, window):
+        panel = self.panel()
+        window_position = self.resolver((fund_name, 'RF')).locate(window)
+        metrics = dict(zip(METRICS, batch_metrics(panel.column(fund_name), panel.column('RF'), [window_position])[0, 0]))
+        return [f"{metrics['Performance']:.2f}%", f"{metrics['Volatility']:.2f}%", f"{metrics['Sharpe Ratio']:.2f}"]
+
+    def comparison_table(self, fund_names, window):
+        """Tableau comparatif des fonds sur une même fenêtre."""
+        performance_comparees = pd.DataFrame(columns= fund_names)
+        for fund_name in fund_names:
+            performance_comparees[fund_name] = self.fund_summary(fund_name, window)
+        performance_comparees.index=['Performance','Volatilité','Sharpe Ratio']
+        return performance_comparees
+
+    def cumul_returns(self, fund_name):
+        """Rendements cumulés du fonds et du benchmark sur leur période commune."""
+        return self.memoize(("cumul_returns", fund_name), lambda: self._cumul_returns(fund_name))
+
+    def _cumul_returns(self, fund_name):
+        fund, spx, panel = self.fund(fund_name), self.bench(), self.panel()
+        start_date = fund.rdments.iloc[0,0] # date a laquelle premiere donnee est dispo
+        end_date = min(panel.last_date(fund.name), panel.last_date(spx.name)) # s'assure que toutes les données s'étalent sur la même periode
+        window = panel.window(start_date, end_date)
+        returns_fund, returns_bench = window.column(fund.name), window.column(spx.name)
+        both = ~np.isnan(returns_fund) & ~np.isnan(returns_bench) # chaque série est cumulée sur ses propres dates, puis on garde les dates communes
+
+        return pd.DataFrame({'Date': window.dates[both],
+                             f'{fund_name}': fund.compute_cumul_performance(returns_fund)[both],
+                             f'{spx.name}': spx.compute_cumul_performance(returns_bench)[both]})
+
+    def factor_analysis(self, fund_name, frequency = "D"):
+        """Résultats de l'ACP du fonds sur les facteurs de sa région (rendements quotidiens, hebdomadaires ou mensuels)."""
+        return self.memoize(("factor_analysis", fund_name, frequency),
+                            lambda: FactorialAnalysis(self.fund(fund_name), self.factors(), self.panel(frequency)).ACP())
+
+    def factor_structure(self, fund_name, window = 252):
+        """Charges et variance expliquée de l'ACP glissante des facteurs de la région du fonds, sur ses dates de cotation."""
+        return self.memoize(("factor_structure", fund_name, window),
+                            lambda: FactorialAnalysis(self.fund(fund_name), self.factors(), self.panel()).walk_forward(window))
+
+    def factor_columns(self, region):
+        """Colonnes du panel des facteurs AQR d'une région ('US' ou 'Global')."""
+        return [f'{factor} {region}' for factor in AQR_FACTORS]
+
+    def _regression_data(self, region, frequency = "D"):
+        """Fonds de la région, et rendements des fonds, facteurs et taux sans risque sur les dates où facteurs et taux sont connus."""
+        panel = self.panel(frequency)
+        names = [name for name, fund_region in self.region_fund.items() if fund_region == region]
+        factors = np.column_stack([panel.column(column) for column in self.factor_columns(region)])
+        rf = panel.column('RF')
+        valid = ~np.isnan(factors).any(axis=1) & ~np.isnan(rf)
+        returns = np.column_stack([panel.column(name) for name in names])[valid]
+        return names, panel.dates[valid], returns, factors[valid], rf[valid]
+
+    def factor_exposures(self, region, frequency = "D"):
+        """Régression des rendements en excès de tous les fonds d'une région sur les facteurs de cette région, en une résolution."""
+        def compute():
+            names, _, returns, factors, rf = self._regression_data(region, frequency)
+            return names, factor_regression(returns, factors, rf)
+        return self.memoize(("factor_exposures", region, frequency), compute)
+
+    def factor_regression_table(self, fund_name, frequency = "D"):
+        """Alpha (annualisé), bêtas et t-stats du fonds sur les facteurs de sa région, et le R²."""
+        region = self.region_fund[fund_name]
+        names, result = self.factor_exposures(region, frequency)
+        idx = names.index(fund_name)
+        return regression_frame(result, self.factor_columns(region), idx, FREQUENCIES[frequency]), result['R2'][idx]
+
+    def rolling_exposures(self, fund_name, window = 252):
+        """Bêtas glissants (window dates) du fonds sur les facteurs de sa région ; window=None pour des bêtas cumulés depuis le début."""
+        def compute():
+            region = self.region_fund[fund_name]
+            names, dates, returns, factors, rf = self._regression_data(region)
+            returns = returns[:, names.index(fund_name)]
+            valid = ~np.isnan(returns) # fenêtres exprimées en dates de cotation du fonds
+            result = rolling_factor_regression(returns[valid], factors[valid], rf[valid], window)
+            return pd.DataFrame(result['Betas'][:, 0], index=dates[valid], columns=self.factor_columns(region)).dropna(how='all')
+        return self.memoize(("rolling_exposures", fund_name, window), compute)
+
+    def native_factors_check(self, frequency = "M"):
+        """
+        Compare les facteurs AQR et le taux sans risque recomposés à partir des séries quotidiennes au classeur AQR natif de
+        même fréquence (voir resample.compare).
+        """
+        def compute():
+            panel = self.panel(frequency)
+            native = get_factor_library(frequency=frequency, workers=self.workers).panel.set_index('Date')
+            columns = [column for column in native.columns if column in panel.columns]
+            return compare(pd.DataFrame(panel.values[:, [panel.columns.index(column) for column in columns]], index=panel.dates, columns=columns),
+                           native[columns])
+        return self.memoize(("native_factors_check", frequency), compute)
+
+    def portfolio(self, fund_names, lookback = 252, rebalance = 63):
+        """
+        Allocations entre plusieurs fonds (voir src.portfolio) sur les fenêtres d'analyse, comptées depuis leur dernière date commune.
+
+        Returns:
+            dict: 'weights' (poids actuels, estimés sur les lookback dernières dates, une colonne par allocation),
+                  'allocations' et 'frontier' (rendements en excès, volatilités et ratios de Sharpe annualisés des
+                  allocations et de portefeuilles tirés au hasard) et 'backtest' (métriques des allocations rééquilibrées
+                  toutes les rebalance dates, par fenêtre, avec leur date de début effective 'Start' : pas avant la fin
+                  du premier lookback).
+        """
+        return self.memoize(("portfolio", tuple(fund_names), lookback, rebalance),
+                            lambda: self._portfolio(list(fund_names), lookback, rebalance))
+
+    def _portfolio(self, fund_names, lookback, rebalance):
+        panel = self.panel()
+        end_date = min(panel.last_date(name) for name in (*fund_names, 'RF'))
+        window = panel.window(None, end_date)
+        returns, rf = window.values[:, [window.columns.index(name) for name in fund_names]], window.column('RF')
+        rows = ~np.isnan(rf) & ~np.isnan(returns).all(axis=1) # dates de cotation d'au moins un fonds
+        dates, returns, rf = window.dates[rows], returns[rows], rf[rows]
+
+        mean, covariance, eligible = estimate(returns[-lookback:], rf[-lookback:])
+        weights = allocate(mean, covariance, eligible)
+        _, frontier = random_portfolios(mean[eligible], covariance[np.ix_(eligible, eligible)])
+        allocations = portfolio_stats(weights[eligible].T, mean[eligible], covariance[np.ix_(eligible, eligible)])
+
+        windows = WindowResolver(dates).positions(WINDOWS)
+        metrics, _, starts = backtest(returns, rf, list(windows.values()), lookback=lookback, rebalance=rebalance)
+        starts = [dates[start] if start < len(dates) else pd.NaT for start in starts]
+        return {"weights": pd.DataFrame(weights, index=fund_names, columns=ALLOCATIONS),
+                "allocations": allocations.set_axis(ALLOCATIONS), "frontier": frontier,
+                "backtest": backtest_frame(metrics, ALLOCATIONS, list(windows), starts)}
+
+    # Graphiques ---------------------------------------------------------------------------------------------
+    def chart(self, series, fund_name, *args, start = None, end = None, points = CHART_POINTS):
+        """
+        Série d'un graphique du fonds, restreinte aux dates entre start et end (la plage affichée) et réduite côté serveur
+        à environ points dates (voir downsample.downsample). Le résultat est gardé en cache par série et par plage.
+
+        Args:
+            series (str): 'nav', 'cumul_returns', 'drawdowns', 'rolling' (args : la métrique), 'exposures',
+                          'explained_variance' ou 'loadings' (charges des facteurs sur PC1).
+            fund_name (str): Le fonds.
+            start, end (date): Bornes de la plage affichée (par défaut, tout l'historique).
+            points (int): Nombre de dates visé.
+
+        Returns:
+            pd.DataFrame: Les séries, indexées par date.
+        """
+        start, end = (None if date is None else pd.Timestamp(date) for date in (start, end))
+        return self.memoize(("chart", series, fund_name, *args, start, end, points),
+                            lambda: self._chart(series, fund_name, args, start, end, points))
+
+    def _chart(self, series, fund_name, args, start, end, points):
+        frames = {"nav": lambda: self.fund(fund_name).data.set_index('Date'),
+                  "cumul_returns": lambda: self.cumul_returns(fund_name).set_index('Date'),
+                  "drawdowns": lambda: self.drawdown_series(fund_name),
+                  "rolling": lambda: self.rolling_chart(fund_name, *args).dropna(how='all'),
+                  "exposures": lambda: self.rolling_exposures(fund_name),
+                  "explained_variance": lambda: self.factor_structure(fund_name)[1] * 100,
+                  "loadings": lambda: self.factor_structure(fund_name)[0]['PC1']}
+        if series not in frames:
+            raise ValueError(f"Unknown chart '{series}'. Use one of {list(frames)}.")
+        return downsample(frames[series]().loc[start:end], points, CHART_METHODS.get(series, "lttb"))
@@ -0,0 +1,77 @@
+import logging
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache import get_store, is_fresh, load_cached
+from src.datafile import DataFile
+from src.fund import Fund
+
+logger = logging.getLogger(__name__)
+
+def load_universe(registry, workers = None, store = None):
+    """
+    Charge tous les fonds d'un registre, en lisant les sources périmées en parallèle.
+
+    Le processus principal vérifie le cache de chaque fonds : les fonds à jour y sont relus directement, les autres sont
+    lus et nettoyés par DataFile dans un ProcessPoolExecutor. Les processus renvoient des tableaux NumPy colonne par
+    colonne (rapides à transmettre), puis le processus principal seul écrit le cache et le manifeste. Une source
+    illisible n'interrompt pas le chargement : l'erreur est enregistrée pour ce fonds et les autres sont chargés.
+
+    Args:
+        registry (dict): Le registre des fonds {nom: {"region": ..., "datafile": paramètres DataFile}} (voir utils.fund_registry).
+        workers (int): Nombre de processus (par défaut, le nombre de processeurs) ; 1 pour tout lire dans le processus courant.
+        store (CacheStore): Stockage du cache (par défaut get_store()).
+
+    Returns:
+        tuple: Les fonds chargés {nom: Fund} et les erreurs {nom: message} des fonds qui n'ont pas pu l'être.
+    """
+    store = store or get_store()
+    all_funds = {name: details["datafile"] for name, details in registry.items()}
+    funds, errors, stale = {}, {}, []
+    for name, details in registry.items():
+        if is_fresh(f'funds/{name}', details["datafile"], store):
+            _build(funds, errors, name, lambda: Fund(name, details["region"], all_funds))
+        else:
+            stale.append(name)
+
+    if stale and workers == 1:
+        parsed = {name: _parse_safe(all_funds[name]) for name in stale}
+    elif stale:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(parse_fund, all_funds[name]) for name in stale}
+            parsed = {name: _result(future) for name, future in futures.items()}
+    for name in stale:
+        columns, error = parsed[name]
+        if error is not None:
+            logger.warning("Chargement du fonds %s impossible : %s", name, error)
+            errors[name] = error
+            continue
+        _build(funds, errors, name, lambda: Fund(name, registry[name]["region"], all_funds,
+                                                 data=load_cached(f'funds/{name}', lambda: pd.DataFrame(columns, copy=False), all_funds[name], store)))
+    return {name: funds[name] for name in registry if name in funds}, errors
+
+def parse_fund(params):
+    """Lit et nettoie la source d'un fonds (exécuté dans un processus) ; renvoie les colonnes sous forme de tableaux NumPy."""
+    data = DataFile(**params).read()
+    if not isinstance(data, pd.DataFrame): # mode streaming : morceaux réassemblés dans le processus
+        data = pd.concat(list(data), ignore_index=True)
+    return {column: data[column].to_numpy() for column in data.columns}
+
+def _parse_safe(params):
+    try:
+        return parse_fund(params), None
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+def _result(future):
+    try:
+        return future.result(), None
+    except Exception as error:
+        return None, f"{type(error).__name__}: {error}"
+
+def _build(funds, errors, name, build):
+    try:
+        funds[name] = build()
+    except Exception as error:
+        logger.warning("Chargement du fonds %s impossible : %s", name, error)
+        errors[name] = f"{type(error).__name__}: {error}"
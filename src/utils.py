@@ -1,8 +1,6 @@
-import os
-import pandas as pd
 import warnings # Module pour gérer les avertissements
 
-from src.datafile import DataFile # Importation de la classe DataFile depuis le module src.datafile
+from src.factorlibrary import get_factor_library # Panel des facteurs AQR et du taux sans risque
 
 warnings.filterwarnings('ignore')
 
@@ -25,6 +23,7 @@ def fund_loading_details():
     "select_col": [2,6],
     "name_col": ['Date','VL'],
     "first_date": "26/03/2013 00:00",
+    "date_format": "%d/%m/%Y %H:%M",
             }
 
     jpm_dict = {
@@ -36,6 +35,7 @@ def fund_loading_details():
         "select_col": [0,1],
         "name_col": ['Date','VL'],
         "first_date": "30.08.2019",
+        "date_format": "%d.%m.%Y",
                 }
 
     schroder_dict = {
@@ -46,65 +46,36 @@ def fund_loading_details():
         "file_format": "csv",
         "select_col": [4,5],
         "name_col": ['Date','VL'],
-        "first_date": "09.10.2024",
+        "first_date": "23.11.2010",
+        "date_format": "%d.%m.%Y",
+        "decimal": ",",
+        "filter_col": 3, # colonne ISIN : on ne garde que la part C
+        "filter_values": ["LU0557290854"],
                 }
     
     return aqr_dict, jpm_dict, schroder_dict
 #---------------------------------------------------------------------------------------------------------
-def load_rfr(name):
+def fund_registry():
     """
-        Charge les données du taux sans risque (Risk-Free Rate).
-
-        Args:
-            name (str): Nom du taux sans risque à charger (par exemple, 'RF').
+        Registre des fonds analysés.
 
         Retourne:
-            pd.DataFrame: DataFrame contenant les données du taux sans risque.
+            dict: Pour chaque nom de fonds, sa région ('US' ou 'Global') et les détails du fichier à charger (voir fund_loading_details).
         """
-    if os.path.exists(rf_path:= f'data/loaded/factors/{name}.xlsx'):
-        rfr = pd.read_excel(rf_path)
-    else :
-        import_rf = DataFile(
-                id= name,
-                filepath= "data/aqr factors",
-                filename= "Betting Against Beta Equity Factors Daily",
-                sheet= True,
-                file_format= "xlsx",
-                select_col= [0,1],
-                name_col= ["Date",f"{name}"],
-                first_date= "01/03/1927"
-                )
-        rfr = import_rf.data
-        import_rf.data.to_excel(rf_path, index = False)
-    return rfr
-#--------------------------------------------------------------------------------------------------------
-def find_unique_end_date(dataframes):
-    """
-    Trouve la date de fin unique la plus récente parmi plusieurs DataFrames.
-
-    Args:
-        dataframes (list of pd.DataFrame): Liste des DataFrames à examiner.
-
-    Retourne:
-        str: Date de fin unique minimale parmi toutes les dates de fin des DataFrames.
-    """
-    end_dates = []
-    for df in dataframes:
-        end_dates.append(df.iloc[-1,0])
-    end_date = min(end_dates)
-    return end_date
-#--------------------------------------------------------------------------------------------------------
-def filter(data, start_date, end_date):
+    aqr_dict, jpm_dict, schroder_dict = fund_loading_details()
+    return {'AQR Large Cap Multi-Style': {"region": "US", "datafile": aqr_dict},
+            'JPM America Equity': {"region": "US", "datafile": jpm_dict},
+            'Schroder Global Sustainable Growth': {"region": "Global", "datafile": schroder_dict}}
+#---------------------------------------------------------------------------------------------------------
+def load_rfr(name):
     """
-        Filtre les données entre une date de début et une date de fin spécifiées.
+        Charge les données du taux sans risque (Risk-Free Rate).
 
         Args:
-            data (pd.DataFrame): DataFrame à filtrer contenant une colonne 'Date'.
-            start_date (str): Date de début pour le filtrage (format 'YYYY-MM-DD' ou similaire).
-            end_date (str): Date de fin pour le filtrage (format 'YYYY-MM-DD' ou similaire).
+            name (str): Nom du taux sans risque à charger (par exemple, 'RF').
 
         Retourne:
-            pd.DataFrame: DataFrame filtré contenant uniquement les lignes entre start_date et end_date inclus.
+            pd.DataFrame: DataFrame contenant les données du taux sans risque.
         """
-    return data[(data['Date'] >= start_date) & (data['Date'] <= end_date)]
+    return get_factor_library(rf=name).view(name)
 #--------------------------------------------------------------------------------------------------------
@@ -0,0 +1,103 @@
+from collections import deque
+
+import numpy as np
+
+class WalkForwardPCA():
+    """
+    Classe WalkForwardPCA qui suit la structure factorielle (ACP sur données standardisées) au fil des dates.
+
+    Les observations sont ajoutées dans l'ordre chronologique : la somme et la somme des produits croisés sont mises à
+    jour à chaque date (ajout de la nouvelle ligne et, en fenêtre glissante, retrait de la plus ancienne), ce qui donne
+    la moyenne et la matrice de corrélation sans reprendre l'historique. Les vecteurs propres ne sont pas recalculés par
+    une décomposition complète : quelques itérations de sous-espace, démarrées des vecteurs de la date précédente,
+    suffisent à les suivre, et gardent leur signe d'une date à l'autre.
+
+    Attributs :
+        - n_components (int) : Le nombre de composantes principales suivies.
+        - window (int) : La longueur de la fenêtre glissante, ou None pour une fenêtre qui s'élargit depuis la première date.
+        - min_periods (int) : Le nombre minimal d'observations avant de publier des composantes.
+        - components (np.ndarray) : Les charges des composantes, de forme (n_components, variables).
+        - explained_variance_ratio (np.ndarray) : La part de variance expliquée par chaque composante.
+    """
+    def __init__(self, n_variables, n_components = 2, window = None, min_periods = 63, iterations = 2):
+        self.n_components = n_components
+        self.window = window
+        self.min_periods = max(min_periods, n_components + 1)
+        self.iterations = iterations
+        self.n = 0
+        self.sum = np.zeros(n_variables)
+        self.sum_products = np.zeros((n_variables, n_variables))
+        self._buffer = deque()
+        self.components = None
+        self.explained_variance_ratio = None
+
+    def update(self, row):
+        """Ajoute l'observation d'une date et met à jour les composantes ; renvoie True si elles sont publiées."""
+        row = np.asarray(row, dtype=np.float64)
+        self._add(row, 1)
+        if self.window is not None:
+            self._buffer.append(row)
+            if len(self._buffer) > self.window: # la plus ancienne observation sort de la fenêtre
+                self._add(self._buffer.popleft(), -1)
+        if self.n < self.min_periods:
+            return False
+        self._refresh()
+        return True
+
+    def run(self, data):
+        """
+        Parcourt les observations dans l'ordre des dates.
+
+        Args:
+            data (np.ndarray): Les observations, de forme (dates, variables), sans valeur manquante.
+
+        Returns:
+            tuple: Les charges de forme (dates, n_components, variables) et la variance expliquée de forme
+                   (dates, n_components), NaN tant que la fenêtre compte moins de min_periods observations.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        loadings = np.full((len(data), self.n_components, data.shape[1]), np.nan)
+        explained = np.full((len(data), self.n_components), np.nan)
+        for idx, row in enumerate(data):
+            if self.update(row):
+                loadings[idx] = self.components
+                explained[idx] = self.explained_variance_ratio
+        return loadings, explained
+
+    def correlation(self):
+        """Matrice de corrélation des observations de la fenêtre (covariance des données standardisées)."""
+        mean = self.sum / self.n
+        covariance = (self.sum_products - self.n * np.outer(mean, mean)) / (self.n - 1)
+        scale = 1 / np.sqrt(np.diag(covariance))
+        return covariance * np.outer(scale, scale)
+
+    def _add(self, row, sign):
+        self.n += sign
+        self.sum += sign * row
+        self.sum_products += sign * np.outer(row, row)
+
+    def _refresh(self):
+        correlation = self.correlation()
+        if self.components is None: # première publication : démarrage sur la décomposition complète
+            basis = np.linalg.eigh(correlation)[1][:, ::-1][:, :self.n_components]
+        else:
+            basis = self.components.T
+            for _ in range(self.iterations):
+                basis, _ = np.linalg.qr(correlation @ basis)
+        # Rayleigh-Ritz : valeurs propres et vecteurs ordonnés dans le sous-espace suivi
+        eigenvalues, rotation = np.linalg.eigh(basis.T @ correlation @ basis)
+        eigenvalues, basis = eigenvalues[::-1], basis @ rotation[:, ::-1]
+        if self.components is not None: # même orientation qu'à la date précédente
+            basis *= np.where(np.einsum('ij,ji->i', self.components, basis) < 0, -1, 1)
+        self.components = basis.T
+        self.explained_variance_ratio = eigenvalues / np.trace(correlation)
+
+def walk_forward_pca(data, n_components = 2, window = None, min_periods = 63):
+    """
+    ACP glissante (window dates) ou cumulée depuis le début (window=None) des observations, mise à jour date par date.
+
+    Returns:
+        tuple: Les charges de forme (dates, n_components, variables) et la variance expliquée de forme (dates, n_components).
+    """
+    data = np.asarray(data, dtype=np.float64)
+    return WalkForwardPCA(data.shape[1], n_components, window, min_periods).run(data)
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+SPANS = {"MTD": "month", "YTD": "year", "1 an": 1, "3 ans": 3, "5 ans": 5, "10 ans": 10, "Origine": "inception"}
+WINDOWS = ["YTD", "1 an", "3 ans", "5 ans", "Origine"] # fenêtres d'analyse affichées
+
+class WindowResolver():
+    """
+    Classe WindowResolver qui traduit les fenêtres d'analyse (YTD, MTD, n ans, depuis l'origine) en positions sur un calendrier trié.
+
+    Le calendrier est gardé sous forme de tableau datetime64 : la date de début d'une fenêtre se calcule à partir de la
+    dernière date disponible (1er janvier ou 1er du mois de cette date, même date n ans plus tôt), puis se traduit en
+    position par une recherche dichotomique (searchsorted). Les fenêtres plus longues que l'historique sont ramenées à
+    la première date disponible. Les positions (début, fin exclue) servent directement à découper les tableaux de
+    rendements (ReturnPanel.slice, batch_metrics), sans filtrer les données.
+
+    Attributs :
+        - dates (np.ndarray) : Le calendrier, en datetime64[ns] triés.
+        - first (int) : La position de la première date disponible.
+        - end (int) : La position qui suit la dernière date disponible.
+    """
+    def __init__(self, dates, first = 0, end = None):
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+        self.first = first
+        self.end = len(self.dates) if end is None else end
+
+    @classmethod
+    def from_panel(cls, panel, names):
+        """Fenêtres sur le calendrier d'un ReturnPanel, bornées aux dates entre lesquelles toutes les colonnes names ont une valeur."""
+        valid = ~np.isnan(panel.values[:, [panel.columns.index(name) for name in names]])
+        if not valid.any(axis=0).all():
+            return cls(panel.dates, 0, 0)
+        first = valid.argmax(axis=0).max()
+        end = len(valid) - valid[::-1].argmax(axis=0).max()
+        return cls(panel.dates, int(first), int(max(end, first)))
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[self.end - 1]) if self.end > self.first else None
+
+    def start_date(self, window):
+        """Date à partir de laquelle la fenêtre commence (avant ramenement à l'historique disponible) ; None pour 'Origine'."""
+        if window not in SPANS:
+            raise ValueError(f"Unknown window '{window}'. Use one of {list(SPANS)}.")
+        span, last = SPANS[window], self.last_date
+        if span == "inception" or last is None:
+            return None
+        if span == "year":
+            return pd.Timestamp(last.year, 1, 1)
+        if span == "month":
+            return pd.Timestamp(last.year, last.month, 1)
+        return last - pd.DateOffset(years=span) + pd.Timedelta(days=1) # rendements postérieurs à la clôture d'il y a n ans
+
+    def locate(self, window):
+        """Positions (début, fin exclue) de la fenêtre sur le calendrier."""
+        start_date = self.start_date(window)
+        if start_date is None:
+            return self.first, self.end
+        start = int(np.searchsorted(self.dates, np.datetime64(start_date, 'ns'), side='left'))
+        return min(max(start, self.first), self.end), self.end
+
+    def positions(self, windows = WINDOWS):
+        """Positions (début, fin exclue) de chaque fenêtre, par nom."""
+        return {window: self.locate(window) for window in windows}
+
+    def start_dates(self, windows = WINDOWS):
+        """Première date de chaque fenêtre sur le calendrier, par nom."""
+        return {window: pd.Timestamp(self.dates[min(start, len(self.dates) - 1)]) for window, (start, _) in self.positions(windows).items()}
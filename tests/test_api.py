@@ -0,0 +1,65 @@
+import shutil
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+from src import cache, factorlibrary
+from src.api import create_app
+from src.session import AnalyticsSession
+from src.utils import fund_registry
+
+FUND = 'AQR Large Cap Multi-Style'
+DATA = Path(__file__).resolve().parent.parent / "data"
+
+
+@pytest.fixture(scope="module")
+def data(tmp_path_factory):
+    """Copie du dossier data/ : les caches construits par la session sont écrits dans la copie, pas dans le dépôt."""
+    root = tmp_path_factory.mktemp("api")
+    shutil.copytree(DATA, root / "data")
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(root)
+        for module, name in [(cache, "_stores"), (cache, "_manifests"), (factorlibrary, "_libraries")]:
+            patch.setattr(module, name, {}) # stockages, manifeste et facteurs relus depuis la copie
+        yield root
+
+
+@pytest.fixture(scope="module")
+def session(data):
+    """Un fonds réel et un fonds dont la source n'existe pas."""
+    registry = {FUND: fund_registry()[FUND]}
+    registry["Broken"] = {"region": "US", "datafile": {**registry[FUND]["datafile"], "filename": "missing source"}}
+    return AnalyticsSession(registry)
+
+
+@pytest.fixture(scope="module")
+def client(session):
+    with TestClient(create_app(session, workers=2)) as client:
+        yield client
+
+
+def test_metrics_match_the_session(client, session):
+    response = client.get(f"/funds/{FUND}/metrics")
+    assert response.status_code == 200
+    expected = session.metric_table(FUND, "D")
+    assert response.json()["YTD"]["Sharpe Ratio"] == pytest.approx(expected.loc["Sharpe Ratio", "YTD"])
+
+
+def test_unknown_fund_is_not_found(client):
+    response = client.get("/funds/Nope/metrics")
+    assert response.status_code == 404
+    assert "Nope" in response.json()["detail"]
+
+
+def test_fund_that_could_not_be_loaded_is_a_server_error(client):
+    assert client.get("/funds").json()["errors"].keys() == {"Broken"}
+    assert client.get("/funds/Broken/drawdowns").status_code == 500
+
+
+def test_rejected_parameters(client, session, monkeypatch):
+    assert client.get(f"/funds/{FUND}/metrics?frequency=X").status_code == 422
+    def reject(fund_name, frequency):
+        raise ValueError("window too short")
+    monkeypatch.setattr(session, "factor_regression_table", reject)
+    response = client.get(f"/funds/{FUND}/exposures?frequency=W")
+    assert response.status_code == 422 and response.json()["detail"] == "window too short"
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src.bootstrap import bootstrap_metrics, block_indices, stationary_indices, BOOTSTRAP_METRICS
+from src.metrics import batch_metrics, METRICS
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(4)
+    bench = rng.normal(0.03, 1.0, 750)
+    funds = np.column_stack([0.8 * bench + rng.normal(0.01, 0.5, 750), rng.normal(0.02, 1.2, 750)])
+    funds[:100, 1] = np.nan
+    return funds, bench, np.full(750, 0.01)
+
+
+def test_estimate_matches_batch_metrics_and_lies_in_the_interval(data):
+    funds, bench, rf = data
+    result = bootstrap_metrics(funds, rf, bench, n_resamples=500)
+    expected = batch_metrics(funds, rf, [(0, len(rf))], bench)[:, 0, [METRICS.index(name) for name in BOOTSTRAP_METRICS]]
+    np.testing.assert_allclose(result[:, :, 0], expected, rtol=1e-9)
+    assert ((result[:, :, 1] <= result[:, :, 0]) & (result[:, :, 0] <= result[:, :, 2])).all()
+
+
+def test_reproducible_across_chunks_and_processes(data):
+    funds, bench, rf = data
+    serial = bootstrap_metrics(funds, rf, bench, n_resamples=400, chunk=100, seed=7)
+    np.testing.assert_array_equal(serial, bootstrap_metrics(funds, rf, bench, n_resamples=400, chunk=100, seed=7))
+    np.testing.assert_allclose(serial, bootstrap_metrics(funds, rf, bench, n_resamples=400, chunk=100, seed=7, workers=2))
+
+
+@pytest.mark.parametrize("indices", [stationary_indices, block_indices])
+def test_indices_stay_in_range(indices):
+    drawn = indices(100, 50, 10, np.random.default_rng(0))
+    assert drawn.shape == (50, 100) and drawn.min() >= 0 and drawn.max() < 100
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache import NumpyStore, ParquetStore, write_chunks
+
+SERIES = pd.DataFrame({"Date": pd.bdate_range("2000-01-03", periods=1050), "VL": np.arange(1050.0)})
+
+
+def chunks(frame, size = 100):
+    for start in range(0, len(frame), size):
+        yield frame.iloc[start:start + size].reset_index(drop=True)
+
+
+@pytest.fixture(params=["npy", "parquet"])
+def store(request, tmp_path):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+        return ParquetStore(str(tmp_path))
+    return NumpyStore(str(tmp_path))
+
+
+@pytest.mark.parametrize("order", ["oldest first", "newest first", "shuffled"])
+def test_write_chunks_stores_the_series_in_date_order(store, order):
+    source = {"oldest first": SERIES, "newest first": SERIES.iloc[::-1],
+              "shuffled": SERIES.sample(frac=1, random_state=0)}[order]
+    written = write_chunks("funds/test", chunks(source), store)
+    pd.testing.assert_frame_equal(written.reset_index(drop=True), SERIES)
+    pd.testing.assert_frame_equal(store.read("funds/test"), SERIES)
+
+
+def test_newest_first_chunks_are_not_reread(store, monkeypatch):
+    reads = []
+    read = store.read
+    monkeypatch.setattr(store, "read", lambda key: reads.append(key) or read(key))
+    write_chunks("funds/test", chunks(SERIES.iloc[::-1]), store)
+    assert reads == ["funds/test"] # seule la série finale est relue
+
+
+def test_parquet_append_writes_a_new_part(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = ParquetStore(str(tmp_path))
+    (tmp_path / "funds").mkdir()
+    SERIES.iloc[:500].to_parquet(tmp_path / "funds" / "test.parquet", index=False) # ancien cache en un seul fichier
+    store.append("funds/test", SERIES.iloc[500:])
+    assert sorted(path.name for path in (tmp_path / "funds" / "test.parquet").iterdir()) == ["part-00000.parquet", "part-00001.parquet"]
+    pd.testing.assert_frame_equal(store.read("funds/test"), SERIES)
+    with pytest.raises(ValueError):
+        store.append("funds/test", SERIES.rename(columns={"VL": "Other"}))
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.downsample import downsample, lttb, minmax, sample
+
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(6)
+    dates = pd.bdate_range("2000-01-03", periods=10_000)
+    values = np.cumsum(rng.normal(0, 1, (10_000, 2)), axis=0)
+    values[:2000, 1] = np.nan
+    return pd.DataFrame(values, index=dates, columns=["Fund", "SPX"])
+
+
+@pytest.mark.parametrize("method", [lttb, minmax])
+def test_methods_keep_the_ends_within_budget(method):
+    y = np.sin(np.linspace(0, 20, 5000))
+    kept = method(np.arange(5000.0), y, 200)
+    assert kept[0] == 0 and kept[-1] == 4999
+    assert len(kept) <= 202 and (np.diff(kept) > 0).all()
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    y = np.random.default_rng(0).normal(size=1000)
+    kept = minmax(np.arange(1000.0), y, 100)
+    for bucket in np.array_split(np.arange(1000), 50):
+        assert bucket[y[bucket].argmin()] in kept and bucket[y[bucket].argmax()] in kept
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_keeps_extremes_of_each_column(frame, method):
+    reduced = downsample(frame, 500, method)
+    assert len(reduced) < len(frame) and reduced.index.is_monotonic_increasing
+    assert reduced.index[0] == frame.index[0] and reduced.index[-1] == frame.index[-1]
+    for column in frame.columns:
+        assert reduced[column].min() == frame[column].min() and reduced[column].max() == frame[column].max()
+
+
+def test_short_frames_are_unchanged(frame):
+    assert len(downsample(frame.iloc[:100])) == 100
+    assert len(sample(frame.iloc[:100], 500)) == 100
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from src.drawdown import drawdown_stats
+
+
+def test_known_path():
+    stats = drawdown_stats(np.array([10.0, -50.0, 20.0, 100.0, -10.0]))
+    np.testing.assert_allclose(stats['Underwater'][:, 0], [0, -50, -40, 0, -10])
+    assert stats['Maximum Drawdown'][0] == pytest.approx(-50)
+    assert stats['Drawdown Duration'][0] == 2
+    assert stats['Recovery Time'][0] == 2
+
+
+def test_loss_on_the_first_date_and_no_recovery():
+    stats = drawdown_stats(np.array([-20.0, 10.0]))
+    assert stats['Maximum Drawdown'][0] == pytest.approx(-20)
+    assert np.isnan(stats['Recovery Time'][0])
+
+
+def test_matches_a_running_peak_on_several_funds():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0.02, 1.0, (500, 3))
+    returns[100:120, 2] = np.nan # rendement manquant : valeur reportée
+    bench = rng.normal(0.02, 1.0, 500)
+    stats = drawdown_stats(returns, bench)
+    for column in range(3):
+        wealth = np.cumprod(1 + np.nan_to_num(returns[:, column]) / 100)
+        peak = np.maximum(np.maximum.accumulate(wealth), 1)
+        assert stats['Maximum Drawdown'][column] == pytest.approx(((wealth / peak - 1) * 100).min())
+        relative = wealth / np.cumprod(1 + bench / 100)
+        assert stats['Relative Maximum Drawdown'][column] == pytest.approx(
+            ((relative / np.maximum(np.maximum.accumulate(relative), 1) - 1) * 100).min())
+    assert np.isnan(stats['Underwater'][100:120, 2]).all()
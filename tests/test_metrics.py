@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.fund import Fund
+from src.metrics import batch_metrics, METRICS
+from src.panel import ReturnPanel
+from src.resample import FREQUENCIES
+from src.risk import Risk
+
+
+@pytest.fixture(scope="module")
+def panel():
+    """Vingt ans de rendements quotidiens (en %) simulés : un fonds, son benchmark et le taux sans risque."""
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2000-01-03", periods=252 * 20)
+    bench = rng.normal(0.03, 1.0, len(dates))
+    fund = 0.02 + 0.8 * bench + rng.normal(0, 0.5, len(dates))
+    rf = np.full(len(dates), 0.01)
+    return ReturnPanel(dates, np.column_stack([fund, bench, rf]), ["Fund", "SPX", "RF"])
+
+
+def metrics(panel, frequency):
+    resampled = panel.resample(frequency)
+    result = batch_metrics(resampled.column("Fund")[:, None], resampled.column("RF"), [(0, len(resampled.dates))],
+                           resampled.column("SPX"), periods=FREQUENCIES[frequency])
+    return dict(zip(METRICS, result[0, 0]))
+
+
+@pytest.mark.parametrize("frequency", ["W", "M"])
+def test_annualized_metrics_do_not_depend_on_frequency(panel, frequency):
+    daily, resampled = metrics(panel, "D"), metrics(panel, frequency)
+    assert resampled["Performance"] == pytest.approx(daily["Performance"], rel=1e-9)
+    assert resampled["Volatility"] == pytest.approx(daily["Volatility"], rel=0.05)
+    assert resampled["Sharpe Ratio"] == pytest.approx(daily["Sharpe Ratio"], abs=0.1)
+    assert resampled["Beta"] == pytest.approx(daily["Beta"], abs=0.05)
+    assert resampled["Alpha"] == pytest.approx(daily["Alpha"], abs=1.0)
+
+
+def test_sharpe_ratio_is_annualized(panel):
+    daily = metrics(panel, "D")
+    fund, rf = panel.column("Fund"), panel.column("RF")
+    per_period = np.mean(fund - rf) / np.std(fund, ddof=1)
+    assert daily["Sharpe Ratio"] == pytest.approx(per_period * np.sqrt(252))
+
+
+def test_batch_metrics_match_fund_and_risk_formulas():
+    rng = np.random.default_rng(1)
+    bench = rng.normal(0.03, 1.0, 600)
+    funds = np.column_stack([0.8 * bench + rng.normal(0, 0.5, 600), rng.normal(0.01, 2.0, 600)])
+    funds[:50, 1] = np.nan # historique plus court
+    funds[300:310, 0] = np.nan # valeurs manquantes
+    rf = np.full(600, 0.01)
+    windows = [(0, 600), (350, 600)]
+    result = batch_metrics(funds, rf, windows, bench)
+
+    fund, risk = Fund.__new__(Fund), Risk(None, None) # formules seules, sans charger de données
+    for column in range(funds.shape[1]):
+        for idx, (start, end) in enumerate(windows):
+            returns, valid = funds[start:end, column], ~np.isnan(funds[start:end, column])
+            r, b, f = returns[valid], bench[start:end][valid], rf[start:end][valid]
+            expected = [fund.compute_cumul_performance(r)[-1], fund.compute_volatility(r), fund.compute_downside_volatility(r),
+                        fund.compute_sharpe_ratio(r, f), fund.compute_sortino_ratio(r, f), risk.compute_beta(r, b),
+                        risk.compute_alpha(r, b, f)]
+            assert result[column, idx] == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from src.portfolio import (ALLOCATIONS, allocate, backtest, estimate, minimum_variance, risk_parity, _project_simplex)
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(5)
+    market = rng.normal(0.03, 1.0, 800)
+    funds = np.column_stack([0.9 * market + rng.normal(0, 0.5, 800), 0.5 * market + rng.normal(0.01, 0.8, 800),
+                             rng.normal(0.02, 1.5, 800)])
+    funds[:300, 2] = np.nan # fonds lancé plus tard
+    return funds, np.full(800, 0.01)
+
+
+def test_weights_are_long_only_and_fully_invested(data):
+    funds, rf = data
+    weights = allocate(*estimate(funds[-252:], rf[-252:]))
+    assert weights.shape == (3, len(ALLOCATIONS))
+    assert (weights >= -1e-12).all()
+    np.testing.assert_allclose(weights.sum(axis=0), 1)
+
+
+def test_fund_without_enough_history_is_not_invested(data):
+    funds, rf = data
+    mean, covariance, eligible = estimate(funds[:320], rf[:320])
+    assert eligible.tolist() == [True, True, False]
+    assert (allocate(mean, covariance, eligible)[2] == 0).all()
+
+
+def test_closed_form_allocations():
+    covariance = np.diag([1.0, 4.0])
+    np.testing.assert_allclose(minimum_variance(np.zeros(2), covariance), [0.8, 0.2], atol=1e-6)
+    covariance = np.array([[1.0, 0.3], [0.3, 4.0]])
+    weights = risk_parity(np.zeros(2), covariance)
+    contributions = weights * (covariance @ weights)
+    assert contributions[0] == pytest.approx(contributions[1])
+
+
+def test_simplex_projection():
+    np.testing.assert_allclose(_project_simplex(np.array([0.5, 0.5, 3.0])), [0, 0, 1])
+    np.testing.assert_allclose(_project_simplex(np.array([0.2, 0.3])), [0.45, 0.55])
+
+
+def test_backtest_starts_after_the_first_lookback(data):
+    funds, rf = data
+    metrics, paths, starts = backtest(funds, rf, [(0, 800), (600, 800), (0, 100)], lookback=252, rebalance=63)
+    assert starts.tolist() == [252, 600, 252]
+    assert np.isnan(paths[:252, 0]).all() and not np.isnan(paths[252:, 0]).any()
+    assert np.isnan(metrics[:, 2]).all() # fenêtre qui finit avant le premier lookback
+
+    # premier segment (jusqu'au rééquilibrage de 296, calendrier compté depuis la fin) en équipondération : les poids
+    # dérivent avec les rendements
+    weights = allocate(*estimate(funds[:252], rf[:252]))[:, 0]
+    growth = np.cumprod(1 + np.nan_to_num(funds[252:296]) / 100, axis=0) @ weights
+    np.testing.assert_allclose(paths[252:296, 0, 0], (growth / np.append(1, growth[:-1]) - 1) * 100)
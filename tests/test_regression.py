@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.regression import factor_regression, rolling_factor_regression
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Trois facteurs et deux fonds simulés sur 500 dates, le troisième facteur nul sur les 100 premières."""
+    rng = np.random.default_rng(0)
+    factors = rng.normal(size=(500, 3))
+    factors[:100, 2] = 0
+    returns = 0.05 + factors @ [0.5, 1.0, 0.2] + rng.normal(0, 0.1, 500)
+    funds = np.column_stack([returns, returns])
+    funds[100:, 1] = np.nan # le second fonds n'existe que sur la période où X'X est singulière
+    return funds, factors
+
+
+def test_matches_least_squares(data):
+    funds, factors = data
+    result = factor_regression(funds[:, 0], factors)
+    expected = np.linalg.lstsq(np.column_stack([np.ones(len(factors)), factors]), funds[:, 0], rcond=None)[0]
+    assert result['Alpha'][0] == pytest.approx(expected[0])
+    assert result['Betas'][0] == pytest.approx(expected[1:])
+
+
+def test_singular_fund_does_not_abort_the_others(data):
+    funds, factors = data
+    result = factor_regression(funds, factors)
+    assert np.isfinite(result['Betas'][0]).all()
+    assert np.isnan(result['Betas'][1]).all() and np.isnan(result['R2'][1])
+
+
+def test_rolling_matches_static_regression_on_each_window(data):
+    funds, factors = data
+    rolling = rolling_factor_regression(funds[:, 0], factors, window=60)
+    assert np.isnan(rolling['Betas'][:100, 0]).all() # fenêtres trop courtes ou facteur nul sur toute la fenêtre
+    static = factor_regression(funds[141:201, 0], factors[141:201])
+    assert rolling['Betas'][200, 0] == pytest.approx(static['Betas'][0])
+    assert rolling['t-stat Alpha'][200, 0] == pytest.approx(static['t-stat Alpha'][0])
+
+
+def test_rolling_blocks_do_not_change_results(data):
+    funds, factors = data
+    whole = rolling_factor_regression(funds, factors, window=None)
+    split = rolling_factor_regression(funds, factors, window=None, block=1)
+    np.testing.assert_array_equal(whole['Betas'], split['Betas'])
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from src.metrics import batch_metrics, METRICS
+from src.rolling import rolling_metrics
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(2)
+    bench = rng.normal(0.03, 1.0, 400)
+    funds = np.column_stack([0.9 * bench + rng.normal(0, 0.4, 400), rng.normal(0.02, 1.5, 400)])
+    funds[200:205, 1] = np.nan
+    return funds, bench, np.full(400, 0.01)
+
+
+@pytest.mark.parametrize("end", [62, 150, 210, 399])
+def test_rolling_matches_batch_metrics_on_each_window(data, end):
+    funds, bench, rf = data
+    rolling = rolling_metrics(funds, bench, rf, windows=(63,))[63]
+    expected = batch_metrics(funds, rf, [(end - 62, end + 1)], bench)[:, 0]
+    for column in range(funds.shape[1]):
+        if np.isnan(funds[end - 62:end + 1, column]).any(): # moins de 63 dates valides : pas de valeur publiée
+            assert np.isnan(rolling["Volatility"][end, column])
+            continue
+        for name in ["Volatility", "Sharpe Ratio", "Sortino Ratio", "Beta", "Alpha"]:
+            assert rolling[name][end, column] == pytest.approx(expected[column, METRICS.index(name)], rel=1e-8)
+
+
+def test_tracking_error_and_incomplete_windows(data):
+    funds, bench, rf = data
+    rolling = rolling_metrics(funds[:, 0], bench, rf, windows=(63, 126))
+    assert np.isnan(rolling[126]["Volatility"][:125]).all() and not np.isnan(rolling[126]["Volatility"][125:]).any()
+    active = funds[300:363, 0] - bench[300:363]
+    assert rolling[63]["Tracking Error"][362, 0] == pytest.approx(np.std(active, ddof=1) * np.sqrt(252))